@@ -1,26 +1,190 @@
 # app.py - Fixed FastAPI Backend
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
-from typing import Optional, List
-import joblib
+from fastapi import FastAPI, HTTPException, Response, Header, Depends, Request, WebSocket
+from pydantic import BaseModel, Field, PrivateAttr, TypeAdapter, ValidationError, WrapValidator, model_validator
+from typing import Annotated, Optional, List, Dict, Any, Literal
 import numpy as np
-import pandas as pd
 from fastapi.middleware.cors import CORSMiddleware
-import uvicorn
 import os
+import secrets
+import time
+import json
+import asyncio
 from contextlib import asynccontextmanager
+from inference import InferenceExecutor, ExecutorSaturated
+from batching import MicroBatcher, BatcherFull
+from forest_engine import FlatForest
+from cache import ResponseCache
+from registry import ModelBundle, ModelRegistry, model_version
+import rules
+from streaming import score_stream, DuplexStreamingResponse
+from sessions import SessionStore
+from trends import TrendStore, FutureReading
+from metrics import MetricsRegistry, MetricsMiddleware, StageTimer, EXPOSITION_CONTENT_TYPE, gauge, render_histogram
+from profiling import Profiler, ProfilingMiddleware
+from food_types import FoodTypeTable, UnknownFoodType, parse_aliases
+from datetime import datetime, timezone
+
+# Feature order produced by trainModel.prepare_data
+FEATURE_COLUMNS = [
+    "BabyAgeMonths", "BabyWeightKg", "BabyHeightCm",
+    "FoodTypeEncoded", "FoodQuantityML", "FoodTempCelsius",
+    "RoomTempCelsius", "TimeSinceLastFeedingMin",
+    "WeightHeightRatio", "FeedingFrequency"
+]
+
+# Cry model inputs: the feeding features plus the feeding prediction (trainModel.CRY_FEATURES)
+CRY_FEATURE_COLUMNS = FEATURE_COLUMNS + ["SuitableFoodEncoded"]
+
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "1000"))
+
+# POST /analyze/sweep: fields a sweep may vary (-> feature column, rules.py
+# column) and the most grid points scored by one request
+SWEEP_FIELDS = {
+    "food_temp_celsius": ("FoodTempCelsius", "food_temp"),
+    "food_quantity_ml": ("FoodQuantityML", "quantity"),
+    "room_temp_celsius": ("RoomTempCelsius", "room_temp"),
+    "time_since_last_feeding_min": ("TimeSinceLastFeedingMin", "interval"),
+}
+MAX_SWEEP_POINTS = int(os.getenv("MAX_SWEEP_POINTS", "10000"))
+
+# Food types are the encoder's classes plus FOOD_TYPE_ALIASES ("Name:Class,...").
+# Other names are rejected with 422 unless UNKNOWN_FOOD_TYPE names a class to use.
+FOOD_TYPE_ALIASES = os.getenv("FOOD_TYPE_ALIASES", "Formula:Liquid,Breast Milk:Liquid")
+UNKNOWN_FOOD_TYPE = os.getenv("UNKNOWN_FOOD_TYPE") or None
+
+# Score model/cry_model.pkl after the feeding model; 0 leaves cry analysis rule-based only
+CRY_MODEL = os.getenv("CRY_MODEL", "1") == "1"
+
+# Forest inference engine: "sklearn" or "flat" (see forest_engine.py)
+INFERENCE_ENGINE = os.getenv("INFERENCE_ENGINE", "sklearn")
+
+# Model file format: "pickle" (feeding_model.pkl) or "flat", which memory-maps
+# model/<FLAT_MODEL_DIR>/ so all workers on a host share one copy of the forest.
+# trainModel.py writes model/feeding_model_flat/; for an existing pickle run
+# python forest_engine.py model/feeding_model.pkl model/feeding_model_flat
+# FLAT_MODEL_DIR=feeding_model_compressed serves `trainModel.py compress` output.
+MODEL_FORMAT = os.getenv("MODEL_FORMAT", "pickle")
+FLAT_MODEL_DIR = os.getenv("FLAT_MODEL_DIR", "feeding_model_flat")
+
+# Inference executor: "thread" or "process" pool with a bounded wait queue
+INFERENCE_EXECUTOR = os.getenv("INFERENCE_EXECUTOR", "thread")
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "4"))
+INFERENCE_MAX_QUEUE = int(os.getenv("INFERENCE_MAX_QUEUE", "64"))
+
+# /analyze response cache; size 0 disables, buckets of 0 keep exact values.
+# With buckets, requests are scored at their bucketed values, so a cached
+# response never carries another request's exact readings.
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "10000"))
+RESPONSE_CACHE_TTL_S = float(os.getenv("RESPONSE_CACHE_TTL_S", "300"))
+CACHE_TEMP_BUCKET_C = float(os.getenv("CACHE_TEMP_BUCKET_C", "0"))
+CACHE_INTERVAL_BUCKET_MIN = int(os.getenv("CACHE_INTERVAL_BUCKET_MIN", "0"))
+
+# NDJSON / WebSocket streaming: readings are scored in batches of up to
+# STREAM_BATCH_SIZE, or whatever arrived within STREAM_MAX_WAIT_MS. At most
+# STREAM_MAX_PENDING unscored lines are buffered before reading pauses.
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "32"))
+STREAM_MAX_WAIT_MS = float(os.getenv("STREAM_MAX_WAIT_MS", "20"))
+STREAM_MAX_PENDING = int(os.getenv("STREAM_MAX_PENDING", "256"))
+STREAM_MAX_LINE_BYTES = int(os.getenv("STREAM_MAX_LINE_BYTES", "16384"))
+
+# Model registry: MODEL_WATCH_SECONDS > 0 polls model/ for new files
+MODEL_WATCH_SECONDS = float(os.getenv("MODEL_WATCH_SECONDS", "0"))
+MODEL_MIN_HOLDOUT_ACCURACY = float(os.getenv("MODEL_MIN_HOLDOUT_ACCURACY", "0.7"))
+# Rows held out of training, written by trainModel.py train and incremental.py
+HOLDOUT_FILE = os.getenv("HOLDOUT_FILE", "model/holdout.parquet")
+
+# Admin endpoints are disabled unless ADMIN_TOKEN is set
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# Micro-batching: coalesce concurrent /analyze calls into one model call.
+# INFERENCE_MAX_QUEUE still counts requests: the batcher accepts up to
+# INFERENCE_WORKERS * MICRO_BATCH_MAX_SIZE requests being scored plus
+# INFERENCE_MAX_QUEUE waiting, and answers 503 at submit beyond that.
+MICRO_BATCHING = os.getenv("MICRO_BATCHING", "1") == "1"
+MICRO_BATCH_MAX_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", "64"))
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "5"))
+
+# Per-baby sessions: registered profiles plus last-feeding time. At most
+# SESSION_MAX_BABIES are kept; idle ones expire after SESSION_IDLE_TTL_S.
+# SESSION_STORE_FILE, if set, persists them across restarts.
+SESSION_MAX_BABIES = int(os.getenv("SESSION_MAX_BABIES", "10000"))
+SESSION_IDLE_TTL_S = float(os.getenv("SESSION_IDLE_TTL_S", "86400"))
+SESSION_SWEEP_SECONDS = float(os.getenv("SESSION_SWEEP_SECONDS", "60"))
+SESSION_STORE_FILE = os.getenv("SESSION_STORE_FILE")
+
+# Per-device temperature trends (POST /devices/{id}/readings): rolling
+# window length, slots kept per signal (faster readings are averaged into
+# TREND_WINDOW_S / TREND_MAX_SAMPLES intervals), and at most
+# TREND_MAX_DEVICES devices, dropped after TREND_IDLE_TTL_S without
+# readings. measured_at may run at most TREND_MAX_SKEW_S ahead of the server.
+TREND_WINDOW_S = float(os.getenv("TREND_WINDOW_S", "600"))
+TREND_MAX_SAMPLES = int(os.getenv("TREND_MAX_SAMPLES", "240"))
+TREND_MAX_DEVICES = int(os.getenv("TREND_MAX_DEVICES", "10000"))
+TREND_IDLE_TTL_S = float(os.getenv("TREND_IDLE_TTL_S", "3600"))
+TREND_MAX_SKEW_S = float(os.getenv("TREND_MAX_SKEW_S", "60"))
+
+# Model loading: "startup" loads before the server accepts requests;
+# "background" serves at once, /health reports "warming" until the models
+# are ready, and scoring requests wait up to WARMUP_WAIT_S before a 503.
+# joblib, sklearn (via unpickling), pandas and pyarrow are imported only
+# where they are used, so neither mode pays for them before loading.
+MODEL_LOADING = os.getenv("MODEL_LOADING", "startup")
+WARMUP_WAIT_S = float(os.getenv("WARMUP_WAIT_S", "30"))
+
+# Prometheus metrics at GET /metrics; 0 also turns off the per-stage timing.
+# With INFERENCE_EXECUTOR=process, stage timings and fallbacks are recorded
+# in the worker processes and are not exported.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+metrics = MetricsRegistry(enabled=METRICS_ENABLED)
+HTTP_REQUESTS = metrics.counter("feeding_http_requests_total", "HTTP requests by route and status",
+                                ("method", "route", "status"))
+HTTP_LATENCY = metrics.histogram("feeding_http_request_duration_seconds", "HTTP request latency by route",
+                                 ("method", "route"))
+STAGE_SECONDS = metrics.histogram("feeding_predict_stage_seconds",
+                                  "Time per prediction stage: per scoring call, validation per client request, "
+                                  "serialization per response",
+                                  ("stage",))
+ROWS_SCORED = metrics.counter("feeding_rows_scored_total", "Requests scored, by what made the prediction",
+                              ("source",))
+FALLBACKS = metrics.counter("feeding_model_fallbacks_total",
+                            "Rows where a model was skipped or failed and a fallback was used",
+                            ("model", "reason"))
+
+def count_food_type_fallback():
+    FALLBACKS.inc("encoder", "unknown_food_type")
+
+# Admin profiling (POST /admin/profile): longest allowed session
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "300"))
 
 # Pydantic models for request/response
 class FeedingRequest(BaseModel):
     baby_age_months: int = Field(..., ge=0, le=24, description="Baby age in months")
     baby_weight_kg: Optional[float] = Field(None, ge=1.0, le=20.0, description="Baby weight in kg")
     baby_height_cm: Optional[float] = Field(None, ge=30.0, le=100.0, description="Baby height in cm")
-    food_type: str = Field(..., description="Type of food (e.g., Formula, Breast Milk, Solid)")
+    food_type: str = Field(..., description="Type of food, one of GET /food-types (e.g. Liquid, Semi, Solid)")
     food_quantity_ml: int = Field(..., ge=0, le=500, description="Food quantity in ml")
     food_temp_celsius: float = Field(..., ge=0.0, le=60.0, description="Food temperature in Celsius")
     room_temp_celsius: float = Field(..., ge=10.0, le=45.0, description="Room temperature in Celsius")
     time_since_last_feeding_min: int = Field(..., ge=0, le=1440, description="Minutes since last feeding")
     baby_crying: Optional[bool] = Field(False, description="Is baby currently crying?")
+    # (weight, height, WeightHeightRatio) cached by a baby session; not part of the payload or cache key
+    _derived: Optional[tuple] = PrivateAttr(default=None)
+
+def timed_validation(data, handler):
+    if not metrics.enabled:
+        return handler(data)
+    started = time.perf_counter()
+    try:
+        return handler(data)
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, "validation")
+
+# A FeedingRequest from a client (request body or batch item), whose validation
+# is charged to the "validation" stage. FeedingRequests the server builds itself
+# (sweep grids, session readings, the reload holdout) are not timed.
+ClientFeedingRequest = Annotated[FeedingRequest, WrapValidator(timed_validation)]
+validate_client_request = TypeAdapter(ClientFeedingRequest).validate_python
 
 class FeedingResponse(BaseModel):
     status: str
@@ -30,29 +194,192 @@ class FeedingResponse(BaseModel):
     cry_reasons: List[str]
     recommendations: List[str]
     feeding_analysis: dict
+    cry_probability: Optional[float] = None  # cry model: chance the baby cries after this feed
+
+class BatchItemResult(BaseModel):
+    index: int
+    result: Optional[FeedingResponse] = None
+    error: Optional[str] = None
+    details: Optional[List[Dict[str, Any]]] = None  # validation errors: loc, msg, type
+
+class BatchFeedingResponse(BaseModel):
+    status: str
+    count: int
+    failed: int
+    results: List[BatchItemResult]
+
+class SweepAxis(BaseModel):
+    field: Literal[tuple(SWEEP_FIELDS)] = Field(..., description="FeedingRequest field to vary")
+    start: float
+    stop: float
+    steps: int = Field(11, ge=1, le=MAX_SWEEP_POINTS, description="Evenly spaced points from start to stop")
+    
+    @model_validator(mode="after")
+    def check_range(self):
+        if self.start > self.stop:
+            raise ValueError("start must not be greater than stop")
+        return self
+    
+    def values(self):
+        """Grid points; integer fields are rounded and deduplicated"""
+        points = np.linspace(self.start, self.stop, self.steps)
+        if FeedingRequest.model_fields[self.field].annotation is int:
+            points = np.unique(np.rint(points))
+        return points
+
+class SweepRequest(BaseModel):
+    base: FeedingRequest
+    axes: List[SweepAxis] = Field(..., min_length=1, max_length=2, description="One or two fields to vary")
+    
+    @model_validator(mode="after")
+    def check_grid(self):
+        if len({axis.field for axis in self.axes}) != len(self.axes):
+            raise ValueError("Each field may be swept only once")
+        points = int(np.prod([axis.steps for axis in self.axes]))
+        if points > MAX_SWEEP_POINTS:
+            raise ValueError(f"Grid too large ({points} points, max {MAX_SWEEP_POINTS})")
+        # Grid values must be valid request values, so the ends are checked like a request
+        base = self.base.model_dump()
+        for axis in self.axes:
+            for value in (axis.start, axis.stop):
+                try:
+                    FeedingRequest(**{**base, axis.field: value})
+                except ValidationError as e:
+                    raise ValueError(f"{axis.field}={value}: {e.errors()[0]['msg']}")
+        return self
+
+class SweepResponse(BaseModel):
+    status: str
+    source: str  # "model", or "rules" when no model could score the grid
+    fields: List[str]
+    values: List[List[float]]  # grid points per axis
+    suitable: List[Any]  # per point; nested [i][j] for two axes
+    confidence: List[Any]
+    suitable_points: int
+    suitable_bounds: Optional[Dict[str, List[float]]]  # field -> [min, max] over suitable points
+
+class BabyProfile(BaseModel):
+    baby_age_months: int = Field(..., ge=0, le=24, description="Baby age in months at registration")
+    baby_weight_kg: Optional[float] = Field(None, ge=1.0, le=20.0, description="Baby weight in kg")
+    baby_height_cm: Optional[float] = Field(None, ge=30.0, le=100.0, description="Baby height in cm")
+    food_type: Optional[str] = Field(None, description="Usual food type, used when a reading omits it")
+    last_feeding_at: Optional[datetime] = Field(None, description="Time of the last feeding, if known")
+
+class BabyReading(BaseModel):
+    food_type: Optional[str] = Field(None, description="Defaults to the profile's food type")
+    food_quantity_ml: int = Field(..., ge=0, le=500, description="Food quantity in ml")
+    food_temp_celsius: float = Field(..., ge=0.0, le=60.0, description="Food temperature in Celsius")
+    room_temp_celsius: float = Field(..., ge=10.0, le=45.0, description="Room temperature in Celsius")
+    baby_crying: Optional[bool] = Field(False, description="Is baby currently crying?")
+    time_since_last_feeding_min: Optional[int] = Field(None, ge=0, le=1440, description="Overrides the tracked interval")
+    fed: bool = Field(False, description="Record this reading as a feeding once analysed")
+
+class DeviceReading(BaseModel):
+    room_temp_celsius: Optional[float] = Field(None, ge=-20.0, le=60.0, description="Room temperature in Celsius")
+    food_temp_celsius: Optional[float] = Field(None, ge=0.0, le=100.0, description="Food temperature in Celsius")
+    measured_at: Optional[datetime] = Field(None, description="Sensor time; defaults to arrival time")
+    
+    @model_validator(mode="after")
+    def check_values(self):
+        if self.room_temp_celsius is None and self.food_temp_celsius is None:
+            raise ValueError("A reading needs room_temp_celsius, food_temp_celsius or both")
+        return self
+
+class DeviceTrendsResponse(BaseModel):
+    device_id: str
+    readings: int
+    window_seconds: float
+    signals: Dict[str, dict]  # signal -> samples, mean, variance, slope_per_min, r2, trend_value, ...
+    alerts: List[Dict[str, str]]  # code, signal, message
+
+class BabySessionResponse(BaseModel):
+    baby_id: str
+    baby_age_months: int
+    baby_weight_kg: Optional[float]
+    baby_height_cm: Optional[float]
+    food_type: Optional[str]
+    last_feeding_at: Optional[datetime]
+    minutes_since_last_feeding: Optional[int]
+    derived: dict
 
 class BabyFeedingPredictor:
-    def __init__(self):
-        self.feeding_model = None
-        self.food_encoder = None
+    def __init__(self, engine=INFERENCE_ENGINE):
+        self.engine = engine
+        self.models = ModelBundle()  # swapped as a whole by activate()
+        self.default_food_types = FoodTypeTable(aliases=parse_aliases(FOOD_TYPE_ALIASES), fallback=UNKNOWN_FOOD_TYPE)
         self.model_loaded = False
+        self.reload_listeners = []  # called after every load_models, e.g. to clear caches
+    
+    # Read-only views of the active bundle
+    @property
+    def feeding_model(self):
+        return self.models.feeding_model
+    
+    @property
+    def feeding_scorer(self):
+        return self.models.feeding_scorer
+    
+    @property
+    def food_encoder(self):
+        return self.models.food_encoder
+    
+    def load_bundle(self, model_dir="model"):
+        """Load the model files in model_dir into a new, inactive ModelBundle"""
+        import joblib  # with sklearn, which unpickling imports, the slowest import of startup
+        started = time.perf_counter()
+        bundle = ModelBundle(version=model_version(model_dir))
+        feeding_path = os.path.join(model_dir, "feeding_model.pkl")
+        flat_path = os.path.join(model_dir, FLAT_MODEL_DIR)
+        encoder_path = os.path.join(model_dir, "food_type_encoder.pkl")
+        
+        flat_bundle = MODEL_FORMAT == "flat" and os.path.exists(os.path.join(flat_path, "meta.json"))
+        if MODEL_FORMAT == "flat" and not flat_bundle:
+            print(f"Warning: MODEL_FORMAT=flat but {flat_path} has no meta.json; loading {feeding_path} instead. "
+                  f"Build the bundle with: python forest_engine.py {feeding_path} {flat_path}")
+        
+        if flat_bundle:
+            bundle.feeding_model = FlatForest.load(flat_path, mmap=True)
+            bundle.feature_index = self.resolve_feature_index(bundle.feeding_model)
+            bundle.feeding_scorer = bundle.feeding_model
+            print("Feeding model memory-mapped from flat bundle.")
+        elif os.path.exists(feeding_path):
+            bundle.feeding_model = joblib.load(feeding_path)
+            bundle.feature_index = self.resolve_feature_index(bundle.feeding_model)
+            bundle.feeding_scorer = self.build_scorer(bundle.feeding_model)
+            print("Feeding model loaded successfully.")
+        else:
+            print("Warning: feeding_model.pkl not found. Using fallback predictions.")
+            
+        if os.path.exists(encoder_path):
+            bundle.food_encoder = joblib.load(encoder_path)
+            print("Food encoder loaded successfully.")
+        else:
+            print("Warning: food_type_encoder.pkl not found. Using the training workbook's food types.")
+        bundle.food_types = FoodTypeTable.from_encoder(bundle.food_encoder, parse_aliases(FOOD_TYPE_ALIASES),
+                                                       UNKNOWN_FOOD_TYPE)
+        
+        cry_path = os.path.join(model_dir, "cry_model.pkl")
+        if CRY_MODEL and os.path.exists(cry_path) and os.path.getsize(cry_path) > 0:
+            bundle.cry_model = joblib.load(cry_path)
+            bundle.cry_feature_index = self.resolve_feature_index(bundle.cry_model, CRY_FEATURE_COLUMNS)
+            if bundle.cry_feature_index is not None:
+                bundle.cry_scorer = self.build_scorer(bundle.cry_model)
+                print("Cry model loaded successfully.")
         
+        bundle.load_seconds = time.perf_counter() - started
+        return bundle
+    
+    def activate(self, bundle):
+        """Make bundle the active model version; requests already running keep theirs"""
+        self.models = bundle
+        self.model_loaded = True
+        for listener in self.reload_listeners:
+            listener()
+    
     def load_models(self):
         """Load pre-trained models"""
         try:
-            if os.path.exists("model/feeding_model.pkl"):
-                self.feeding_model = joblib.load("model/feeding_model.pkl")
-                print("Feeding model loaded successfully.")
-            else:
-                print("Warning: feeding_model.pkl not found. Using fallback predictions.")
-                
-            if os.path.exists("model/food_type_encoder.pkl"):
-                self.food_encoder = joblib.load("model/food_type_encoder.pkl")
-                print("Food encoder loaded successfully.")
-            else:
-                print("Warning: food_type_encoder.pkl not found. Using fallback encoding.")
-            
-            self.model_loaded = True
+            self.activate(self.load_bundle())
             print("Model loading completed.")
             return True
         except Exception as e:
@@ -60,6 +387,28 @@ class BabyFeedingPredictor:
             self.model_loaded = True  # Set to True to allow fallback predictions
             return False
     
+    def build_scorer(self, model):
+        """Pick the object that runs predict/predict_proba for the configured engine"""
+        if self.engine == "flat":
+            try:
+                scorer = FlatForest.from_sklearn(model)
+                print(f"Model compiled to flat arrays ({len(scorer.feature)} nodes).")
+                return scorer
+            except Exception as e:
+                print(f"Warning: could not compile model ({e}). Using sklearn inference.")
+        return model
+    
+    def resolve_feature_index(self, model, columns=FEATURE_COLUMNS):
+        """Map the model's training columns onto columns (default FEATURE_COLUMNS)"""
+        names = getattr(model, "feature_names_in_", None)
+        if names is None:
+            return list(range(len(columns)))
+        missing = [name for name in names if name not in columns]
+        if missing:
+            print(f"Warning: model expects unknown features {missing}. Using fallback predictions.")
+            return None
+        return [columns.index(name) for name in names]
+    
     def estimate_baby_metrics(self, age_months):
         """Estimate baby weight and height based on age if not provided"""
         # WHO growth standards approximation
@@ -72,40 +421,39 @@ class BabyFeedingPredictor:
         
         return weight, height
     
-    def predict_feeding(self, request: FeedingRequest):
-        """Main prediction function"""
-        if not self.model_loaded:
-            if not self.load_models():
-                print("Warning: Models not available, using fallback predictions")
-        
-        # Estimate missing metrics
-        if request.baby_weight_kg is None or request.baby_height_cm is None:
-            est_weight, est_height = self.estimate_baby_metrics(request.baby_age_months)
-            weight = request.baby_weight_kg or est_weight
-            height = request.baby_height_cm or est_height
+    def food_type_table(self, models=None):
+        return (models or self.models).food_types or self.default_food_types
+    
+    def encode_food_type(self, food_type, models=None):
+        """Encoder code of food_type from the loaded model's lookup table.
+
+        Raises UnknownFoodType unless UNKNOWN_FOOD_TYPE sets a fallback.
+        """
+        return self.food_type_table(models).encode(food_type, count_food_type_fallback)
+    
+    def prepare_features(self, request: FeedingRequest, models=None, food_type_encoded=None):
+        """Build one FEATURE_COLUMNS row plus the weight/height used"""
+        if request._derived is not None:
+            # A session reading: metrics were estimated once per baby and age month
+            weight, height, weight_height_ratio = request._derived
         else:
-            weight = request.baby_weight_kg
-            height = request.baby_height_cm
-        
-        # Prepare features for prediction
-        try:
-            if self.food_encoder and hasattr(self.food_encoder, 'transform'):
-                food_type_encoded = self.food_encoder.transform([request.food_type])[0]
+            # Estimate missing metrics
+            if request.baby_weight_kg is None or request.baby_height_cm is None:
+                est_weight, est_height = self.estimate_baby_metrics(request.baby_age_months)
+                weight = request.baby_weight_kg or est_weight
+                height = request.baby_height_cm or est_height
             else:
-                # Fallback encoding
-                food_types = {"Formula": 0, "Breast Milk": 1, "Solid": 2, "Liquid": 0, "Semi": 1}
-                food_type_encoded = food_types.get(request.food_type, 0)
-        except Exception as e:
-            print(f"Error encoding food type: {e}")
-            food_types = {"Formula": 0, "Breast Milk": 1, "Solid": 2, "Liquid": 0, "Semi": 1}
-            food_type_encoded = food_types.get(request.food_type, 0)
+                weight = request.baby_weight_kg
+                height = request.baby_height_cm
+            weight_height_ratio = weight / (height / 100)
+        
+        if food_type_encoded is None:
+            food_type_encoded = self.encode_food_type(request.food_type, models)
         
         # Calculate derived features
-        weight_height_ratio = weight / (height / 100)
         feeding_frequency = 24 * 60 / max(request.time_since_last_feeding_min, 1)
         
-        # Create prediction input
-        features = np.array([[
+        row = [
             request.baby_age_months,
             weight,
             height,
@@ -116,43 +464,257 @@ class BabyFeedingPredictor:
             request.time_since_last_feeding_min,
             weight_height_ratio,
             feeding_frequency
-        ]])
+        ]
+        return row, weight, height
+    
+    def model_input(self, features, models=None):
+        """Select the columns the loaded model was trained on"""
+        feature_index = (models or self.models).feature_index
+        if feature_index is None:
+            raise ValueError("Feeding model features do not match FEATURE_COLUMNS")
+        return features[:, feature_index]
+    
+    def score_features(self, features, models=None):
+        """(suitable, confidence) per row from a single predict_proba pass.
+
+        The label is the argmax class, which is exactly what the forest's
+        predict() returns, so the trees are only walked once.
+        """
+        suitable, confidence = self.score_matrix(features, models)
+        return list(zip(suitable.tolist(), confidence.tolist()))
+    
+    def score_matrix(self, features, models=None):
+        """score_features as (suitable, confidence) arrays, for large grids"""
+        models = models or self.models
+        probabilities = models.feeding_scorer.predict_proba(self.model_input(features, models))
+        suitable_class = np.array([self.is_suitable(label) for label in models.feeding_scorer.classes_])
+        return suitable_class[probabilities.argmax(axis=1)], probabilities.max(axis=1)
+    
+    def score_cry(self, features, predictions, models=None):
+        """Cry-after-feed probability per row, or None without a cry model.
+        
+        Reuses the feeding feature rows and appends the feeding prediction,
+        so no per-request work is repeated for the second model.
+        """
+        models = models or self.models
+        if models.cry_scorer is None:
+            return None
+        cry_input = np.column_stack([features, np.asarray(predictions, dtype=np.float64)])
+        probabilities = models.cry_scorer.predict_proba(cry_input[:, models.cry_feature_index])
+        cried = [self.is_suitable(label) for label in models.cry_scorer.classes_]
+        if True not in cried:
+            return None
+        return probabilities[:, cried.index(True)].tolist()
+    
+    def is_suitable(self, label):
+        """Interpret a model class label (1/0, True/False or Yes/No)"""
+        if isinstance(label, str):
+            return label.strip().lower() in ("yes", "true", "1")
+        return bool(label)
+    
+    def predict_feeding(self, request: FeedingRequest):
+        """Main prediction function"""
+        result = self.predict_feeding_many([request])[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+    
+    def predict_feeding_many(self, requests: List[FeedingRequest]):
+        """Score validated requests with a single predict_proba call.
+
+        Returns one FeedingResponse per request, or the Exception raised
+        while analysing that request, in input order.
+        """
+        if not self.model_loaded:
+            if not self.load_models():
+                print("Warning: Models not available, using fallback predictions")
+        
+        models = self.models
+        timer = StageTimer(metrics, STAGE_SECONDS)
+        results = [None] * len(requests)
+        prepared = []  # indices of requests whose features were built
+        rows, weights, heights = [], [], []
         
-        # Make prediction
-        if self.feeding_model and hasattr(self.feeding_model, 'predict'):
+        for i, request in enumerate(requests):
             try:
-                prediction = self.feeding_model.predict(features)[0]
-                confidence = float(max(self.feeding_model.predict_proba(features)[0]))
+                food_type_encoded = self.encode_food_type(request.food_type, models)
+                timer.lap("encoding")
+                row, weight, height = self.prepare_features(request, models, food_type_encoded)
+                timer.lap("features")
+            except Exception as e:
+                results[i] = e
+                timer.skip()
+                continue
+            prepared.append(i)
+            rows.append(row)
+            weights.append(weight)
+            heights.append(height)
+        
+        if not prepared:
+            return results
+        
+        batch = [requests[i] for i in prepared]
+        columns = rules.request_columns(batch, weights, heights)
+        
+        # Make prediction; the feature matrix is built once for both models
+        features = np.array(rows)
+        timer.lap("features")
+        source = "model"
+        if models.feeding_scorer and hasattr(models.feeding_scorer, 'predict_proba'):
+            try:
+                scored = self.score_features(features, models)
+                predictions = [p for p, _ in scored]
+                confidences = [c for _, c in scored]
             except Exception as e:
                 print(f"Error with model prediction: {e}")
-                prediction, confidence = self.rule_based_prediction(request)
+                FALLBACKS.inc("feeding", "exception", amount=len(batch))
+                source = "rules"
+                predictions, confidences = rules.rule_based_predictions(columns)
         else:
             # Fallback rule-based prediction
-            prediction, confidence = self.rule_based_prediction(request)
+            FALLBACKS.inc("feeding", "no_model", amount=len(batch))
+            source = "rules"
+            predictions, confidences = rules.rule_based_predictions(columns)
+        ROWS_SCORED.inc(source, amount=len(batch))
         
-        # Analyze crying reasons
-        cry_reasons = []
-        recommendations = []
+        try:
+            cry_probabilities = self.score_cry(features, predictions, models)
+        except Exception as e:
+            print(f"Error with cry model prediction: {e}")
+            FALLBACKS.inc("cry", "exception", amount=len(batch))
+            cry_probabilities = None
+        timer.lap("inference")
         
-        if request.baby_crying:
-            cry_reasons = self.analyze_cry_reasons(request, weight, height)
-            recommendations = self.generate_recommendations(request, prediction, cry_reasons)
-        else:
-            recommendations = self.generate_recommendations(request, prediction, [])
+        try:
+            responses = self.build_responses(batch, columns, predictions, confidences, cry_probabilities, timer)
+        except Exception as e:
+            responses = [e] * len(batch)
+        for i, response in zip(prepared, responses):
+            results[i] = response
+        timer.record()
+        return results
+    
+    def predict_feeding_batch(self, items: List[Any]):
+        """Validate raw batch items and score the valid ones together"""
+        results = [BatchItemResult(index=i) for i in range(len(items))]
+        valid = []  # (index, request)
+        
+        for i, item in enumerate(items):
+            if not isinstance(item, dict):
+                results[i].error = "Each item must be a JSON object"
+                continue
+            try:
+                valid.append((i, validate_client_request(item)))
+            except ValidationError as e:
+                results[i].details = e.errors(include_url=False, include_context=False, include_input=False)
+                results[i].error = "Invalid request: " + "; ".join(
+                    f"{'.'.join(str(part) for part in error['loc']) or 'item'}: {error['msg']}"
+                    for error in results[i].details)
+        
+        scored = self.predict_feeding_many([request for _, request in valid])
+        for (i, _), outcome in zip(valid, scored):
+            if isinstance(outcome, Exception):
+                results[i].error = f"Analysis failed: {outcome}"
+            else:
+                results[i].result = outcome
+        
+        failed = sum(1 for r in results if r.error is not None)
+        return BatchFeedingResponse(
+            status="success" if failed == 0 else "partial",
+            count=len(results),
+            failed=failed,
+            results=results
+        )
+    
+    def predict_sweep(self, base: FeedingRequest, axes: List[SweepAxis]):
+        """Suitability and confidence over a grid of one or two fields around base.
+
+        The grid is a single feature matrix, the base row repeated with
+        the swept columns overwritten, scored in one predict_proba pass.
+        """
+        if not self.model_loaded:
+            if not self.load_models():
+                print("Warning: Models not available, using fallback predictions")
         
-        # Feeding analysis
-        feeding_analysis = self.analyze_feeding_conditions(request, weight, height)
+        models = self.models
+        row, weight, height = self.prepare_features(base, models)
+        values = [axis.values() for axis in axes]
+        grid = [points.ravel() for points in np.meshgrid(*values, indexing="ij")]
+        n = len(grid[0])
         
-        return FeedingResponse(
+        features = np.tile(np.asarray(row, dtype=np.float64), (n, 1))
+        for axis, points in zip(axes, grid):
+            features[:, FEATURE_COLUMNS.index(SWEEP_FIELDS[axis.field][0])] = points
+        interval = features[:, FEATURE_COLUMNS.index("TimeSinceLastFeedingMin")]
+        features[:, FEATURE_COLUMNS.index("FeedingFrequency")] = 24 * 60 / np.maximum(interval, 1)
+        
+        source = "model"
+        suitable = None
+        if models.feeding_scorer and hasattr(models.feeding_scorer, 'predict_proba'):
+            try:
+                suitable, confidence = self.score_matrix(features, models)
+            except Exception as e:
+                print(f"Error with model prediction: {e}")
+                FALLBACKS.inc("feeding", "exception", amount=n)
+        else:
+            FALLBACKS.inc("feeding", "no_model", amount=n)
+        if suitable is None:
+            source = "rules"
+            columns = {name: np.repeat(column, n)
+                       for name, column in rules.request_columns([base], [weight], [height]).items()}
+            for axis, points in zip(axes, grid):
+                name = SWEEP_FIELDS[axis.field][1]
+                columns[name] = points.astype(columns[name].dtype)
+            suitable, confidence = rules.rule_based_predictions(columns)
+        ROWS_SCORED.inc(source, amount=n)
+        
+        shape = tuple(len(points) for points in values)
+        bounds = None
+        if suitable.any():
+            bounds = {axis.field: [float(points[suitable].min()), float(points[suitable].max())]
+                      for axis, points in zip(axes, grid)}
+        return SweepResponse(
             status="success",
-            feeding_suitable=bool(prediction),
-            confidence=confidence,
-            baby_crying=bool(request.baby_crying),
-            cry_reasons=cry_reasons,
-            recommendations=recommendations,
-            feeding_analysis=feeding_analysis
+            source=source,
+            fields=[axis.field for axis in axes],
+            values=[points.tolist() for points in values],
+            suitable=suitable.reshape(shape).tolist(),
+            confidence=np.round(confidence, 4).reshape(shape).tolist(),
+            suitable_points=int(suitable.sum()),
+            suitable_bounds=bounds
         )
     
+    def build_responses(self, requests: List[FeedingRequest], columns, predictions, confidences,
+                        cry_probabilities=None, timer=None):
+        """Assemble cry reasons, recommendations and analysis for a batch of predictions"""
+        columns["prediction"] = np.asarray(predictions, dtype=bool)
+        evaluated = rules.evaluate(columns)
+        if timer:
+            timer.lap("rules")
+        if cry_probabilities is None:
+            cry_probabilities = [None] * len(requests)
+        
+        responses = [
+            FeedingResponse(
+                status="success",
+                feeding_suitable=bool(prediction),
+                confidence=float(confidence),
+                baby_crying=bool(request.baby_crying),
+                cry_reasons=cry_reasons,
+                recommendations=recommendations,
+                feeding_analysis=feeding_analysis,
+                cry_probability=None if cry_probability is None else round(float(cry_probability), 4)
+            )
+            for request, prediction, confidence, cry_reasons, recommendations, feeding_analysis, cry_probability in zip(
+                requests, predictions, confidences, evaluated["cry_reasons"],
+                evaluated["recommendations"], evaluated["feeding_analysis"], cry_probabilities)
+        ]
+        if timer:
+            timer.lap("response_build")
+        return responses
+    
+    # Scalar reference implementations of the rules in rules.py. The serving
+    # paths use the vectorized tables; tests/test_rules.py checks parity.
     def rule_based_prediction(self, request: FeedingRequest):
         """Fallback rule-based prediction if model unavailable"""
         score = 0
@@ -278,16 +840,146 @@ class BabyFeedingPredictor:
 
 # Initialize predictor globally
 predictor = BabyFeedingPredictor()
+executor = InferenceExecutor(INFERENCE_EXECUTOR, INFERENCE_WORKERS, INFERENCE_MAX_QUEUE)
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL_S,
+                               CACHE_TEMP_BUCKET_C, CACHE_INTERVAL_BUCKET_MIN)
+predictor.reload_listeners.append(response_cache.clear)
+sessions = SessionStore(predictor.estimate_baby_metrics, SESSION_MAX_BABIES, SESSION_IDLE_TTL_S,
+                        SESSION_STORE_FILE, SESSION_SWEEP_SECONDS)
+trends = TrendStore(TREND_WINDOW_S, TREND_MAX_SAMPLES, TREND_MAX_DEVICES, TREND_IDLE_TTL_S,
+                    SESSION_SWEEP_SECONDS, TREND_MAX_SKEW_S)
+
+_holdout = None  # (path, mtime, requests, labels)
+
+def holdout_accuracy(bundle: ModelBundle):
+    """Accuracy of a candidate bundle on the rows trainModel.py held out of training.
+
+    Returns None, which skips the reload gate, when HOLDOUT_FILE is missing.
+    """
+    global _holdout
+    if not os.path.exists(HOLDOUT_FILE):
+        print(f"Warning: {HOLDOUT_FILE} not found; activating the model without a holdout check.")
+        return None
+    mtime = os.path.getmtime(HOLDOUT_FILE)
+    if _holdout is None or _holdout[:2] != (HOLDOUT_FILE, mtime):
+        from records import read_records  # pandas and pyarrow are only needed here
+        requests, labels = [], []
+        for rec in read_records(HOLDOUT_FILE).itertuples():
+            try:
+                requests.append(FeedingRequest(
+                    baby_age_months=rec.BabyAgeMonths,
+                    food_type=rec.FoodType,
+                    food_quantity_ml=rec.FoodQuantityML,
+                    food_temp_celsius=rec.FoodTempCelsius,
+                    room_temp_celsius=rec.RoomTempCelsius,
+                    time_since_last_feeding_min=rec.TimeSinceLastFeedingMin
+                ))
+            except ValidationError:
+                continue
+            labels.append(predictor.is_suitable(rec.SuitableFood))
+        _holdout = (HOLDOUT_FILE, mtime, requests, labels)
+    
+    _, _, requests, labels = _holdout
+    features = np.array([predictor.prepare_features(r, bundle)[0] for r in requests])
+    predictions = [p for p, _ in predictor.score_features(features, bundle)]
+    return float(np.mean(np.array(predictions) == np.array(labels)))
+
+registry = ModelRegistry(predictor, "model", validate=holdout_accuracy,
+                         min_accuracy=MODEL_MIN_HOLDOUT_ACCURACY,
+                         poll_seconds=MODEL_WATCH_SECONDS,
+                         on_activate=executor.recycle)
+
+# Module-level entry points so process pools can pickle them by reference
+profiler = Profiler()
+
+# Executor entry points; profiler.run profiles them during a cprofile session
+def run_predict_feeding(request: FeedingRequest):
+    return profiler.run(predictor.predict_feeding, request)
+
+def run_predict_feeding_batch(items: List[Any]):
+    return profiler.run(predictor.predict_feeding_batch, items)
+
+def run_predict_feeding_many(requests: List[FeedingRequest]):
+    return profiler.run(predictor.predict_feeding_many, requests)
+
+def run_predict_sweep(request: SweepRequest):
+    return profiler.run(predictor.predict_sweep, request.base, request.axes)
+
+async def score_micro_batch(requests: List[FeedingRequest]):
+    """Score one coalesced batch on the executor, tagging each result with its queue wait.
+
+    The batcher already admitted these requests, so a busy executor is
+    waited out rather than failing the whole batch.
+    """
+    started_at = time.perf_counter()
+    while True:
+        submitted_at = time.perf_counter()
+        try:
+            results, queue_wait_ms = await executor.run(run_predict_feeding_many, requests)
+            break
+        except ExecutorSaturated:
+            await asyncio.sleep(0.01)
+    queue_wait_ms += (submitted_at - started_at) * 1000  # plus the time spent retrying
+    return [r if isinstance(r, Exception) else (r, queue_wait_ms) for r in results]
+
+batcher = MicroBatcher(score_micro_batch, MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS,
+                       INFERENCE_WORKERS * MICRO_BATCH_MAX_SIZE + INFERENCE_MAX_QUEUE) if MICRO_BATCHING else None
+
+@metrics.collector
+def collect_service_metrics():
+    """Model version, cache, executor, micro-batcher and session state at scrape time"""
+    active = predictor.models
+    lines = gauge("feeding_model_info", "Active model version and inference engine", 1,
+                  ("version", "engine", "cry_model"),
+                  (active.version, type(active.feeding_scorer).__name__ if active.feeding_scorer else "rules",
+                   type(active.cry_scorer).__name__ if active.cry_scorer else "none"))
+    lines += gauge("feeding_model_load_seconds", "Load time of the active model version", active.load_seconds)
+    lines += gauge("feeding_model_reloads", "Model versions activated since startup", registry.reloads)
+    if active.holdout_accuracy is not None:
+        lines += gauge("feeding_model_holdout_accuracy", "Holdout accuracy of the active model", active.holdout_accuracy)
+    cache = response_cache.stats()
+    for key in ("size", "hits", "misses", "evictions", "expirations", "invalidations"):
+        lines += gauge(f"feeding_response_cache_{key}", f"Response cache {key}", cache[key])
+    pool = executor.stats()
+    for key in ("inflight", "queued", "completed", "rejected"):
+        lines += gauge(f"feeding_inference_executor_{key}", f"Inference executor {key}", pool[key])
+    if batcher is not None:
+        lines += ["# TYPE feeding_micro_batch_size histogram"]
+        lines += render_histogram("feeding_micro_batch_size", batcher.flush_sizes)
+        lines += ["# TYPE feeding_micro_batch_wait_ms histogram"]
+        lines += render_histogram("feeding_micro_batch_wait_ms", batcher.wait_ms)
+        lines += gauge("feeding_micro_batch_outstanding", "Requests accepted by the micro-batcher and not yet answered",
+                       batcher.outstanding)
+        lines += gauge("feeding_micro_batch_rejected", "Requests refused because the micro-batcher was full",
+                       batcher.rejected)
+    lines += gauge("feeding_sessions", "Registered baby sessions", len(sessions.sessions))
+    lines += gauge("feeding_trend_devices", "Devices with temperature trend windows", len(trends.devices))
+    return lines
+
+async def models_ready():
+    """Hold scoring requests while models load in the background"""
+    if not await registry.wait_ready(WARMUP_WAIT_S):
+        raise HTTPException(status_code=503, detail="Models are still loading", headers={"Retry-After": "1"})
 
 # Lifespan event handler (replaces @app.on_event("startup"))
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     print("Starting up Baby Feeding API...")
-    predictor.load_models()
+    sessions.load()
+    executor.start()
+    await registry.warm_up(background=MODEL_LOADING == "background")
+    sessions.start()
+    trends.start()
     yield
     # Shutdown
     print("Shutting down Baby Feeding API...")
+    if batcher is not None:
+        await batcher.stop()
+    await registry.stop()
+    await sessions.stop()
+    await trends.stop()
+    executor.shutdown()
 
 # Initialize FastAPI app with lifespan
 app = FastAPI(
@@ -304,30 +996,324 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Queue-Wait-Ms", "X-Batch-Size", "X-Cache"],
 )
 
+app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+# Outermost, so route latency includes CORS and serialization
+app.add_middleware(MetricsMiddleware, registry=metrics, requests=HTTP_REQUESTS, latency=HTTP_LATENCY)
+
 @app.get("/")
 async def root():
     return {"message": "Baby Feeding Suitability API", "version": "1.0.0"}
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "models_loaded": predictor.model_loaded}
+    return {
+        "status": "warming" if registry.warming else "healthy",
+        "models_loaded": predictor.model_loaded,
+        "model": registry.status(),
+        "inference_engine": type(predictor.feeding_scorer).__name__ if predictor.feeding_scorer else None,
+        "cry_model": type(predictor.models.cry_scorer).__name__ if predictor.models.cry_scorer else None,
+        "inference_executor": executor.stats(),
+        "micro_batching": batcher.stats() if batcher else None,
+        "response_cache": response_cache.stats(),
+        "sessions": sessions.stats(),
+        "trends": trends.stats()
+    }
 
-@app.post("/analyze", response_model=FeedingResponse)
-async def analyze_feeding(request: FeedingRequest):
-    """Analyze feeding suitability and provide recommendations"""
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus text exposition of request, stage and model metrics"""
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (METRICS_ENABLED=0)")
+    return Response(metrics.render(), media_type=EXPOSITION_CONTENT_TYPE)
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (set ADMIN_TOKEN)")
+    if not secrets.compare_digest((x_admin_token or "").encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+@app.post("/admin/models/reload", dependencies=[Depends(require_admin)])
+async def reload_models(force: bool = False):
+    """Load model/ in the background, validate it on the holdout and swap it in"""
+    return await registry.reload(force=force)
+
+@app.post("/admin/profile", dependencies=[Depends(require_admin)])
+async def profile_worker(mode: str = "sample", seconds: float = 10.0, requests: Optional[int] = None,
+                         interval_ms: float = 5.0, format: Optional[str] = None, include_idle: bool = False):
+    """Profile this worker for `seconds` or until `requests` requests finish, then return the dump.
+
+    mode=sample returns collapsed stacks (flamegraph.pl / speedscope);
+    mode=cprofile profiles the scoring calls and returns a pstats file,
+    or the top functions as text with format=text.
+    """
+    if mode not in ("sample", "cprofile"):
+        raise HTTPException(status_code=422, detail="mode must be 'sample' or 'cprofile'")
+    if not 0 < seconds <= PROFILE_MAX_SECONDS:
+        raise HTTPException(status_code=422, detail=f"seconds must be in (0, {PROFILE_MAX_SECONDS:g}]")
+    if requests is not None and requests < 1:
+        raise HTTPException(status_code=422, detail="requests must be at least 1")
+    if not 1 <= interval_ms <= 1000:
+        raise HTTPException(status_code=422, detail="interval_ms must be in [1, 1000]")
+    try:
+        session = profiler.start(mode, seconds, requests, interval_ms, include_idle)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    try:
+        while not session.finished():
+            await asyncio.sleep(0.05)
+    finally:
+        profiler.finish()
+    
+    summary = session.summary()
+    print(f"Profiling session finished: {summary}")
+    headers = {f"X-Profile-{key.replace('_', '-').title()}": str(value) for key, value in summary.items()}
+    if mode == "sample":
+        return Response(session.collapsed(), media_type="text/plain", headers=headers)
+    if format == "text":
+        return Response(session.text(), media_type="text/plain", headers=headers)
+    headers["Content-Disposition"] = 'attachment; filename="profile.pstats"'
+    return Response(session.pstats_bytes(), media_type="application/octet-stream", headers=headers)
+
+def saturated_error(e: ExecutorSaturated):
+    return HTTPException(status_code=503, detail=f"Server busy: {e}", headers={"Retry-After": "1"})
+
+def json_response(result: BaseModel, response: Response):
+    """Encode a scoring endpoint's result, charged to the "serialization" stage.
+
+    Returning a Response skips FastAPI re-validating the model it just got
+    from the predictor against response_model (kept for the OpenAPI
+    schema), so JSON encoding is all the serialization left to time.
+    """
+    started = time.perf_counter()
+    body = result.model_dump_json()
+    if metrics.enabled:
+        STAGE_SECONDS.observe(time.perf_counter() - started, "serialization")
+    rendered = Response(body, media_type="application/json")
+    rendered.headers.raw.extend(response.headers.raw)  # X-Cache, X-Queue-Wait-Ms, ...
+    return rendered
+
+async def score_request(request: FeedingRequest, response: Response):
+    """Cache lookup, then the micro-batcher or executor; sets the timing headers"""
+    if response_cache.enabled:
+        request = response_cache.canonical(request)
+        cache_key = response_cache.key(request)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            response.headers["X-Cache"] = "hit"
+            return cached
+        generation = response_cache.generation
     try:
-        result = predictor.predict_feeding(request)
+        if batcher is not None:
+            (result, executor_wait_ms), batch_wait_ms, batch_size = await batcher.submit(request)
+            queue_wait_ms = batch_wait_ms + executor_wait_ms
+            response.headers["X-Batch-Size"] = str(batch_size)
+        else:
+            result, queue_wait_ms = await executor.run(run_predict_feeding, request)
+        response.headers["X-Queue-Wait-Ms"] = f"{queue_wait_ms:.2f}"
+        if response_cache.enabled:
+            response_cache.put(cache_key, result, generation)
+            response.headers["X-Cache"] = "miss"
         return result
+    except (ExecutorSaturated, BatcherFull) as e:
+        raise saturated_error(e)
+    except UnknownFoodType as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         print(f"Error in analyze_feeding: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
+@app.post("/analyze", response_model=FeedingResponse, dependencies=[Depends(models_ready)])
+async def analyze_feeding(request: ClientFeedingRequest, response: Response):
+    """Analyze feeding suitability and provide recommendations"""
+    return json_response(await score_request(request, response), response)
+
+def session_view(session):
+    return BabySessionResponse(
+        baby_id=session.baby_id,
+        baby_age_months=session.current_age(),
+        baby_weight_kg=session.weight_kg,
+        baby_height_cm=session.height_cm,
+        food_type=session.food_type,
+        last_feeding_at=datetime.fromtimestamp(session.last_feeding_at, timezone.utc) if session.last_feeding_at else None,
+        minutes_since_last_feeding=session.minutes_since_feeding(),
+        derived=sessions.derived(session)
+    )
+
+def get_session(baby_id: str):
+    session = sessions.get(baby_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Unknown baby '{baby_id}' (register it with PUT /babies/{baby_id})")
+    return session
+
+@app.put("/babies/{baby_id}", response_model=BabySessionResponse)
+async def register_baby(baby_id: str, profile: BabyProfile):
+    """Register or replace a baby's profile so readings can omit it"""
+    last_feeding_at = profile.last_feeding_at
+    if last_feeding_at is not None:
+        if last_feeding_at.tzinfo is None:
+            last_feeding_at = last_feeding_at.replace(tzinfo=timezone.utc)
+        last_feeding_at = last_feeding_at.timestamp()
+    session = sessions.register(baby_id, profile.baby_age_months, profile.baby_weight_kg,
+                                profile.baby_height_cm, profile.food_type, last_feeding_at)
+    return session_view(session)
+
+@app.get("/babies/{baby_id}", response_model=BabySessionResponse)
+async def get_baby(baby_id: str):
+    return session_view(get_session(baby_id))
+
+@app.delete("/babies/{baby_id}")
+async def delete_baby(baby_id: str):
+    if not sessions.remove(baby_id):
+        raise HTTPException(status_code=404, detail=f"Unknown baby '{baby_id}'")
+    return {"deleted": baby_id}
+
+@app.post("/babies/{baby_id}/readings", response_model=FeedingResponse, dependencies=[Depends(models_ready)])
+async def analyze_baby_reading(baby_id: str, reading: BabyReading, response: Response):
+    """Analyze a new reading against the stored profile and tracked feeding interval"""
+    session = get_session(baby_id)
+    interval = reading.time_since_last_feeding_min
+    if interval is None:
+        interval = session.minutes_since_feeding()
+    if interval is None:
+        raise HTTPException(status_code=422, detail="No feeding recorded yet; send time_since_last_feeding_min "
+                                                    "or register last_feeding_at")
+    food_type = reading.food_type or session.food_type
+    if food_type is None:
+        raise HTTPException(status_code=422, detail="food_type missing from both the reading and the profile")
+    
+    derived = sessions.derived(session)
+    try:
+        request = FeedingRequest(
+            baby_age_months=derived["age_months"],
+            baby_weight_kg=session.weight_kg,
+            baby_height_cm=session.height_cm,
+            food_type=food_type,
+            food_quantity_ml=reading.food_quantity_ml,
+            food_temp_celsius=reading.food_temp_celsius,
+            room_temp_celsius=reading.room_temp_celsius,
+            time_since_last_feeding_min=min(interval, 1440),  # a day or more counts as a full day
+            baby_crying=reading.baby_crying
+        )
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+    request._derived = (derived["weight_kg"], derived["height_cm"], derived["weight_height_ratio"])
+    
+    result = await score_request(request, response)
+    if reading.fed:
+        sessions.record_feeding(baby_id)
+    return json_response(result, response)
+
+@app.post("/devices/{device_id}/readings", response_model=DeviceTrendsResponse)
+async def add_device_reading(device_id: str, reading: DeviceReading):
+    """Add a sensor reading; returns the device's rolling stats and sustained-trend alerts"""
+    at = reading.measured_at
+    if at is not None:
+        if at.tzinfo is None:
+            at = at.replace(tzinfo=timezone.utc)
+        at = at.timestamp()
+    values = {"room_temp_celsius": reading.room_temp_celsius, "food_temp_celsius": reading.food_temp_celsius}
+    try:
+        return trends.record(device_id, values, at)
+    except FutureReading as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.get("/devices/{device_id}/trends", response_model=DeviceTrendsResponse)
+async def get_device_trends(device_id: str):
+    """Current rolling stats and alerts, from the window alone (no history is replayed)"""
+    summary = trends.summary(device_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail=f"Unknown device '{device_id}'")
+    return summary
+
+@app.delete("/devices/{device_id}")
+async def delete_device(device_id: str):
+    if not trends.remove(device_id):
+        raise HTTPException(status_code=404, detail=f"Unknown device '{device_id}'")
+    return {"deleted": device_id}
+
+@app.post("/analyze/batch", response_model=BatchFeedingResponse, dependencies=[Depends(models_ready)])
+async def analyze_feeding_batch(items: List[Any], response: Response):
+    """Analyze many feeding records in one model call; errors are reported per item"""
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {MAX_BATCH_SIZE} items)")
+    try:
+        result, queue_wait_ms = await executor.run(run_predict_feeding_batch, items)
+        response.headers["X-Queue-Wait-Ms"] = f"{queue_wait_ms:.2f}"
+        return json_response(result, response)
+    except ExecutorSaturated as e:
+        raise saturated_error(e)
+    except Exception as e:
+        print(f"Error in analyze_feeding_batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Batch analysis failed: {str(e)}")
+
+@app.post("/analyze/sweep", response_model=SweepResponse, dependencies=[Depends(models_ready)])
+async def analyze_feeding_sweep(request: SweepRequest, response: Response):
+    """Suitability and confidence over a grid of one or two fields, scored in one model pass"""
+    try:
+        result, queue_wait_ms = await executor.run(run_predict_sweep, request)
+        response.headers["X-Queue-Wait-Ms"] = f"{queue_wait_ms:.2f}"
+        return json_response(result, response)
+    except ExecutorSaturated as e:
+        raise saturated_error(e)
+    except UnknownFoodType as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        print(f"Error in analyze_feeding_sweep: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Sweep failed: {str(e)}")
+
+async def score_stream_batch(items: List[Dict[str, Any]]):
+    """Score one streamed batch, waiting for executor capacity instead of dropping readings"""
+    while True:
+        try:
+            batch, _ = await executor.run(run_predict_feeding_batch, items)
+            break
+        except ExecutorSaturated:
+            await asyncio.sleep(0.01)
+    return [(r.result.model_dump() if r.result else None, r.error) for r in batch.results]
+
+def stream_scores(chunks):
+    return score_stream(chunks, score_stream_batch, STREAM_BATCH_SIZE, STREAM_MAX_WAIT_MS,
+                        STREAM_MAX_PENDING, STREAM_MAX_LINE_BYTES)
+
+@app.post("/analyze/stream", dependencies=[Depends(models_ready)])
+async def analyze_feeding_stream(request: Request):
+    """Score newline-delimited FeedingRequests and stream NDJSON results back as they are produced"""
+    async def body():
+        async for item in stream_scores(request.stream()):
+            yield json.dumps(item) + "\n"
+    return DuplexStreamingResponse(body(), media_type="application/x-ndjson")
+
+@app.websocket("/ws/analyze")
+async def analyze_feeding_ws(websocket: WebSocket):
+    """Same as /analyze/stream over a WebSocket: each message carries one or more NDJSON lines"""
+    await websocket.accept()
+    if not await registry.wait_ready(WARMUP_WAIT_S):
+        await websocket.close(code=1013, reason="Models are still loading")
+        return
+    
+    async def messages():
+        async for text in websocket.iter_text():
+            yield text.encode() + b"\n"
+    
+    async for item in stream_scores(messages()):
+        await websocket.send_text(json.dumps(item))
+    await websocket.close()
+
 @app.get("/food-types")
 async def get_food_types():
-    """Get available food types"""
-    return {"food_types": ["Formula", "Breast Milk", "Solid", "Liquid", "Semi"]}
+    """Food types the loaded model accepts (aliases included), plus the alias mapping.
+
+    Answered while models warm up too, from the default table until the
+    encoder is loaded.
+    """
+    return predictor.food_type_table().to_dict()
 
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
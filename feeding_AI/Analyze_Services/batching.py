@@ -0,0 +1,135 @@
+# batching.py - Micro-batching scheduler that coalesces concurrent predictions
+import asyncio
+import bisect
+import time
+
+
+class Histogram:
+    """Cumulative bucket counts, Prometheus style"""
+
+    def __init__(self, buckets):
+        self.buckets = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += 1
+        self.sum += value
+
+    def snapshot(self):
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets + ["+Inf"], self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {"count": self.total, "sum": round(self.sum, 3), "buckets": buckets}
+
+
+class BatcherFull(Exception):
+    """Raised by submit when max_outstanding items are already accepted"""
+
+
+class MicroBatcher:
+    """Collect concurrent submissions and score them in one call.
+
+    A batch is flushed when it reaches max_batch_size items or when the
+    oldest item has waited max_wait_ms, whichever comes first. score_batch
+    is an async callable taking a list of items and returning one result
+    (or Exception instance) per item, in order.
+
+    max_outstanding bounds the items accepted but not yet answered (pending
+    plus in flight), counted in items rather than batches; submit raises
+    BatcherFull beyond it. None means unbounded.
+    """
+
+    def __init__(self, score_batch, max_batch_size=64, max_wait_ms=5.0, max_outstanding=None):
+        self.score_batch = score_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self.max_outstanding = max_outstanding
+        self.outstanding = 0
+        self.rejected = 0
+        self.pending = []  # (item, future, submitted_at)
+        self.timer = None
+        self.tasks = set()  # in-flight _run tasks; the loop only keeps weak references
+        self.flush_sizes = Histogram([1, 2, 4, 8, 16, 32, 64, 128, 256])
+        self.wait_ms = Histogram([0.5, 1, 2, 5, 10, 25, 50, 100, 250])
+
+    async def submit(self, item):
+        """Queue one item; returns (result, batch_wait_ms, batch_size)"""
+        if self.max_outstanding is not None and self.outstanding >= self.max_outstanding:
+            self.rejected += 1
+            raise BatcherFull(f"Micro-batch queue full ({self.outstanding} requests waiting)")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((item, future, time.perf_counter()))
+
+        if len(self.pending) >= self.max_batch_size:
+            self.flush()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.max_wait_ms / 1000, self.flush)
+        self.outstanding += 1
+        try:
+            return await future
+        finally:
+            self.outstanding -= 1
+
+    def flush(self):
+        """Hand the pending items to score_batch as one batch"""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def stop(self):
+        """Flush what is pending and wait for every in-flight batch"""
+        self.flush()
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    async def _run(self, batch):
+        flushed_at = time.perf_counter()
+        size = len(batch)
+        self.flush_sizes.observe(size)
+        waits = []
+        for _, _, submitted_at in batch:
+            wait = (flushed_at - submitted_at) * 1000
+            self.wait_ms.observe(wait)
+            waits.append(wait)
+
+        try:
+            results = await self.score_batch([item for item, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result, wait in zip(batch, results, waits):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result((result, wait, size))
+
+    def stats(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "max_outstanding": self.max_outstanding,
+            "outstanding": self.outstanding,
+            "rejected": self.rejected,
+            "pending": len(self.pending),
+            "in_flight": len(self.tasks),
+            "flush_size": self.flush_sizes.snapshot(),
+            "wait_ms": self.wait_ms.snapshot()
+        }
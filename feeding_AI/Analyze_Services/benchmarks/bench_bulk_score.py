@@ -0,0 +1,79 @@
+# benchmarks/bench_bulk_score.py - Throughput and memory of the offline bulk scorer
+#
+# Writes Parquet inputs of workbook rows resampled to SIZES rows, then:
+# rows/s of the previous route (one predict_feeding call per row) against
+# bulk_score.py at several chunk sizes and worker counts, and the peak RSS
+# of a bulk_score.py process per input size, which should stay flat as
+# the input grows.
+# Run from feeding_AI/Analyze_Services:
+#     python -m benchmarks.bench_bulk_score
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from app import BabyFeedingPredictor, FeedingRequest
+from benchmarks.common import DATA_FILE
+from bulk_score import bulk_score
+
+SIZES = (20_000, 100_000)
+PER_ROW_SAMPLE = 1000
+RSS_CODE = ("import resource, runpy, sys; sys.argv = ['bulk_score.py'] + sys.argv[1:]; "
+            "runpy.run_path('bulk_score.py', run_name='__main__'); "
+            "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)")
+
+
+def write_input(rows, directory):
+    df = pd.read_excel(DATA_FILE)
+    df = df.sample(rows, replace=True, random_state=0).reset_index(drop=True)
+    path = os.path.join(directory, f"input-{rows}.parquet")
+    df.to_parquet(path, row_group_size=10_000)
+    return path, df
+
+
+def per_row_rate(df):
+    """rows/s of one predict_feeding call per row, the route before bulk_score"""
+    predictor = BabyFeedingPredictor()
+    predictor.load_models()
+    requests = [FeedingRequest(baby_age_months=r.BabyAgeMonths, food_type=r.FoodType,
+                               food_quantity_ml=r.FoodQuantityML, food_temp_celsius=r.FoodTempCelsius,
+                               room_temp_celsius=r.RoomTempCelsius,
+                               time_since_last_feeding_min=r.TimeSinceLastFeedingMin)
+                for r in df.head(PER_ROW_SAMPLE).itertuples()]
+    start = time.perf_counter()
+    for request in requests:
+        predictor.predict_feeding(request)
+    return len(requests) / (time.perf_counter() - start)
+
+
+def peak_rss_mb(source, target, chunk_size):
+    out = subprocess.run([sys.executable, "-c", RSS_CODE, source, target, "--workers", "1",
+                          "--chunk-size", str(chunk_size)],
+                         capture_output=True, text=True, check=True)
+    return int(out.stdout.strip().splitlines()[-1]) / 1024
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        inputs = {rows: write_input(rows, directory) for rows in SIZES}
+        source, df = inputs[SIZES[0]]
+        target = os.path.join(directory, "scores.parquet")
+
+        print(f"{'route':<34} {'rows/s':>9}")
+        print(f"{'predict_feeding per row':<34} {per_row_rate(df):>9.0f}")
+        for workers, chunk_size in sorted({(1, 1000), (1, 10_000), (2, 10_000), (os.cpu_count() or 1, 10_000)}):
+            stats = bulk_score(source, target, chunk_size, workers)
+            label = f"bulk_score {workers} worker(s), chunk {chunk_size}"
+            print(f"{label:<34} {stats['rows_per_second']:>9.0f}")
+
+        print(f"\n{'input rows':>10} {'chunk':>7} {'peak RSS MB':>12}")
+        for rows, (path, _) in inputs.items():
+            for chunk_size in (1000, 10_000):
+                print(f"{rows:>10} {chunk_size:>7} {peak_rss_mb(path, target, chunk_size):>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
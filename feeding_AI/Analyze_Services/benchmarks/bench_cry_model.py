@@ -0,0 +1,78 @@
+# benchmarks/bench_cry_model.py - Cost of scoring the cry model next to the feeding model
+#
+# Times predict_feeding_many, the path behind /analyze and /analyze/batch,
+# with and without the cry model for both inference engines, and checks
+# the served cry probabilities against the cry model's own predict_proba
+# on a DataFrame of trainModel's CRY_FEATURES. The combined path must stay
+# within MAX_OVERHEAD of feeding-only latency.
+# Run from feeding_AI/Analyze_Services:
+#     python -m benchmarks.bench_cry_model
+import copy
+
+import numpy as np
+import pandas as pd
+
+from app import CRY_FEATURE_COLUMNS, BabyFeedingPredictor, FeedingRequest
+from benchmarks.common import load_training_frame, time_call
+
+BATCH_SIZES = [1, 64, 1000]
+# Combined latency / feeding-only latency
+MAX_OVERHEAD = 1.3
+
+
+def training_requests(df):
+    return [
+        FeedingRequest(
+            baby_age_months=int(row.BabyAgeMonths), food_type=row.FoodType,
+            food_quantity_ml=int(row.FoodQuantityML), food_temp_celsius=float(row.FoodTempCelsius),
+            room_temp_celsius=float(row.RoomTempCelsius),
+            time_since_last_feeding_min=int(row.TimeSinceLastFeedingMin),
+            baby_crying=bool(i % 2))
+        for i, row in enumerate(df.itertuples())
+    ]
+
+
+def check_parity(predictor, requests):
+    """Served probabilities equal the cry model scored on a named DataFrame"""
+    models = predictor.models
+    rows = [predictor.prepare_features(request, models)[0] for request in requests]
+    responses = predictor.predict_feeding_many(requests)
+    frame = pd.DataFrame(rows, columns=CRY_FEATURE_COLUMNS[:-1])
+    frame["SuitableFoodEncoded"] = [int(r.feeding_suitable) for r in responses]
+    cried = list(models.cry_model.classes_).index("Yes")
+    expected = models.cry_model.predict_proba(frame[list(models.cry_model.feature_names_in_)])[:, cried]
+    served = np.array([r.cry_probability for r in responses])
+    return float(np.abs(served - expected.round(4)).max())
+
+
+def main():
+    requests = training_requests(load_training_frame())
+    print(f"{'engine':<8} {'batch':>6} {'feeding ms':>11} {'+cry ms':>9} {'ratio':>6}")
+    worst = 0.0
+    for engine in ("sklearn", "flat"):
+        predictor = BabyFeedingPredictor(engine=engine)
+        predictor.load_models()
+        combined = predictor.models
+        if combined.cry_scorer is None:
+            raise SystemExit("model/cry_model.pkl is missing or empty; run python trainModel.py train --cry-only")
+        feeding_only = copy.copy(combined)
+        feeding_only.cry_scorer = None
+
+        drift = check_parity(predictor, requests[:500])
+        for size in BATCH_SIZES:
+            batch = requests[:size]
+            repeat = 200 if size == 1 else 30
+            predictor.models = feeding_only
+            base = time_call(predictor.predict_feeding_many, batch, repeat=repeat)
+            predictor.models = combined
+            both = time_call(predictor.predict_feeding_many, batch, repeat=repeat)
+            worst = max(worst, both / base)
+            print(f"{engine:<8} {size:>6} {base:>11.3f} {both:>9.3f} {both / base:>6.2f}")
+        print(f"{engine:<8} max |served - predict_proba| = {drift:.2e}")
+
+    verdict = "within" if worst <= MAX_OVERHEAD else "OVER"
+    print(f"\nWorst ratio {worst:.2f}: {verdict} the {MAX_OVERHEAD:.1f}x bound")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# benchmarks/bench_dashboard_client.py - Dashboard API calls before and after dashboard_client.py
+#
+# Against a uvicorn server on this box, per call:
+#   - GET /food-types, which the dashboard used to send on every rerun
+#     (now cached for FOOD_TYPES_TTL_S);
+#   - POST /analyze with a new connection per call (plain requests.post)
+#     and through the pooled FeedingApiClient, sequentially and from
+#     THREADS concurrent sessions;
+#   - repeated payloads through ResultMemo.
+# Server-Timing shows how much of each round trip the server spent.
+# Run from feeding_AI/Analyze_Services:
+#     python -m benchmarks.bench_dashboard_client
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+from benchmarks.common import request_mix, running_server
+from dashboard_client import FeedingApiClient, ResultMemo
+
+CALLS = 200
+THREADS = 8
+
+
+def per_call_ms(fn, items):
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - start) * 1000 / len(items)
+
+
+def concurrent_ms(fn, items):
+    """Wall time per call with THREADS callers sharing the items"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(THREADS) as pool:
+        list(pool.map(fn, items))
+    return (time.perf_counter() - start) * 1000 / len(items)
+
+
+def main():
+    payloads = request_mix(CALLS, seed=4)
+    with running_server({"RESPONSE_CACHE_SIZE": "0"}) as url:
+        client = FeedingApiClient(url)
+
+        def fresh(payload):
+            requests.post(f"{url}/analyze", json=payload).raise_for_status()
+
+        def pooled(payload):
+            client.analyze(payload)
+
+        for payload in payloads[:20]:
+            fresh(payload)
+            pooled(payload)
+
+        rows = [
+            ("GET /food-types, new connection", per_call_ms(lambda _: requests.get(f"{url}/food-types"), range(50))),
+            ("GET /food-types, pooled", per_call_ms(lambda _: client.food_types(), range(50))),
+            ("/analyze, new connection", per_call_ms(fresh, payloads)),
+            ("/analyze, pooled", per_call_ms(pooled, payloads)),
+            (f"/analyze, new connection x{THREADS}", concurrent_ms(fresh, payloads)),
+            (f"/analyze, pooled x{THREADS}", concurrent_ms(pooled, payloads)),
+        ]
+        memo = ResultMemo()
+        repeated = payloads[:10] * (CALLS // 10)
+        rows.append(("/analyze, 10 payloads repeated via ResultMemo",
+                     per_call_ms(lambda payload: memo.analyze(client, payload), repeated)))
+
+        results = [client.analyze(payload) for payload in payloads[:50]]
+        server_ms = float(np.median([r.server_ms for r in results]))
+        round_trip_ms = float(np.median([r.round_trip_ms for r in results]))
+
+    print(f"{'call':<46} {'ms / call':>10}")
+    for name, ms in rows:
+        print(f"{name:<46} {ms:>10.3f}")
+    print(f"\nPooled /analyze median: server {server_ms:.2f} ms of {round_trip_ms:.2f} ms round trip")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# benchmarks/bench_data_layer.py - Load time and peak memory: Excel vs the Parquet record store
+#
+# Synthetic datasets resample whole rows of the training workbook (so every
+# column keeps its schema and value mix) and are appended to a RecordStore
+# in chunks of one partition each. Every read runs in a fresh process so
+# peak RSS is not polluted by earlier runs. Excel is only measured up to
+# EXCEL_MAX_ROWS: writing it is slow, and 20M rows exceed the sheet limit.
+# Run from feeding_AI/Analyze_Services:
+#     python -m benchmarks.bench_data_layer [rows ...]
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import DATA_FILE
+from records import REQUIRED_COLUMNS, RecordStore
+
+SIZES = [2_000, 200_000, 20_000_000]
+CHUNK_ROWS = 1_000_000
+EXCEL_MAX_ROWS = 200_000
+FILTERS = [("BabyAgeMonths", ">=", 6), ("FoodType", "==", "Solid")]
+
+
+def synthetic_chunks(base, n, seed=0):
+    rng = np.random.default_rng(seed)
+    for start in range(0, n, CHUNK_ROWS):
+        size = min(CHUNK_ROWS, n - start)
+        chunk = base.iloc[rng.integers(0, len(base), size)].reset_index(drop=True)
+        chunk["BabyID"] = np.arange(start + 1, start + size + 1)
+        yield chunk
+
+
+def rss_mb(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def measure(kind, path, queue):
+    """Child process: load once, report (seconds, peak RSS growth in MB, rows)"""
+    import pyarrow.dataset  # noqa: F401 - keep import cost out of the timing
+    try:
+        # Reset the high-water mark so VmHWM measures this load only
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+    before = rss_mb("VmRSS")
+    start = time.perf_counter()
+    if kind == "excel":
+        df = pd.read_excel(path)
+    elif kind == "parquet_all":
+        df = RecordStore(path).read()
+    elif kind == "parquet_training":
+        df = RecordStore(path).read(columns=REQUIRED_COLUMNS)
+    else:
+        df = RecordStore(path).read(columns=REQUIRED_COLUMNS, filters=FILTERS)
+    seconds = time.perf_counter() - start
+    queue.put((seconds, rss_mb("VmHWM") - before, len(df)))
+
+
+def run(kind, path):
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=measure, args=(kind, path, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    base = pd.read_excel(DATA_FILE)
+    print(f"{'rows':>11} {'format':<18} {'load s':>8} {'peak MB':>8} {'rows read':>11} {'disk MB':>8}")
+    for n in sizes:
+        work = tempfile.mkdtemp()
+        try:
+            store = RecordStore(os.path.join(work, "records"))
+            write_start = time.perf_counter()
+            for day, chunk in enumerate(synthetic_chunks(base, n)):
+                store.append(chunk, partition=f"2026-01-{day + 1:02d}")
+            write_seconds = time.perf_counter() - write_start
+            disk_mb = sum(os.path.getsize(os.path.join(store.root, part)) for part in store.parts()) / 2**20
+
+            cases = []
+            if n <= EXCEL_MAX_ROWS:
+                excel_path = os.path.join(work, "records.xlsx")
+                pd.concat(synthetic_chunks(base, n)).to_excel(excel_path, index=False)
+                cases.append(("excel", excel_path, os.path.getsize(excel_path) / 2**20))
+            cases += [(kind, store.root, disk_mb)
+                      for kind in ("parquet_all", "parquet_training", "parquet_filtered")]
+
+            for kind, path, size_mb in cases:
+                seconds, peak_mb, rows = run(kind, path)
+                print(f"{n:>11} {kind:<18} {seconds:>8.3f} {peak_mb:>8.1f} {rows:>11} {size_mb:>8.1f}")
+            print(f"{n:>11} {'(parquet write)':<18} {write_seconds:>8.3f}")
+        finally:
+            shutil.rmtree(work)
+
+
+if __name__ == "__main__":
+    main()
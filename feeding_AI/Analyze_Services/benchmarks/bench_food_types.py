@@ -0,0 +1,36 @@
+# benchmarks/bench_food_types.py - Per-request food type codes from LabelEncoder vs FoodTypeTable
+#
+# Checks that the table gives LabelEncoder.transform's code for every
+# trained class, then times encoding one name per call (the /analyze path)
+# and a 1000-name batch.
+# Run from feeding_AI/Analyze_Services:
+#     python -m benchmarks.bench_food_types
+import joblib
+
+from benchmarks.common import time_call
+from food_types import FoodTypeTable
+
+
+def main():
+    encoder = joblib.load("model/food_type_encoder.pkl")
+    table = FoodTypeTable.from_encoder(encoder)
+    mismatches = [name for name in encoder.classes_ if table.encode(name) != encoder.transform([name])[0]]
+    print(f"Parity on {len(encoder.classes_)} classes: {'identical' if not mismatches else mismatches}")
+
+    name = encoder.classes_[-1]
+    names = [encoder.classes_[i % len(encoder.classes_)] for i in range(1000)]
+    cases = [
+        ("single: transform", lambda: encoder.transform([name])[0]),
+        ("single: table", lambda: table.encode(name)),
+        ("1000: transform", lambda: encoder.transform(names)),
+        ("1000: transform per row", lambda: [encoder.transform([n])[0] for n in names]),
+        ("1000: table per row", lambda: [table.encode(n) for n in names]),
+    ]
+    print(f"\n{'case':<26} {'us':>10}")
+    for label, fn in cases:
+        repeat = 2000 if label.startswith("single") else 20
+        print(f"{label:<26} {time_call(fn, repeat=repeat) * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
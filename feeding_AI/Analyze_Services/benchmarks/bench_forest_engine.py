@@ -0,0 +1,35 @@
+# benchmarks/bench_forest_engine.py - sklearn predict_proba vs FlatForest
+#
+# Run from feeding_AI/Analyze_Services:
+#     python -m benchmarks.bench_forest_engine
+import joblib
+import numpy as np
+
+from benchmarks.common import load_training_matrix, time_call
+from forest_engine import FlatForest
+
+
+def main():
+    model = joblib.load("model/feeding_model.pkl")
+    X = load_training_matrix(model)
+    flat = FlatForest.from_sklearn(model)
+
+    expected = model.predict_proba(X)
+    actual = flat.predict_proba(X)
+    identical = np.array_equal(expected, actual)
+    print(f"Parity on {len(X)} training rows: {'identical' if identical else 'MISMATCH'} "
+          f"(max abs diff {np.abs(expected - actual).max():.3g})")
+    if not identical:
+        raise SystemExit(1)
+
+    print(f"\n{'rows':>6} {'sklearn ms':>11} {'flat ms':>9} {'speedup':>8}")
+    for rows in (1, 16, 64, 256, len(X)):
+        batch = X[:rows]
+        repeat = 50 if rows <= 256 else 10
+        sk_ms = time_call(model.predict_proba, batch, repeat=repeat)
+        flat_ms = time_call(flat.predict_proba, batch, repeat=repeat)
+        print(f"{rows:>6} {sk_ms:>11.3f} {flat_ms:>9.3f} {sk_ms / flat_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# benchmarks/bench_incremental.py - Warm-start update vs full retrain as new data grows
+#
+# New records are synthesised by resampling the training workbook with a
+# little noise on the numeric columns. Each size is trained on a fresh copy
+# of model/, so the updates do not compound.
+# Run from feeding_AI/Analyze_Services:
+#     python -m benchmarks.bench_incremental
+import shutil
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from benchmarks.common import DATA_FILE
+from incremental import IncrementalTrainer
+from records import RecordStore, read_records
+from trainModel import BabyFeedingPredictor
+
+SIZES = [250, 1000, 4000, 16000]
+
+
+def synthetic_records(base, n, seed):
+    rng = np.random.default_rng(seed)
+    df = base.sample(n, replace=True, random_state=seed).reset_index(drop=True)
+    df["FoodTempCelsius"] = (df["FoodTempCelsius"] + rng.normal(0, 0.5, n)).round(1)
+    df["RoomTempCelsius"] = (df["RoomTempCelsius"] + rng.normal(0, 0.5, n)).round(1)
+    df["FoodQuantityML"] = (df["FoodQuantityML"] + rng.integers(-5, 6, n)).clip(0, 500)
+    return df
+
+
+def full_retrain_seconds(base, new, feature_names):
+    """What train_models would spend refitting 100 trees on everything"""
+    df = BabyFeedingPredictor().prepare_data(pd.concat([base, new], ignore_index=True))
+    start = time.perf_counter()
+    RandomForestClassifier(n_estimators=100, random_state=42).fit(df[feature_names], df["SuitableFood"])
+    return time.perf_counter() - start
+
+
+def main():
+    base = read_records(DATA_FILE)
+    print(f"{'new rows':>9} {'trees':>6} {'fit s':>7} {'wall s':>7} {'full s':>7} {'ref acc':>8}")
+    for n in SIZES:
+        work = tempfile.mkdtemp()
+        try:
+            shutil.copytree("model", f"{work}/model")
+            store = RecordStore(f"{work}/records")
+            store.append(synthetic_records(base, n, seed=n))
+            trainer = IncrementalTrainer(store, f"{work}/model", reference_file=DATA_FILE)
+            record = trainer.update()
+            feature_names = list(joblib.load(f"{work}/model/feeding_model.pkl").feature_names_in_)
+            full = full_retrain_seconds(base, synthetic_records(base, n, seed=n), feature_names)
+        finally:
+            shutil.rmtree(work)
+        print(f"{n:>9} {record['trees_added']:>6} {record['fit_seconds']:>7.3f} "
+              f"{record['wall_seconds']:>7.3f} {full:>7.3f} {record['reference_accuracy']:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
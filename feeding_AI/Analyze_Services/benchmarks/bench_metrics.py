@@ -0,0 +1,127 @@
+# benchmarks/bench_metrics.py - Overhead of the /metrics instrumentation
+#
+# Times the primitives (one histogram observation, one counter increment,
+# one scoring call's StageTimer laps), then predict_feeding_many and
+# POST /analyze with metrics switched on and off at runtime. On and off
+# rounds alternate so drift on a shared machine hits both equally. The
+# overhead must stay under MAX_OVERHEAD of the /analyze median.
+# Run from feeding_AI/Analyze_Services:
+#     python -m benchmarks.bench_metrics
+import asyncio
+import os
+import time
+
+os.environ.setdefault("RESPONSE_CACHE_SIZE", "0")
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+
+import app as api  # noqa: E402
+from benchmarks.common import request_mix  # noqa: E402
+from metrics import MetricsRegistry, StageTimer  # noqa: E402
+
+ROUNDS = 20
+PER_ROUND = 25
+MAX_OVERHEAD = 0.02
+
+
+def primitive_ns(fn, n=100_000):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) * 1e9 / n
+
+
+def primitives():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("h", "h", ("stage",))
+    counter = registry.counter("c", "c", ("source",))
+
+    def one_call():
+        timer = StageTimer(registry, histogram)
+        for stage in ("encoding", "features", "features", "inference", "rules", "response_build"):
+            timer.lap(stage)
+        timer.record()
+
+    return {
+        "histogram.observe": primitive_ns(lambda: histogram.observe(0.001, "inference")),
+        "counter.inc": primitive_ns(lambda: counter.inc("model")),
+        "StageTimer (one call)": primitive_ns(one_call, 20_000),
+    }
+
+
+def alternate(run_round):
+    """Median per-call ms with metrics on and off, from interleaved rounds"""
+    samples = {True: [], False: []}
+    for i in range(ROUNDS * 2):
+        enabled = i % 2 == 0
+        api.metrics.enabled = enabled
+        samples[enabled].extend(run_round())
+    api.metrics.enabled = True
+    return float(np.median(samples[True])), float(np.median(samples[False]))
+
+
+def timed(fn, items):
+    samples = []
+    for item in items:
+        start = time.perf_counter()
+        fn(item)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+async def http_overhead(payloads):
+    async with api.app.router.lifespan_context(api.app):
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for payload in payloads[:10]:
+                await client.post("/analyze", json=payload)
+            samples = {True: [], False: []}
+            for i in range(ROUNDS * 2):
+                enabled = i % 2 == 0
+                api.metrics.enabled = enabled
+                for payload in payloads[:PER_ROUND]:
+                    start = time.perf_counter()
+                    (await client.post("/analyze", json=payload)).raise_for_status()
+                    samples[enabled].append((time.perf_counter() - start) * 1000)
+            api.metrics.enabled = True
+            render_ms = timed(lambda _: api.metrics.render(), range(50))
+    return float(np.median(samples[True])), float(np.median(samples[False])), float(np.median(render_ms))
+
+
+def main():
+    costs = primitives()
+    print(f"{'primitive':<24} {'ns':>8}")
+    for name, ns in costs.items():
+        print(f"{name:<24} {ns:>8.0f}")
+
+    payloads = request_mix(PER_ROUND * 4, seed=1)
+    predictor = api.BabyFeedingPredictor()
+    predictor.load_models()
+    requests = [api.FeedingRequest(**payload) for payload in payloads]
+    single_on, single_off = alternate(lambda: timed(lambda r: predictor.predict_feeding_many([r]),
+                                                    requests[:PER_ROUND]))
+    batch_on, batch_off = alternate(lambda: timed(predictor.predict_feeding_many, [requests[:100]]))
+    http_on, http_off, render_ms = asyncio.run(http_overhead(payloads))
+
+    print(f"\n{'path':<26} {'off ms':>8} {'on ms':>8} {'delta ms':>9}")
+    rows = [("predict_feeding_many x1", single_off, single_on),
+            ("predict_feeding_many x100", batch_off, batch_on),
+            ("POST /analyze", http_off, http_on)]
+    for name, off, on in rows:
+        print(f"{name:<26} {off:>8.3f} {on:>8.3f} {on - off:>+9.3f}")
+    print(f"GET /metrics render: {render_ms:.3f} ms")
+
+    # The medians are noisy at this scale; the primitives bound the real cost:
+    # one validation observation, one StageTimer call, two counters and the
+    # middleware's observation + increment per request.
+    bound_ms = (2 * costs["histogram.observe"] + costs["StageTimer (one call)"] +
+                3 * costs["counter.inc"]) / 1e6
+    share = bound_ms / http_off
+    verdict = "within" if share <= MAX_OVERHEAD else "OVER"
+    print(f"\nInstrumentation cost per /analyze request: {bound_ms * 1000:.1f} us "
+          f"= {share:.2%} of the median, {verdict} the {MAX_OVERHEAD:.0%} budget")
+
+
+if __name__ == "__main__":
+    main()
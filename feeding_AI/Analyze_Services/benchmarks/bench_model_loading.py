@@ -0,0 +1,86 @@
+# benchmarks/bench_model_loading.py - Per-worker memory and startup: pickle vs mmap
+#
+# Starts N fresh worker processes at once, the way uvicorn/gunicorn would.
+# Each worker loads the feeding model in one format and scores the training
+# rows so every node page is touched. While all workers are alive it reports
+# load time, RSS and PSS. PSS splits shared pages across the processes that
+# map them, so it shows what each worker really costs.
+# Run from feeding_AI/Analyze_Services:
+#     python -m benchmarks.bench_model_loading [workers]
+import multiprocessing as mp
+import sys
+import time
+
+
+def memory_kb():
+    """(RSS, PSS) of this process in kB"""
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                values[key] = int(rest.split()[0])
+    return values.get("Rss", 0), values.get("Pss", 0)
+
+
+def worker(fmt, loaded, results, measure, release):
+    import json
+    import joblib
+    import numpy as np
+    from benchmarks.common import load_training_frame
+    import sklearn.ensemble  # noqa: F401 - the service imports it anyway; count only the model
+    from forest_engine import FlatForest
+
+    with open("model/feeding_model_flat/meta.json") as f:
+        feature_names = json.load(f)["feature_names"]
+    X = load_training_frame()[feature_names].to_numpy(dtype=np.float64)
+    base_rss, base_pss = memory_kb()
+
+    start = time.perf_counter()
+    if fmt == "pickle":
+        model = joblib.load("model/feeding_model.pkl")
+    else:
+        model = FlatForest.load("model/feeding_model_flat", mmap=True)
+    load_ms = (time.perf_counter() - start) * 1000
+    model.predict_proba(X)
+    loaded.put(load_ms)
+
+    # Measure only once every worker has mapped the model
+    measure.wait()
+    rss, pss = memory_kb()
+    results.put((rss - base_rss, pss - base_pss))
+    release.wait()
+
+
+def run(fmt, workers):
+    ctx = mp.get_context("spawn")
+    loaded, results = ctx.Queue(), ctx.Queue()
+    measure, release = ctx.Event(), ctx.Event()
+    procs = [ctx.Process(target=worker, args=(fmt, loaded, results, measure, release))
+             for _ in range(workers)]
+    for p in procs:
+        p.start()
+    load_ms = [loaded.get() for _ in procs]
+    measure.set()
+    memory = [results.get() for _ in procs]
+    release.set()
+    for p in procs:
+        p.join()
+    rss = sum(m[0] for m in memory) / workers / 1024
+    pss = sum(m[1] for m in memory) / workers / 1024
+    return sum(load_ms) / workers, rss, pss
+
+
+def main():
+    from benchmarks.common import ensure_flat_bundle
+    ensure_flat_bundle()
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    print(f"{workers} workers, model memory per worker (after scoring the training rows)")
+    print(f"{'format':>8} {'load ms':>9} {'RSS MB':>8} {'PSS MB':>8}")
+    for fmt in ("pickle", "flat"):
+        load_ms, rss, pss = run(fmt, workers)
+        print(f"{fmt:>8} {load_ms:>9.1f} {rss:>8.2f} {pss:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# benchmarks/bench_profiling.py - Cost of the admin profiler, idle and active
+#
+# Idle: the per-request cost of Profiler.run and ProfilingMiddleware when
+# no session exists, compared with calling the scoring function directly.
+# Active: predict_feeding_many throughput while a sampling session (at
+# several intervals) or a cprofile session is running.
+# Run from feeding_AI/Analyze_Services:
+#     python -m benchmarks.bench_profiling
+import asyncio
+import time
+
+from app import BabyFeedingPredictor, FeedingRequest
+from benchmarks.common import request_mix, time_call
+from profiling import Profiler, ProfilingMiddleware
+
+CALLS = 200_000
+
+
+def noop(*args):
+    return None
+
+
+async def asgi_app(scope, receive, send):
+    return None
+
+
+def idle_ns():
+    profiler = Profiler()
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        noop(1)
+    direct = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        profiler.run(noop, 1)
+    wrapped = time.perf_counter() - start
+
+    middleware = ProfilingMiddleware(asgi_app, profiler)
+    scope = {"type": "http", "path": "/analyze"}
+
+    async def through(app, n):
+        start = time.perf_counter()
+        for _ in range(n):
+            await app(scope, None, None)
+        return time.perf_counter() - start
+
+    bare = asyncio.run(through(asgi_app, CALLS))
+    with_middleware = asyncio.run(through(middleware, CALLS))
+    return (wrapped - direct) * 1e9 / CALLS, (with_middleware - bare) * 1e9 / CALLS
+
+
+def main():
+    run_ns, middleware_ns = idle_ns()
+    print(f"Idle cost per request: Profiler.run {run_ns:.0f} ns, middleware {middleware_ns:.0f} ns")
+
+    predictor = BabyFeedingPredictor()
+    predictor.load_models()
+    requests = [FeedingRequest(**payload) for payload in request_mix(32, seed=2)]
+    profiler = Profiler()
+
+    def score():
+        return profiler.run(predictor.predict_feeding_many, requests)
+
+    baseline = time_call(score, repeat=60)
+    print(f"\n{'session':<20} {'ms / 32 rows':>13} {'slowdown':>9}")
+    print(f"{'none':<20} {baseline:>13.3f} {'':>9}")
+    for mode, interval_ms in (("sample", 20), ("sample", 5), ("sample", 1), ("cprofile", None)):
+        profiler.start(mode, seconds=3600, interval_ms=interval_ms or 5)
+        try:
+            ms = time_call(score, repeat=60)
+        finally:
+            session = profiler.finish()
+        label = f"{mode} {interval_ms} ms" if interval_ms else mode
+        print(f"{label:<20} {ms:>13.3f} {ms / baseline:>8.2f}x  ({session.samples} samples)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# benchmarks/bench_rules.py - Vectorized rules.py vs the scalar predictor rules
+#
+# Checks that rules.evaluate / rules.rule_based_predictions give exactly the
+# same cry reasons, recommendations, feeding analysis and rule-based scores
+# as BabyFeedingPredictor's scalar methods. It covers the training rows
+# (through both the request and the DataFrame column builders) and a random
+# grid that includes every threshold boundary. Then it times both paths.
+# Run from feeding_AI/Analyze_Services:
+#     python -m benchmarks.bench_rules
+import gc
+import time
+
+import numpy as np
+
+import rules
+from app import BabyFeedingPredictor, FeedingRequest
+from benchmarks.common import load_training_frame
+
+
+def best_of(fn, repeat=3):
+    """Best wall time of fn() in ms, with the garbage collector paused"""
+    samples = []
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000)
+    finally:
+        gc.enable()
+    return min(samples)
+
+
+def scalar_outputs(predictor, request, weight, height, prediction):
+    cry_reasons = predictor.analyze_cry_reasons(request, weight, height) if request.baby_crying else []
+    return (
+        cry_reasons,
+        predictor.generate_recommendations(request, prediction, cry_reasons),
+        predictor.analyze_feeding_conditions(request, weight, height),
+        predictor.rule_based_prediction(request),
+    )
+
+
+def vector_outputs(columns):
+    evaluated = rules.evaluate(columns)
+    suitable, confidence = rules.rule_based_predictions(columns)
+    return [
+        (cry, recs, analysis, (bool(s), float(c)))
+        for cry, recs, analysis, s, c in zip(evaluated["cry_reasons"], evaluated["recommendations"],
+                                             evaluated["feeding_analysis"], suitable, confidence)
+    ]
+
+
+def synthetic_requests(n, seed=0):
+    rng = np.random.default_rng(seed)
+    food_temps = np.concatenate([[30, 35, 40, 45], rng.uniform(0, 60, n)])
+    room_temps = np.concatenate([[18, 20, 25, 26, 28], rng.uniform(10, 45, n)])
+    requests = []
+    for i in range(n):
+        with_metrics = rng.random() < 0.5
+        requests.append(FeedingRequest(
+            baby_age_months=int(rng.integers(0, 25)),
+            baby_weight_kg=round(float(rng.uniform(2, 15)), 1) if with_metrics else None,
+            baby_height_cm=round(float(rng.uniform(45, 95)), 1) if with_metrics else None,
+            food_type="Liquid",
+            food_quantity_ml=int(rng.integers(0, 501)),
+            food_temp_celsius=round(float(food_temps[i % len(food_temps)]), 1),
+            room_temp_celsius=round(float(room_temps[i % len(room_temps)]), 1),
+            time_since_last_feeding_min=int(rng.choice([96, 120, 144, 180, 192, 240, rng.integers(0, 1441)])),
+            baby_crying=bool(rng.random() < 0.5)
+        ))
+    return requests
+
+
+def training_requests(df, crying):
+    return [FeedingRequest(
+        baby_age_months=r.BabyAgeMonths,
+        food_type=r.FoodType,
+        food_quantity_ml=r.FoodQuantityML,
+        food_temp_celsius=r.FoodTempCelsius,
+        room_temp_celsius=r.RoomTempCelsius,
+        time_since_last_feeding_min=r.TimeSinceLastFeedingMin,
+        baby_crying=bool(c)
+    ) for r, c in zip(df.itertuples(), crying)]
+
+
+def check(name, expected, actual):
+    mismatches = sum(1 for e, a in zip(expected, actual) if e != a)
+    print(f"{name}: {len(expected)} rows, {mismatches} mismatches")
+    return mismatches == 0 and len(expected) == len(actual)
+
+
+def main():
+    predictor = BabyFeedingPredictor()
+    rng = np.random.default_rng(1)
+    ok = True
+
+    df = load_training_frame()
+    crying = rng.random(len(df)) < 0.5
+    predictions = rng.random(len(df)) < 0.5
+    requests = training_requests(df, crying)
+    metrics = [predictor.prepare_features(r)[1:] for r in requests]
+    weights = [w for w, _ in metrics]
+    heights = [h for _, h in metrics]
+    expected = [scalar_outputs(predictor, r, w, h, p)
+                for r, w, h, p in zip(requests, weights, heights, predictions)]
+    ok &= check("training rows (requests)",
+                expected, vector_outputs(rules.request_columns(requests, weights, heights, predictions)))
+    ok &= check("training rows (DataFrame)",
+                expected, vector_outputs(rules.frame_columns(df, predictions, crying)))
+
+    requests = synthetic_requests(20000)
+    metrics = [predictor.prepare_features(r)[1:] for r in requests]
+    weights = [w for w, _ in metrics]
+    heights = [h for _, h in metrics]
+    predictions = rng.random(len(requests)) < 0.5
+    expected = [scalar_outputs(predictor, r, w, h, p)
+                for r, w, h, p in zip(requests, weights, heights, predictions)]
+    ok &= check("synthetic grid", expected,
+                vector_outputs(rules.request_columns(requests, weights, heights, predictions)))
+    if not ok:
+        raise SystemExit(1)
+
+    print(f"\n{'rows':>6} {'scalar ms':>10} {'vector ms':>10}  (best of 3, gc disabled like timeit)")
+    for n in (1, 64, 1000, 20000):
+        subset = list(zip(requests, weights, heights, predictions))[:n]
+        scalar_ms = best_of(lambda: [scalar_outputs(predictor, r, w, h, p) for r, w, h, p in subset])
+        vector_ms = best_of(lambda: vector_outputs(
+            rules.request_columns(requests[:n], weights[:n], heights[:n], predictions[:n])))
+        print(f"{n:>6} {scalar_ms:>10.2f} {vector_ms:>10.2f}")
+
+    # Offline backfill straight from columns, no FeedingRequest objects at all
+    backfill_ms = best_of(lambda: vector_outputs(rules.frame_columns(df)))
+    print(f"\nDataFrame backfill of {len(df)} rows: {backfill_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# benchmarks/bench_single_proba.py - predict + predict_proba vs one predict_proba
+#
+# Checks that labels derived from a single predict_proba pass match
+# model.predict() on every training row, then times both per-request paths.
+# Run from feeding_AI/Analyze_Services:
+#     python -m benchmarks.bench_single_proba
+import joblib
+import numpy as np
+
+from benchmarks.common import load_training_matrix, time_call
+
+
+def predict_twice(model, X):
+    """Old path: walks the forest twice"""
+    return model.predict(X)[0], max(model.predict_proba(X)[0])
+
+
+def predict_once(model, X):
+    """New path: one predict_proba, label from its argmax"""
+    proba = model.predict_proba(X)[0]
+    return model.classes_[np.argmax(proba)], max(proba)
+
+
+def main():
+    model = joblib.load("model/feeding_model.pkl")
+    X = load_training_matrix(model)
+
+    old_labels = model.predict(X)
+    new_labels = model.classes_[model.predict_proba(X).argmax(axis=1)]
+    mismatches = int((old_labels != new_labels).sum())
+    print(f"Label parity on {len(X)} training rows: {mismatches} mismatches")
+    if mismatches:
+        raise SystemExit(1)
+
+    row = X[:1]
+    twice_ms = time_call(predict_twice, model, row)
+    once_ms = time_call(predict_once, model, row)
+    print(f"predict + predict_proba: {twice_ms:.3f} ms/request")
+    print(f"predict_proba only:      {once_ms:.3f} ms/request ({twice_ms / once_ms:.2f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/bench_startup.py - Import time and time-to-ready of the API
+#
+# Import: wall time of `import app` in a fresh interpreter, as shipped and
+# with the modules it no longer imports up front (pandas, joblib, uvicorn,
+# records) imported first, which is what it used to cost. sklearn was and
+# is imported by unpickling the models, so it counts towards load time.
+# Ready: starts uvicorn with MODEL_LOADING=startup and =background and
+# measures, from process start, the first 200 from /health, the first
+# successful POST /analyze (sent as soon as /health answers) and the
+# model load time /health reports.
+# Run from feeding_AI/Analyze_Services:
+#     python -m benchmarks.bench_startup
+#     python -m benchmarks.bench_startup --runs 5 --out benchmarks/results/startup.json
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.common import free_port, request_mix, save_results
+
+EAGER_IMPORTS = "import pandas, joblib, uvicorn, records; "
+
+
+def import_seconds(prefix=""):
+    code = ("import time, warnings; warnings.simplefilter('ignore'); "
+            f"start = time.perf_counter(); {prefix}import app; print(time.perf_counter() - start)")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def time_to_ready(mode, payload, timeout=60.0):
+    """Seconds from spawn to first /health, to first /analyze, and the reported load time"""
+    port = free_port()
+    env = dict(os.environ, MODEL_LOADING=mode, PYTHONWARNINGS="ignore")
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "app:app", "--port", str(port),
+                               "--log-level", "warning"],
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=timeout) as client:
+            while True:
+                if time.perf_counter() - started > timeout:
+                    raise TimeoutError(f"server in {mode} mode did not answer within {timeout} s")
+                try:
+                    health = client.get("/health")
+                    if health.status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.01)
+            first_health = time.perf_counter() - started
+            status = health.json()["status"]
+            client.post("/analyze", json=payload).raise_for_status()
+            first_analyze = time.perf_counter() - started
+            load = client.get("/health").json()["model"]["ready_seconds"]
+    finally:
+        server.terminate()
+        server.wait()
+    return {"first_health_s": first_health, "first_status": status,
+            "first_analyze_s": first_analyze, "model_load_s": load}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time and time-to-ready of the feeding API")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--out", help="Also save the results as JSON here")
+    args = parser.parse_args()
+
+    imports = {
+        "import app": float(np.median([import_seconds() for _ in range(args.runs)])),
+        "import app (eager deps)": float(np.median([import_seconds(EAGER_IMPORTS) for _ in range(args.runs)])),
+    }
+    print(f"{'import':<26} {'seconds':>8}")
+    for name, seconds in imports.items():
+        print(f"{name:<26} {seconds:>8.3f}")
+
+    payload = request_mix(1, seed=0)[0]
+    ready = {}
+    print(f"\n{'MODEL_LOADING':<14} {'/health s':>10} {'status':>8} {'/analyze s':>11} {'load s':>7}")
+    for mode in ("startup", "background"):
+        runs = [time_to_ready(mode, payload) for _ in range(args.runs)]
+        ready[mode] = {key: float(np.median([run[key] for run in runs]))
+                       for key in ("first_health_s", "first_analyze_s", "model_load_s")}
+        ready[mode]["first_status"] = runs[0]["first_status"]
+        row = ready[mode]
+        print(f"{mode:<14} {row['first_health_s']:>10.3f} {row['first_status']:>8} "
+              f"{row['first_analyze_s']:>11.3f} {row['model_load_s']:>7.3f}")
+
+    if args.out:
+        print(f"\nSaved {save_results('startup', {'import': imports, 'ready': ready}, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/bench_sweep.py - What-if grids: one sweep against per-point requests
+#
+# For a one-field and a two-field grid around the same base request:
+# one predict_feeding call per point (what the dashboard does, one
+# /analyze per tweak), predict_feeding_many over all grid points, and
+# predict_sweep, which scores the grid as one feature matrix. Then the
+# same one-field grid over HTTP: one /analyze call per point against one
+# POST /analyze/sweep. Results must agree point for point.
+# Run from feeding_AI/Analyze_Services:
+#     python -m benchmarks.bench_sweep
+import asyncio
+import os
+import time
+
+os.environ.setdefault("RESPONSE_CACHE_SIZE", "0")
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+
+import app as api  # noqa: E402
+from benchmarks.common import time_call  # noqa: E402
+
+BASE = {"baby_age_months": 4, "food_type": "Liquid", "food_quantity_ml": 120, "food_temp_celsius": 30,
+        "room_temp_celsius": 22, "time_since_last_feeding_min": 200}
+GRIDS = {
+    "food temp x25": [{"field": "food_temp_celsius", "start": 20, "stop": 50, "steps": 25}],
+    "food temp x quantity 50x50": [{"field": "food_temp_celsius", "start": 20, "stop": 50, "steps": 50},
+                                   {"field": "food_quantity_ml", "start": 20, "stop": 265, "steps": 50}],
+}
+
+
+def grid_requests(sweep):
+    points = np.meshgrid(*[axis.values() for axis in sweep.axes], indexing="ij")
+    updates = zip(*[p.ravel().tolist() for p in points])
+    fields = [axis.field for axis in sweep.axes]
+    return [api.FeedingRequest(**{**BASE, **{field: value for field, value in zip(fields, values)}})
+            for values in updates]
+
+
+def check(predictor, sweep, requests):
+    result = predictor.predict_sweep(sweep.base, sweep.axes)
+    surface = np.asarray(result.suitable).ravel()
+    expected = [r.feeding_suitable for r in predictor.predict_feeding_many(requests)]
+    assert surface.tolist() == expected, "sweep disagrees with predict_feeding_many"
+
+
+async def http_rates(axes):
+    sweep = api.SweepRequest(base=BASE, axes=axes)
+    payloads = [r.model_dump() for r in grid_requests(sweep)]
+    async with api.app.router.lifespan_context(api.app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://bench") as client:
+            async def per_point():
+                for payload in payloads:
+                    (await client.post("/analyze", json=payload)).raise_for_status()
+
+            async def one_sweep():
+                (await client.post("/analyze/sweep", json={"base": BASE, "axes": axes})).raise_for_status()
+
+            timings = {}
+            for name, fn in (("/analyze per point", per_point), ("/analyze/sweep", one_sweep)):
+                await fn()
+                samples = []
+                for _ in range(10):
+                    start = time.perf_counter()
+                    await fn()
+                    samples.append((time.perf_counter() - start) * 1000)
+                timings[name] = float(np.median(samples))
+    return len(payloads), timings
+
+
+def main():
+    predictor = api.BabyFeedingPredictor()
+    predictor.load_models()
+    print(f"{'grid':<28} {'points':>6} {'per point ms':>13} {'many ms':>8} {'sweep ms':>9} {'speedup':>8}")
+    for name, axes in GRIDS.items():
+        sweep = api.SweepRequest(base=BASE, axes=axes)
+        requests = grid_requests(sweep)
+        check(predictor, sweep, requests)
+        sample = requests[:25]
+        per_point = time_call(lambda: [predictor.predict_feeding(r) for r in sample], repeat=5) * len(requests) / len(sample)
+        many = time_call(predictor.predict_feeding_many, requests, repeat=10)
+        swept = time_call(predictor.predict_sweep, sweep.base, sweep.axes, repeat=20)
+        print(f"{name:<28} {len(requests):>6} {per_point:>13.1f} {many:>8.2f} {swept:>9.2f} {per_point / swept:>7.0f}x")
+
+    points, timings = asyncio.run(http_rates(GRIDS["food temp x25"]))
+    print(f"\nHTTP, {points} points")
+    for name, ms in timings.items():
+        print(f"{name:<22} {ms:>9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
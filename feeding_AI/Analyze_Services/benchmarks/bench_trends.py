@@ -0,0 +1,102 @@
+# benchmarks/bench_trends.py - Cost, memory and alert noise of the per-device trend windows
+#
+# Per reading: RollingWindow.push + stats() against recomputing mean,
+# variance and slope with NumPy over the window each time, at several
+# window sizes. Memory: tracemalloc of TrendStore with 1000 devices whose
+# windows are full. Noise: on a synthetic room stream that hovers near
+# 25 °C with sensor blips, then warms steadily, how many readings the
+# per-reading rule (rules.ROOM_TEMP_WARM) flags against the trend alerts.
+# Run from feeding_AI/Analyze_Services:
+#     python -m benchmarks.bench_trends
+import random
+import time
+import tracemalloc
+from collections import deque
+
+import numpy as np
+
+import rules
+from trends import RollingWindow, TrendStore, signal_alerts
+
+READINGS = 20_000
+
+
+def stream(n, seed=0):
+    """(t, room °C): 10 s apart, near 25 °C with 2% blips, warming 0.3 °C/min over the last 20%"""
+    rng = random.Random(seed)
+    warming_from = int(n * 0.8)
+    for i in range(n):
+        value = 25.0 + rng.gauss(0, 0.3)
+        if rng.random() < 0.02:
+            value += rng.choice([-1, 1]) * rng.uniform(2, 5)
+        if i >= warming_from:
+            value += 0.05 * (i - warming_from)
+        yield 1.7e9 + 10 * i, value
+
+
+def incremental_us(readings, size):
+    window = RollingWindow(window_seconds=10 * size, max_samples=size)
+    start = time.perf_counter()
+    for t, v in readings:
+        window.push(t, v)
+        window.stats()
+    return (time.perf_counter() - start) * 1e6 / len(readings)
+
+
+def recompute_us(readings, size):
+    window = deque(maxlen=size)
+    start = time.perf_counter()
+    for t, v in readings:
+        window.append((t, v))
+        ts, vs = np.array(window).T
+        vs.mean(), vs.var()
+        if len(window) > 1:
+            np.polyfit(ts - ts[0], vs, 1)
+    return (time.perf_counter() - start) * 1e6 / len(readings)
+
+
+def store_bytes(devices, size):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    store = TrendStore(window_seconds=10 * size, max_samples=size, max_devices=devices)
+    for d in range(devices):
+        for i in range(size):
+            store.record(f"device-{d}", {"room_temp_celsius": 22.0, "food_temp_celsius": 37.0}, 1.7e9 + 10 * i)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used / devices
+
+
+def alert_counts(readings, warming_from):
+    """Readings flagged before warming starts by each method, and the first trend alert after"""
+    window = RollingWindow(window_seconds=600, max_samples=240)
+    per_reading = trend = 0
+    first_trend = None
+    for i, (t, v) in enumerate(readings):
+        window.push(t, v)
+        alerted = bool(signal_alerts("room_temp_celsius", window.stats(), 600))
+        if i < warming_from:
+            per_reading += v > rules.ROOM_TEMP_WARM
+            trend += alerted
+        elif alerted and first_trend is None:
+            first_trend = i - warming_from
+    return per_reading, trend, first_trend
+
+
+def main():
+    readings = list(stream(READINGS))
+    print(f"{'window':>7} {'incremental us':>15} {'recompute us':>13}")
+    for size in (60, 240, 1000):
+        print(f"{size:>7} {incremental_us(readings, size):>15.2f} {recompute_us(readings[:5000], size):>13.2f}")
+
+    print(f"\nMemory per device (2 signals x 240 readings): {store_bytes(1000, 240) / 1024:.1f} KiB")
+
+    warming_from = int(READINGS * 0.8)
+    per_reading, trend, first_trend = alert_counts(readings, warming_from)
+    print(f"\nFalse 'room warm' alerts while the room is steady ({warming_from} readings): "
+          f"per-reading rule {per_reading}, trend alerts {trend}")
+    print(f"First trend alert {first_trend} readings ({first_trend * 10 / 60:.1f} min) after warming starts")
+
+
+if __name__ == "__main__":
+    main()
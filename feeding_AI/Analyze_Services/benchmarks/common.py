@@ -0,0 +1,185 @@
+# benchmarks/common.py - Shared helpers for the offline benchmarks
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+import warnings
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+
+DATA_FILE = "data/baby_feeding_data_2000.xlsx"
+RESULTS_DIR = "benchmarks/results"
+FLAT_BUNDLE = "model/feeding_model_flat"
+
+# Pickles were written by an older sklearn; the warning is noise here
+warnings.filterwarnings("ignore", category=UserWarning)
+
+
+def load_training_frame(path=DATA_FILE):
+    """Read the training workbook and add the encoded food type"""
+    df = pd.read_excel(path)
+    encoder = joblib.load("model/food_type_encoder.pkl")
+    df["FoodTypeEncoded"] = encoder.transform(df["FoodType"])
+    return df
+
+
+def load_training_matrix(model, path=DATA_FILE):
+    """Feature matrix of the training data in the model's column order"""
+    df = load_training_frame(path)
+    return df[list(model.feature_names_in_)].to_numpy(dtype=np.float64)
+
+
+def ensure_flat_bundle(path=FLAT_BUNDLE, source="model/feeding_model.pkl"):
+    """Write the flat .npy bundle from the pickle unless one exists; it is build output, not versioned"""
+    if not os.path.exists(os.path.join(path, "meta.json")):
+        from forest_engine import FlatForest
+        FlatForest.from_sklearn(joblib.load(source)).save(path)
+        print(f"Wrote {path} from {source}.")
+    return path
+
+
+def sample_call(fn, *args, repeat=50, warmup=3):
+    """Wall time of each of repeat calls of fn(*args) in milliseconds"""
+    for _ in range(warmup):
+        fn(*args)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def time_call(fn, *args, repeat=50, warmup=3):
+    """Median wall time of fn(*args) in milliseconds"""
+    return float(np.median(sample_call(fn, *args, repeat=repeat, warmup=warmup)))
+
+
+def percentiles(samples_ms):
+    """p50/p95/p99/mean/max of latency samples in milliseconds"""
+    samples = np.asarray(samples_ms, dtype=np.float64)
+    if not len(samples):
+        return {"samples": 0}
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {
+        "samples": int(len(samples)),
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+        "mean_ms": round(float(samples.mean()), 4),
+        "max_ms": round(float(samples.max()), 4),
+    }
+
+
+def request_mix(n, seed=0, path=DATA_FILE):
+    """n /analyze payloads resampled from the training workbook.
+
+    The workbook has no weight or height, so the API estimates them from
+    age, as it does for most real clients. baby_crying follows the
+    workbook's BabyCriedAfterFeed column.
+    """
+    df = pd.read_excel(path).sample(n, replace=True, random_state=seed)
+    return [
+        {
+            "baby_age_months": int(row.BabyAgeMonths),
+            "food_type": row.FoodType,
+            "food_quantity_ml": int(row.FoodQuantityML),
+            "food_temp_celsius": float(row.FoodTempCelsius),
+            "room_temp_celsius": float(row.RoomTempCelsius),
+            "time_since_last_feeding_min": int(min(row.TimeSinceLastFeedingMin, 1440)),
+            "baby_crying": row.BabyCriedAfterFeed == "Yes",
+        }
+        for row in df.itertuples()
+    ]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def running_server(env=None, timeout=60.0):
+    """Base URL of a uvicorn app:app subprocess, once its /health answers"""
+    import httpx
+    port = free_port()
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "app:app", "--port", str(port),
+                               "--log-level", "warning"],
+                              env=dict(os.environ, PYTHONWARNINGS="ignore", **(env or {})),
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.perf_counter() + timeout
+        while True:
+            try:
+                if httpx.get(f"{url}/health").json()["status"] == "healthy":
+                    break
+            except httpx.TransportError:
+                pass
+            if time.perf_counter() > deadline:
+                raise TimeoutError(f"server did not become healthy within {timeout} s")
+            time.sleep(0.05)
+        yield url
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def run_metadata():
+    """Where and on what a result was measured, so saved runs can be compared"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    from registry import model_version
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "model_version": model_version("model"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "env": {key: value for key, value in os.environ.items()
+                if key.startswith(("INFERENCE_", "MODEL_", "MICRO_BATCH", "RESPONSE_CACHE", "CRY_MODEL"))},
+    }
+
+
+def save_results(kind, results, path=None):
+    """Write {"kind", "meta", "results"} as JSON; returns the path"""
+    meta = run_metadata()
+    if path is None:
+        stamp = meta["timestamp"].replace(":", "").replace("-", "")[:15]
+        path = os.path.join(RESULTS_DIR, f"{kind}-{stamp}-{meta['commit'] or 'nogit'}.json")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"kind": kind, "meta": meta, "results": results}, f, indent=2)
+    return path
+
+
+def compare_results(baseline_path, results, keys=("p50_ms", "p95_ms", "p99_ms")):
+    """Print current / baseline for every case both runs share (>1 is slower)"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline_path} ({baseline['meta'].get('commit')}, "
+          f"{baseline['meta'].get('timestamp')}):")
+    print(f"{'case':<32} " + " ".join(f"{key:>16}" for key in keys))
+    for name, current in results.items():
+        before = baseline["results"].get(name)
+        if not before:
+            continue
+        cells = []
+        for key in keys:
+            if before.get(key) and current.get(key) is not None:
+                cells.append(f"{current[key]:>8.3f} x{current[key] / before[key]:>5.2f}")
+            else:
+                cells.append(f"{'-':>16}")
+        print(f"{name:<32} " + " ".join(cells))
@@ -0,0 +1,133 @@
+# benchmarks/loadgen.py - Open-loop load test of /analyze at a target request rate
+#
+# Replays FeedingRequest payloads resampled from the training workbook.
+# Arrivals follow a Poisson process at --rps and never wait for earlier
+# responses, so a slow server builds a queue instead of quietly lowering
+# the offered load. Latency is measured from each request's scheduled
+# send time, so time spent queued behind the load generator counts too.
+# A --batch-fraction of the requests go to /analyze/batch with
+# --batch-size payloads each. The target is the app in-process through an
+# ASGI client (default) or a running server on this box (--url). Every
+# rate replays the same payloads, so with the response cache on later rates
+# are mostly cache hits; RESPONSE_CACHE_SIZE=0 measures the scoring path.
+# Run from feeding_AI/Analyze_Services:
+#     python -m benchmarks.loadgen --rps 50 --duration 30
+#     python -m benchmarks.loadgen --url http://127.0.0.1:8000 --rps 200
+import argparse
+import asyncio
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+
+import httpx
+import numpy as np
+
+from benchmarks.common import compare_results, percentiles, request_mix, save_results
+
+
+@asynccontextmanager
+async def client_for(url):
+    if url:
+        async with httpx.AsyncClient(base_url=url, timeout=30,
+                                     limits=httpx.Limits(max_connections=256)) as client:
+            yield client
+        return
+    import app as api
+    async with api.app.router.lifespan_context(api.app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app),
+                                     base_url="http://loadgen", timeout=30) as client:
+            yield client
+
+
+async def send(client, path, body, scheduled, outcome):
+    try:
+        response = await client.post(path, json=body)
+        outcome["status"][response.status_code] += 1
+        outcome["cache"][response.headers.get("x-cache", "-")] += 1
+        ok = response.status_code == 200
+    except httpx.HTTPError as e:
+        outcome["status"][type(e).__name__] += 1
+        ok = False
+    latency_ms = (time.perf_counter() - scheduled) * 1000
+    outcome["latency" if ok else "error_latency"].append(latency_ms)
+
+
+async def run(client, payloads, rps, duration, batch_fraction, batch_size, seed):
+    rng = np.random.default_rng(seed)
+    count = max(int(rps * duration), 1)
+    offsets = np.cumsum(rng.exponential(1 / rps, count))
+    batched = rng.random(count) < batch_fraction
+    outcome = {"status": Counter(), "cache": Counter(), "latency": [], "error_latency": []}
+    tasks = []
+    started = time.perf_counter()
+    for i, (offset, is_batch) in enumerate(zip(offsets, batched)):
+        scheduled = started + offset
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if is_batch:
+            body = [payloads[(i + k) % len(payloads)] for k in range(batch_size)]
+            tasks.append(asyncio.create_task(send(client, "/analyze/batch", body, scheduled, outcome)))
+        else:
+            tasks.append(asyncio.create_task(send(client, "/analyze", payloads[i % len(payloads)],
+                                                  scheduled, outcome)))
+    send_seconds = time.perf_counter() - started
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    result = percentiles(outcome["latency"])
+    result.update({
+        "target_rps": rps,
+        "offered_rps": round(count / send_seconds, 2),
+        "throughput_rps": round(len(outcome["latency"]) / elapsed, 2),
+        "requests": count,
+        "batch_requests": int(batched.sum()),
+        "errors": len(outcome["error_latency"]),
+        "status": {str(key): value for key, value in outcome["status"].items()},
+        "cache": dict(outcome["cache"]),
+        "elapsed_s": round(elapsed, 3),
+    })
+    return result
+
+
+async def main_async(args):
+    payloads = request_mix(args.payloads, seed=args.seed)
+    async with client_for(args.url) as client:
+        # Warm up: model pages, first-call imports, connection pool
+        for payload in payloads[:20]:
+            await client.post("/analyze", json=payload)
+        results = {}
+        for rps in args.rps:
+            name = f"loadgen.{rps:g}rps"
+            results[name] = await run(client, payloads, rps, args.duration,
+                                      args.batch_fraction, args.batch_size, args.seed)
+            r = results[name]
+            print(f"{name:<18} offered {r['offered_rps']:>8.1f}/s  served {r['throughput_rps']:>8.1f}/s  "
+                  f"p50 {r.get('p50_ms', float('nan')):>8.2f}  p95 {r.get('p95_ms', float('nan')):>8.2f}  "
+                  f"p99 {r.get('p99_ms', float('nan')):>8.2f} ms  errors {r['errors']}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop load generator for the feeding API")
+    parser.add_argument("--rps", type=float, nargs="+", default=[25.0],
+                        help="Target request rates; each is run for --duration seconds")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--url", help="Base URL of a running server (default: the app in-process)")
+    parser.add_argument("--batch-fraction", type=float, default=0.0,
+                        help="Share of requests sent to /analyze/batch")
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--payloads", type=int, default=2000, help="Distinct payloads sampled from the workbook")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Result file (default: benchmarks/results/loadgen-<time>-<commit>.json)")
+    parser.add_argument("--compare", help="Earlier result file to compare against")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    print(f"\nSaved {save_results('loadgen', results, args.out)}")
+    if args.compare:
+        compare_results(args.compare, results, keys=("throughput_rps", "p50_ms", "p95_ms", "p99_ms"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# benchmarks/suite.py - Latency of every layer of the feeding API, saved as JSON
+#
+# Cases, each reported as p50/p95/p99/mean/max ms plus rows per second:
+#   inference.*   predict_proba on 1 row and on the 2000 training rows, both engines
+#   rules.*       rules.evaluate and rules.rule_based_predictions, 1 and 2000 rows
+#   predictor.*   BabyFeedingPredictor.predict_feeding_many: features, models, rules
+#   http.*        POST /analyze and /analyze/batch through an in-process ASGI client
+#   model_load.*  load_bundle from the pickle and from the memory-mapped flat bundle
+# The response cache is off unless RESPONSE_CACHE_SIZE is set, so http.* measures
+# the scoring path rather than cache hits. Other settings come from the usual
+# environment variables (INFERENCE_ENGINE, MICRO_BATCHING, ...) and are saved
+# with the results. Results go to benchmarks/results/ (not versioned: they
+# describe one machine) unless --out is given; for a baseline, run the suite
+# on the earlier commit first and pass its file to --compare.
+# Run from feeding_AI/Analyze_Services:
+#     python -m benchmarks.suite [--only http.] [--compare benchmarks/results/<earlier>.json]
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("RESPONSE_CACHE_SIZE", "0")
+
+import httpx  # noqa: E402
+import joblib  # noqa: E402
+import numpy as np  # noqa: E402
+
+import app as api  # noqa: E402
+import rules  # noqa: E402
+from benchmarks.common import (compare_results, ensure_flat_bundle, load_training_frame, load_training_matrix,  # noqa: E402
+                               percentiles, request_mix, sample_call, save_results)
+from forest_engine import FlatForest  # noqa: E402
+
+
+def case(samples_ms, rows=1):
+    result = percentiles(samples_ms)
+    result["rows"] = rows
+    result["rows_per_s"] = round(rows * 1000 / result["mean_ms"], 1)
+    return result
+
+
+def inference_cases(repeat):
+    model = joblib.load("model/feeding_model.pkl")
+    X = load_training_matrix(model)
+    results = {}
+    for engine, scorer in (("sklearn", model), ("flat", FlatForest.from_sklearn(model))):
+        results[f"inference.{engine}.single"] = case(sample_call(scorer.predict_proba, X[:1], repeat=repeat))
+        results[f"inference.{engine}.batch"] = case(
+            sample_call(scorer.predict_proba, X, repeat=max(repeat // 20, 5)), len(X))
+    return results
+
+
+def rules_cases(repeat):
+    df = load_training_frame()
+    rng = np.random.default_rng(0)
+    predictions = rng.random(len(df)) < 0.5
+    crying = rng.random(len(df)) < 0.5
+    results = {}
+    for label, rows in (("single", slice(0, 1)), ("batch", slice(None))):
+        columns = rules.frame_columns(df[rows], predictions[rows], crying[rows])
+        n = len(columns["age"])
+        count = repeat if label == "single" else max(repeat // 20, 5)
+        results[f"rules.evaluate.{label}"] = case(sample_call(rules.evaluate, columns, repeat=count), n)
+        results[f"rules.rule_based.{label}"] = case(
+            sample_call(rules.rule_based_predictions, columns, repeat=count), n)
+    return results
+
+
+def predictor_cases(repeat, payloads):
+    predictor = api.BabyFeedingPredictor()
+    predictor.load_models()
+    requests = [api.FeedingRequest(**payload) for payload in payloads]
+    single = []
+    for request in requests[:repeat]:
+        start = time.perf_counter()
+        predictor.predict_feeding_many([request])
+        single.append((time.perf_counter() - start) * 1000)
+    batch = requests[:100]
+    return {
+        "predictor.single": case(single),
+        "predictor.batch": case(sample_call(predictor.predict_feeding_many, batch,
+                                            repeat=max(repeat // 10, 5)), len(batch)),
+    }
+
+
+async def http_cases(repeat, payloads):
+    async with api.app.router.lifespan_context(api.app):
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for payload in payloads[:10]:
+                (await client.post("/analyze", json=payload)).raise_for_status()
+
+            single = []
+            for payload in payloads[:repeat]:
+                start = time.perf_counter()
+                (await client.post("/analyze", json=payload)).raise_for_status()
+                single.append((time.perf_counter() - start) * 1000)
+
+            batch = payloads[:100]
+            batched = []
+            for _ in range(max(repeat // 10, 5)):
+                start = time.perf_counter()
+                (await client.post("/analyze/batch", json=batch)).raise_for_status()
+                batched.append((time.perf_counter() - start) * 1000)
+    return {"http.analyze": case(single), "http.analyze_batch": case(batched, len(batch))}
+
+
+def model_load_cases(repeat):
+    ensure_flat_bundle()
+    predictor = api.BabyFeedingPredictor()
+    results = {}
+    configured = api.MODEL_FORMAT
+    try:
+        for fmt in ("pickle", "flat"):
+            api.MODEL_FORMAT = fmt
+            results[f"model_load.{fmt}"] = case(sample_call(predictor.load_bundle, "model",
+                                                            repeat=max(repeat // 40, 5), warmup=1))
+    finally:
+        api.MODEL_FORMAT = configured
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Feeding API benchmark suite")
+    parser.add_argument("--repeat", type=int, default=200, help="Samples per single-row case")
+    parser.add_argument("--only", help="Run only cases whose name starts with this prefix")
+    parser.add_argument("--out", help="Result file (default: benchmarks/results/suite-<time>-<commit>.json)")
+    parser.add_argument("--compare", help="Earlier result file to compare against")
+    args = parser.parse_args()
+
+    payloads = request_mix(max(args.repeat, 100) + 10, seed=0)
+    groups = {
+        "inference": lambda: inference_cases(args.repeat),
+        "rules": lambda: rules_cases(args.repeat),
+        "predictor": lambda: predictor_cases(args.repeat, payloads),
+        "http": lambda: asyncio.run(http_cases(args.repeat, payloads)),
+        "model_load": lambda: model_load_cases(args.repeat),
+    }
+    results = {}
+    for group, run in groups.items():
+        if args.only and not (group.startswith(args.only) or args.only.startswith(group)):
+            continue
+        results.update({name: result for name, result in run().items()
+                        if not args.only or name.startswith(args.only)})
+
+    print(f"\n{'case':<28} {'rows':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rows/s':>11}")
+    for name, result in results.items():
+        print(f"{name:<28} {result['rows']:>5} {result['p50_ms']:>9.3f} {result['p95_ms']:>9.3f} "
+              f"{result['p99_ms']:>9.3f} {result['rows_per_s']:>11.1f}")
+    print(f"\nSaved {save_results('suite', results, args.out)}")
+    if args.compare:
+        compare_results(args.compare, results)
+
+
+if __name__ == "__main__":
+    main()
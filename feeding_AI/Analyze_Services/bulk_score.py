@@ -0,0 +1,198 @@
+# bulk_score.py - Offline re-scoring of archived readings with the serving predictor
+#
+# python bulk_score.py data/feedings scores.parquet --chunk-size 10000 --workers 4
+#
+# The input (RecordStore directory, .parquet, .csv or .xlsx) is read one
+# chunk at a time, each chunk is scored by a process-pool worker that
+# loaded the models once, and results are appended to a Parquet file in
+# input order. At most 2 x workers chunks are in flight, so memory
+# depends on the chunk size, not on the size of the input.
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from records import iter_record_chunks
+
+# Input column -> FeedingRequest field. Files may also use the field names.
+INPUT_COLUMNS = {
+    "BabyAgeMonths": "baby_age_months",
+    "BabyWeightKg": "baby_weight_kg",
+    "BabyHeightCm": "baby_height_cm",
+    "FoodType": "food_type",
+    "FoodQuantityML": "food_quantity_ml",
+    "FoodTempCelsius": "food_temp_celsius",
+    "RoomTempCelsius": "room_temp_celsius",
+    "TimeSinceLastFeedingMin": "time_since_last_feeding_min",
+    "BabyCrying": "baby_crying",
+}
+
+ANALYSIS_TYPE = pa.struct([
+    ("expected_quantity_ml", pa.int64()),
+    ("actual_quantity_ml", pa.int64()),
+    ("quantity_status", pa.string()),
+    ("expected_feeding_interval_min", pa.int64()),
+    ("actual_interval_min", pa.int64()),
+    ("interval_status", pa.string()),
+    ("food_temp_status", pa.string()),
+    ("room_temp_status", pa.string()),
+    ("estimated_weight_kg", pa.float64()),
+    ("estimated_height_cm", pa.float64()),
+])
+
+# One output row per input row; rows that failed have only row and error set
+OUTPUT_SCHEMA = pa.schema([
+    ("row", pa.int64()),
+    ("feeding_suitable", pa.bool_()),
+    ("confidence", pa.float64()),
+    ("cry_probability", pa.float64()),
+    ("baby_crying", pa.bool_()),
+    ("cry_reasons", pa.list_(pa.string())),
+    ("recommendations", pa.list_(pa.string())),
+    ("feeding_analysis", ANALYSIS_TYPE),
+    ("error", pa.string()),
+])
+
+# Predictor of this process, set by init_worker
+_predictor = None
+
+
+def init_worker(model_dir="model", engine="sklearn"):
+    """Load the models once per worker process"""
+    global _predictor
+    from app import BabyFeedingPredictor
+    _predictor = BabyFeedingPredictor(engine)
+    _predictor.activate(_predictor.load_bundle(model_dir))
+
+
+def describe(error):
+    """'field: message; ...' for a ValidationError, str(error) otherwise"""
+    errors = getattr(error, "errors", None)
+    if errors is None:
+        return str(error)
+    return "; ".join(f"{'.'.join(map(str, e['loc'])) or 'request'}: {e['msg']}" for e in errors())
+
+
+def score_chunk(df, first_row, keep=()):
+    """Score one input chunk with a single predict_feeding_many call.
+
+    Returns an Arrow table of OUTPUT_SCHEMA followed by the keep columns.
+    """
+    from app import FeedingRequest
+    fields = df.rename(columns=INPUT_COLUMNS)
+    fields = fields[[name for name in fields.columns if name in FeedingRequest.model_fields]]
+    # NaN -> None so a missing weight or height is estimated, as in the API
+    records = fields.astype(object).where(fields.notna(), None).to_dict("records")
+
+    outcomes = [None] * len(records)
+    valid, requests = [], []
+    for i, record in enumerate(records):
+        try:
+            requests.append(FeedingRequest(**record))
+            valid.append(i)
+        except Exception as e:
+            outcomes[i] = e
+    for i, outcome in zip(valid, _predictor.predict_feeding_many(requests)):
+        outcomes[i] = outcome
+
+    columns = {name: [] for name in OUTPUT_SCHEMA.names}
+    for i, outcome in enumerate(outcomes):
+        columns["row"].append(first_row + i)
+        failed = isinstance(outcome, Exception)
+        columns["error"].append(describe(outcome) if failed else None)
+        for name in OUTPUT_SCHEMA.names[1:-1]:
+            columns[name].append(None if failed else getattr(outcome, name))
+    table = pa.Table.from_pydict(columns, schema=OUTPUT_SCHEMA)
+
+    kept = [name for name in keep if name in df.columns]
+    if kept:
+        extra = pa.Table.from_pandas(df[kept].reset_index(drop=True), preserve_index=False)
+        for name in kept:
+            table = table.append_column(name, extra.column(name))
+    return table
+
+
+def scored_chunks(chunks, workers, model_dir, engine, keep):
+    """Scored tables in input order; workers <= 1 scores in this process"""
+    if workers <= 1:
+        init_worker(model_dir, engine)
+        for first_row, df in chunks:
+            yield score_chunk(df, first_row, keep)
+        return
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(model_dir, engine)) as pool:
+        pending = deque()
+        for first_row, df in chunks:
+            pending.append(pool.submit(score_chunk, df, first_row, keep))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def numbered(chunks):
+    """(index of the chunk's first row, chunk) pairs"""
+    first_row = 0
+    for df in chunks:
+        yield first_row, df
+        first_row += len(df)
+
+
+def bulk_score(source, target, chunk_size=10_000, workers=1, model_dir="model", engine="sklearn", keep=()):
+    """Score every row of source into the Parquet file target; returns run stats"""
+    keep = list(keep)
+    columns = list(INPUT_COLUMNS) + list(INPUT_COLUMNS.values()) + keep
+    chunks = numbered(iter_record_chunks(source, chunk_size, columns))
+    started = time.perf_counter()
+    rows = failed = 0
+    writer = None
+    try:
+        for table in scored_chunks(chunks, workers, model_dir, engine, keep):
+            if writer is None:
+                writer = pq.ParquetWriter(f"{target}.tmp", table.schema)
+            writer.write_table(table.cast(writer.schema))
+            rows += table.num_rows
+            failed += table.num_rows - table.column("error").null_count
+            elapsed = time.perf_counter() - started
+            print(f"Scored {rows} rows ({failed} failed), {rows / elapsed:.0f} rows/s")
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        pq.write_table(OUTPUT_SCHEMA.empty_table(), f"{target}.tmp")
+    os.replace(f"{target}.tmp", target)
+    seconds = time.perf_counter() - started
+    return {
+        "rows": rows,
+        "failed": failed,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(rows / seconds, 1) if seconds else None,
+        "workers": workers,
+        "chunk_size": chunk_size,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score archived feeding readings into a Parquet file")
+    parser.add_argument("source", help="RecordStore directory, .parquet, .csv or .xlsx")
+    parser.add_argument("target", help="Output .parquet file")
+    parser.add_argument("--chunk-size", type=int, default=10_000, help="Rows read and scored at a time")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Scoring processes (1: score in this process)")
+    parser.add_argument("--model-dir", default="model")
+    parser.add_argument("--engine", default=os.getenv("INFERENCE_ENGINE", "sklearn"), choices=["sklearn", "flat"])
+    parser.add_argument("--keep", nargs="*", default=["BabyID"],
+                        help="Input columns copied to the output, e.g. IDs and timestamps")
+    args = parser.parse_args()
+
+    stats = bulk_score(args.source, args.target, args.chunk_size, args.workers,
+                       args.model_dir, args.engine, args.keep)
+    print(f"Wrote {stats['rows']} rows ({stats['failed']} failed) to {args.target} "
+          f"in {stats['seconds']} s: {stats['rows_per_second']} rows/s.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# cache.py - LRU + TTL cache for /analyze responses
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """Bounded LRU cache whose entries also expire after ttl_seconds.
+
+    Keys are built from the validated FeedingRequest. Temperatures and the
+    feeding interval can optionally be quantized into buckets, so readings
+    that differ only by sensor jitter share one entry. A bucket of 0 keeps
+    the exact value. With buckets, score canonical(request) rather than the
+    request itself: every request sharing a key then gets the response to
+    the same bucketed inputs, whichever of them filled the entry.
+    """
+
+    def __init__(self, max_size=10000, ttl_seconds=300.0, temp_bucket=0.0, interval_bucket=0):
+        self.max_size = max(0, max_size)
+        self.ttl_seconds = ttl_seconds
+        self.temp_bucket = temp_bucket
+        self.interval_bucket = interval_bucket
+        self.entries = OrderedDict()  # key -> (stored_at, value)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.generation = 0  # bumped by clear() so in-flight results from an old model are dropped
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    def quantize(self, value, bucket):
+        if not bucket:
+            return value
+        return round(value / bucket) * bucket
+
+    def canonical(self, request):
+        """The request with its bucketed fields rounded, i.e. what its key describes"""
+        if not self.temp_bucket and not self.interval_bucket:
+            return request
+        return request.model_copy(update={
+            "food_temp_celsius": self.quantize(request.food_temp_celsius, self.temp_bucket),
+            "room_temp_celsius": self.quantize(request.room_temp_celsius, self.temp_bucket),
+            "time_since_last_feeding_min": self.quantize(request.time_since_last_feeding_min, self.interval_bucket)
+        })
+
+    def key(self, request):
+        return (
+            request.baby_age_months,
+            request.baby_weight_kg,
+            request.baby_height_cm,
+            request.food_type,
+            request.food_quantity_ml,
+            self.quantize(request.food_temp_celsius, self.temp_bucket),
+            self.quantize(request.room_temp_celsius, self.temp_bucket),
+            self.quantize(request.time_since_last_feeding_min, self.interval_bucket),
+            bool(request.baby_crying)
+        )
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if self.ttl_seconds and time.monotonic() - stored_at > self.ttl_seconds:
+                del self.entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, generation=None):
+        if not self.enabled:
+            return
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return
+            self.entries[key] = (time.monotonic(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry, e.g. after the model changes"""
+        with self.lock:
+            self.entries.clear()
+            self.generation += 1
+            self.invalidations += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
@@ -0,0 +1,131 @@
+# dashboard_client.py - HTTP client the Streamlit dashboard uses to reach the API
+import json
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Shown when the API cannot be reached; the encoder classes of the shipped model
+DEFAULT_FOOD_TYPES = ["Liquid", "Semi", "Solid"]
+
+
+class ApiError(Exception):
+    """The API answered with an error status"""
+
+    def __init__(self, status_code, detail):
+        super().__init__(f"API Error: {status_code}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+class AnalyzeResult:
+    """One /analyze response plus where its time went"""
+
+    def __init__(self, data, round_trip_ms, server_ms=None, queue_wait_ms=None, cache=None):
+        self.data = data
+        self.round_trip_ms = round_trip_ms
+        self.server_ms = server_ms  # Server-Timing app;dur, None if the API does not send it
+        self.queue_wait_ms = queue_wait_ms
+        self.cache = cache  # the API's X-Cache header
+        self.memoized = False  # True when served from this dashboard session's memo
+
+    def timing_text(self):
+        parts = []
+        if self.memoized:
+            parts.append("from this session's results")
+        if self.server_ms is not None:
+            parts.append(f"server {self.server_ms:.1f} ms")
+        if self.queue_wait_ms is not None:
+            parts.append(f"queued {self.queue_wait_ms:.1f} ms")
+        if self.cache:
+            parts.append(f"API cache {self.cache}")
+        parts.append(f"round trip {self.round_trip_ms:.0f} ms")
+        return " · ".join(parts)
+
+
+def server_timing_ms(header, name="app"):
+    """dur of one Server-Timing metric ('app;dur=1.23, db;dur=4') in ms, or None"""
+    for metric in (header or "").split(","):
+        fields = [field.strip() for field in metric.split(";")]
+        if fields[0] != name:
+            continue
+        for field in fields[1:]:
+            key, _, value = field.partition("=")
+            if key == "dur":
+                try:
+                    return float(value)
+                except ValueError:
+                    return None
+    return None
+
+
+class FeedingApiClient:
+    """Pooled, retrying requests.Session for the feeding API.
+
+    One instance is shared by every dashboard session (st.cache_resource),
+    so connections are reused instead of opened per call. Every call has
+    a (connect, read) timeout. Connection errors and 502/503/504 are
+    retried with backoff, honouring Retry-After; /analyze is a pure
+    scoring call, so retrying the POST is safe. Read timeouts are not
+    retried: a server that slow is overloaded, and the caregiver should
+    hear so within one timeout.
+    """
+
+    def __init__(self, base_url, timeout=(3.05, 10.0), retries=2, backoff=0.25, pool_size=20):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        retry = Retry(total=retries, read=0, backoff_factor=backoff, status_forcelist=(502, 503, 504),
+                      allowed_methods=frozenset({"GET", "POST"}), respect_retry_after_header=True,
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(self, method, path, **kwargs):
+        response = self.session.request(method, f"{self.base_url}{path}", timeout=self.timeout, **kwargs)
+        if response.status_code != 200:
+            raise ApiError(response.status_code, response.text)
+        return response
+
+    def food_types(self):
+        return self.request("GET", "/food-types").json()["food_types"]
+
+    def analyze(self, payload):
+        started = time.perf_counter()
+        response = self.request("POST", "/analyze", json=payload)
+        queue_wait = response.headers.get("X-Queue-Wait-Ms")
+        return AnalyzeResult(
+            response.json(),
+            round_trip_ms=(time.perf_counter() - started) * 1000,
+            server_ms=server_timing_ms(response.headers.get("Server-Timing")),
+            queue_wait_ms=float(queue_wait) if queue_wait else None,
+            cache=response.headers.get("X-Cache"),
+        )
+
+
+class ResultMemo:
+    """Most recent /analyze results of one dashboard session, keyed by payload.
+
+    Re-running an analysis the caregiver already ran (e.g. after toggling
+    back to earlier values) is answered without a request.
+    """
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self.results = OrderedDict()
+
+    def analyze(self, client, payload):
+        key = json.dumps(payload, sort_keys=True)
+        result = self.results.get(key)
+        if result is not None:
+            self.results.move_to_end(key)
+            result.memoized = True
+            return result
+        result = client.analyze(payload)
+        self.results[key] = result
+        if len(self.results) > self.maxsize:
+            self.results.popitem(last=False)
+        return result
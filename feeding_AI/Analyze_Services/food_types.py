@@ -0,0 +1,78 @@
+# food_types.py - Immutable food type -> model code table built from the trained encoder
+from types import MappingProxyType
+
+# LabelEncoder classes of the training workbook; used when no encoder is available
+DEFAULT_FOOD_TYPES = ("Liquid", "Semi", "Solid")
+
+
+class UnknownFoodType(ValueError):
+    """A food type the model was not trained on and no alias covers"""
+
+
+def parse_aliases(spec):
+    """'Formula:Liquid,Breast Milk:Liquid' -> {"Formula": "Liquid", "Breast Milk": "Liquid"}"""
+    aliases = {}
+    for pair in (spec or "").split(","):
+        if pair.strip():
+            alias, _, target = pair.partition(":")
+            aliases[alias.strip()] = target.strip()
+    return aliases
+
+
+class FoodTypeTable:
+    """Food type name -> encoded value, fixed when a model version is loaded.
+
+    Codes are positions in the encoder's classes_, which is what
+    LabelEncoder.transform returns, without its per-call validation and
+    searchsorted. Aliases map other names onto trained classes. A name that
+    is neither raises UnknownFoodType, or takes the fallback class's code
+    when a fallback is configured.
+    """
+
+    def __init__(self, classes=DEFAULT_FOOD_TYPES, aliases=None, fallback=None):
+        self.classes = tuple(str(name) for name in classes)
+        codes = {name: code for code, name in enumerate(self.classes)}
+        kept = {}
+        for alias, target in (aliases or {}).items():
+            if alias in codes:
+                continue  # a trained class always keeps its own code
+            if target not in codes:
+                print(f"Warning: food type alias {alias!r} -> {target!r} ignored; {target!r} is not a trained class.")
+                continue
+            kept[alias] = target
+            codes[alias] = codes[target]
+        if fallback is not None and fallback not in self.classes:
+            print(f"Warning: UNKNOWN_FOOD_TYPE {fallback!r} is not a trained class; unknown food types are rejected.")
+            fallback = None
+        self.aliases = MappingProxyType(kept)
+        self.codes = MappingProxyType(codes)
+        self.fallback = fallback
+        self.fallback_code = None if fallback is None else codes[fallback]
+
+    @classmethod
+    def from_encoder(cls, encoder, aliases=None, fallback=None):
+        classes = DEFAULT_FOOD_TYPES if encoder is None else encoder.classes_
+        return cls(classes, aliases, fallback)
+
+    def encode(self, name, on_fallback=None):
+        """Code for name; an unknown name takes the fallback code, calling on_fallback(), or raises"""
+        code = self.codes.get(name)
+        if code is None:
+            code = self.unknown(name)
+            if on_fallback is not None:
+                on_fallback()
+        return code
+
+    def unknown(self, name):
+        """Code for a name missing from the table, or UnknownFoodType"""
+        if self.fallback_code is None:
+            raise UnknownFoodType(f"Unknown food type {name!r}; expected one of {list(self.codes)}")
+        return self.fallback_code
+
+    def to_dict(self):
+        """GET /food-types: every accepted name under food_types, as before the table existed"""
+        return {
+            "food_types": list(self.codes),
+            "aliases": dict(self.aliases),
+            "unknown_food_type": self.fallback,
+        }
@@ -0,0 +1,286 @@
+# forest_engine.py - Flat-array evaluator for fitted sklearn random forests
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Arrays written by FlatForest.save, one uncompressed .npy file each
+ARRAY_NAMES = ("feature", "threshold", "children", "is_leaf", "values", "roots")
+
+
+class FlatForest:
+    """A RandomForestClassifier compiled into flat NumPy node arrays.
+
+    All trees are concatenated into one node table and every (row, tree)
+    pair is stepped one level per iteration until it reaches a leaf.
+    Leaves point to themselves with an infinite threshold, so a pair that
+    has finished can be stepped again without changing its result.
+    Scores match sklearn's predict_proba: X is compared as float32
+    against the float64 thresholds, leaf class counts are normalised per
+    tree, and per-tree probabilities are summed in estimator order before
+    dividing by the tree count.
+
+    save() writes the node arrays as plain .npy files, and load() can
+    memory-map them read-only, so every worker process on a host shares
+    one copy through the OS page cache instead of unpickling its own.
+
+    subset(), cap_depth(), merge_leaves() and quantize() return smaller
+    forests for trainModel.py's compression stage; values may then be
+    stored as uint16 multiples of value_scale.
+    """
+
+    def __init__(self, feature, threshold, children, is_leaf, values, roots, max_depth,
+                 classes, feature_names=None, value_scale=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children  # [left, right] per node, flattened
+        self.is_leaf = is_leaf
+        self.values = values
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes_ = classes
+        self.value_scale = value_scale
+        self.n_trees = len(roots)
+        if feature_names is not None:
+            self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        """Compile a fitted single-output forest classifier"""
+        if not hasattr(forest, "estimators_") or getattr(forest, "n_outputs_", 1) != 1:
+            raise ValueError("Only fitted single-output forest classifiers can be compiled")
+
+        n_classes = len(forest.classes_)
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            count = tree.node_count
+            node_ids = np.arange(count)
+            is_leaf = tree.children_left == -1
+
+            feature = np.where(is_leaf, 0, tree.feature).astype(np.intp)
+            threshold = np.where(is_leaf, np.inf, tree.threshold).astype(np.float64)
+            left = np.where(is_leaf, node_ids, tree.children_left) + offset
+            right = np.where(is_leaf, node_ids, tree.children_right) + offset
+
+            value = tree.value[:, 0, :n_classes].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+
+            features.append(feature)
+            thresholds.append(threshold)
+            lefts.append(left.astype(np.intp))
+            rights.append(right.astype(np.intp))
+            values.append(value / normalizer)
+            roots.append(offset)
+            offset += count
+            max_depth = max(max_depth, tree.max_depth)
+
+        left = np.concatenate(lefts)
+        right = np.concatenate(rights)
+        return cls(
+            np.concatenate(features),
+            np.concatenate(thresholds),
+            np.stack([left, right], axis=1).ravel(),
+            left == np.arange(len(left)),
+            np.concatenate(values),
+            np.array(roots, dtype=np.intp),
+            max_depth,
+            np.asarray(forest.classes_),
+            getattr(forest, "feature_names_in_", None)
+        )
+
+    def save(self, directory):
+        """Write the node arrays and metadata to directory (meta.json last)"""
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAY_NAMES:
+            # Write a new file and rename it over the old one: workers that
+            # memory-mapped the previous version keep reading the old inode
+            path = os.path.join(directory, f"{name}.npy")
+            with open(f"{path}.tmp", "wb") as f:
+                np.save(f, np.ascontiguousarray(getattr(self, name)))
+            os.replace(f"{path}.tmp", path)
+        names = getattr(self, "feature_names_in_", None)
+        meta = {
+            "max_depth": int(self.max_depth),
+            "classes": np.asarray(self.classes_).tolist(),
+            "feature_names": None if names is None else [str(n) for n in names],
+            "nodes": int(len(self.feature)),
+            "trees": int(self.n_trees),
+            "value_scale": self.value_scale,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }
+        # meta.json marks a complete bundle, so write it after the arrays
+        meta_path = os.path.join(directory, "meta.json")
+        with open(f"{meta_path}.tmp", "w") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """Load a saved bundle; with mmap the arrays stay in the page cache"""
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"),
+                                mmap_mode="r" if mmap else None)
+                  for name in ARRAY_NAMES}
+        return cls(
+            arrays["feature"],
+            arrays["threshold"],
+            arrays["children"],
+            arrays["is_leaf"],
+            arrays["values"],
+            arrays["roots"],
+            meta["max_depth"],
+            np.array(meta["classes"]),
+            meta["feature_names"],
+            meta.get("value_scale")
+        )
+
+    def _with(self, **changes):
+        """Copy of this forest with some arrays replaced"""
+        arrays = {name: getattr(self, name) for name in ARRAY_NAMES}
+        arrays.update(changes)
+        return FlatForest(arrays["feature"], arrays["threshold"], arrays["children"], arrays["is_leaf"],
+                          arrays["values"], arrays["roots"], changes.get("max_depth", self.max_depth),
+                          self.classes_, getattr(self, "feature_names_in_", None), self.value_scale)
+
+    def _walk(self, roots):
+        """Reachable nodes of each tree in breadth-first order, with their depths"""
+        order, depth = [], []
+        for root in roots:
+            nodes, depths, i = [int(root)], [0], 0
+            while i < len(nodes):
+                node = nodes[i]
+                if not self.is_leaf[node]:
+                    nodes += [int(self.children[2 * node]), int(self.children[2 * node + 1])]
+                    depths += [depths[i] + 1] * 2
+                i += 1
+            order.append(nodes)
+            depth.append(depths)
+        return order, depth
+
+    def node_depths(self):
+        order, depth = self._walk(self.roots)
+        depths = np.zeros(len(self.feature), dtype=np.int64)
+        for nodes, d in zip(order, depth):
+            depths[nodes] = d
+        return depths
+
+    def compact(self, trees=None):
+        """Keep only the nodes reachable from the given trees (default: all), renumbered"""
+        roots = self.roots if trees is None else self.roots[list(trees)]
+        order, depth = self._walk(roots)
+        old = np.concatenate([np.asarray(nodes, dtype=np.intp) for nodes in order])
+        new_id = np.full(len(self.feature), -1, dtype=np.intp)
+        new_id[old] = np.arange(len(old))
+        children = new_id[self.children.reshape(-1, 2)[old]].ravel().astype(self.children.dtype)
+        starts = np.cumsum([0] + [len(nodes) for nodes in order[:-1]])
+        return self._with(feature=self.feature[old], threshold=self.threshold[old], children=children,
+                          is_leaf=self.is_leaf[old], values=self.values[old],
+                          roots=starts.astype(self.roots.dtype), max_depth=max(max(d) for d in depth))
+
+    def subset(self, trees):
+        """Forest of the given trees only, in the given order"""
+        return self.compact(trees)
+
+    def _as_leaves(self, nodes):
+        """Turn nodes into leaves predicting their own class distribution"""
+        feature, threshold = self.feature.copy(), self.threshold.copy()
+        children, is_leaf = self.children.copy(), self.is_leaf.copy()
+        feature[nodes] = 0
+        threshold[nodes] = np.inf
+        children[2 * nodes] = nodes
+        children[2 * nodes + 1] = nodes
+        is_leaf[nodes] = True
+        return self._with(feature=feature, threshold=threshold, children=children, is_leaf=is_leaf)
+
+    def cap_depth(self, max_depth):
+        """Cut every tree at max_depth; the cut nodes predict their class distribution"""
+        nodes = np.flatnonzero((self.node_depths() == max_depth) & ~self.is_leaf)
+        return self._as_leaves(nodes).compact()
+
+    def merge_leaves(self, tolerance):
+        """Collapse splits whose two leaves' probabilities differ by at most tolerance"""
+        forest = self
+        while True:
+            internal = np.flatnonzero(~forest.is_leaf)
+            left, right = forest.children[2 * internal], forest.children[2 * internal + 1]
+            close = np.abs(forest.values[left].astype(np.float64) - forest.values[right]).max(axis=1) <= tolerance
+            merge = internal[forest.is_leaf[left] & forest.is_leaf[right] & close]
+            if not len(merge):
+                return forest.compact()
+            forest = forest._as_leaves(merge)
+
+    def quantize(self, values="float32"):
+        """Compact dtypes: float32 thresholds, small index types, float32 or uint16 values.
+
+        Thresholds are rounded down to the nearest float32, so the float32
+        input comparison X <= threshold gives exactly the same branch.
+        """
+        threshold = self.threshold.astype(np.float32)
+        too_high = threshold.astype(np.float64) > self.threshold
+        threshold[too_high] = np.nextafter(threshold[too_high], np.float32(-np.inf))
+        n_features = int(self.feature.max()) + 1 if len(self.feature) else 1
+        feature = self.feature.astype(np.uint8 if n_features <= 256 else np.int32)
+        index_type = np.int32 if len(self.feature) < 2**31 else np.intp
+        forest = self._with(feature=feature, threshold=threshold, children=self.children.astype(index_type),
+                            roots=self.roots.astype(index_type))
+        if values == "uint16":
+            scale = self.value_scale or 1.0
+            forest.values = np.rint(self.values.astype(np.float64) * scale * 65535).astype(np.uint16)
+            forest.value_scale = 1 / 65535
+        elif values == "float32":
+            forest.values = self.values.astype(np.float32)
+        return forest
+
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in ARRAY_NAMES)
+
+    def tree_proba(self, X):
+        """Per-tree class probabilities, shape (n_rows, n_trees, n_classes)"""
+        proba = self.values[self.apply(X)].astype(np.float64)
+        return proba * self.value_scale if self.value_scale else proba
+
+    def apply(self, X):
+        """Leaf node index reached in every tree, shape (n_rows, n_trees)"""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        row_offset = np.repeat(np.arange(n_rows) * n_features, self.n_trees)
+        nodes = np.tile(self.roots, n_rows)
+        # (row, tree) pairs still walking; finished pairs drop out early
+        active = np.arange(n_rows * self.n_trees)
+        for _ in range(self.max_depth):
+            current = nodes[active]
+            go_right = ~(flat_X[row_offset[active] + self.feature[current]] <= self.threshold[current])
+            nxt = self.children[2 * current + go_right]
+            nodes[active] = nxt
+            active = active[~self.is_leaf[nxt]]
+            if not len(active):
+                break
+        return nodes.reshape(n_rows, self.n_trees)
+
+    def predict_proba(self, X):
+        # Summing over the tree axis accumulates in estimator order, like sklearn
+        proba = self.values[self.apply(X)].sum(axis=1, dtype=np.float64)
+        if self.value_scale:
+            proba *= self.value_scale
+        return proba / self.n_trees
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+if __name__ == "__main__":
+    # Convert an existing pickle: python forest_engine.py model/feeding_model.pkl model/feeding_model_flat
+    import joblib
+    source, target = sys.argv[1], sys.argv[2]
+    FlatForest.from_sklearn(joblib.load(source)).save(target)
+    print(f"Wrote flat forest bundle to {target}.")
@@ -0,0 +1,189 @@
+# incremental.py - Grow the feeding forest on newly stored records instead of retraining
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+
+from forest_engine import FlatForest
+from records import RecordStore, read_records, write_holdout
+from registry import model_version
+from trainModel import HOLDOUT_PATH, BabyFeedingPredictor
+
+TRAINING_STATE = "training_state.json"
+TRAINING_LOG = "training_log.jsonl"
+HOLDOUT = os.path.basename(HOLDOUT_PATH)  # unseen rows the API's reload gate scores
+
+
+class IncrementalTrainer:
+    """Adds warm_start trees fitted only on records not yet trained on.
+
+    The number of new trees follows the new data's share of all rows seen,
+    so a small batch cannot outvote the existing forest. Past max_trees the
+    oldest trees are dropped, which makes the forest a sliding window over
+    the record history. Consumed parts are tracked in training_state.json
+    and every published version is appended to training_log.jsonl.
+    """
+
+    def __init__(self, store, model_dir="model", max_trees=500, max_new_trees=50,
+                 test_size=0.2, reference_file=None, random_state=42):
+        self.store = store
+        self.model_dir = model_dir
+        self.max_trees = max_trees
+        self.max_new_trees = max_new_trees
+        self.test_size = test_size
+        self.reference_file = reference_file
+        self.random_state = random_state
+
+    def load_state(self):
+        path = os.path.join(self.model_dir, TRAINING_STATE)
+        if not os.path.exists(path):
+            return {"trained_parts": [], "rows_seen": None}
+        with open(path) as f:
+            return json.load(f)
+
+    def save_state(self, state):
+        path = os.path.join(self.model_dir, TRAINING_STATE)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(f"{path}.tmp", path)
+
+    def pending_parts(self, state=None):
+        trained = set((state or self.load_state())["trained_parts"])
+        return [name for name in self.store.parts() if name not in trained]
+
+    def features(self, df, model, encoder):
+        """Model feature frame for df, built by the same prepare_data as a full retrain"""
+        prep = BabyFeedingPredictor()
+        prep.food_encoder = encoder
+        df = prep.prepare_data(df.copy(), fit_encoder=False)
+        return df[list(model.feature_names_in_)], df["SuitableFood"]
+
+    def rows_seen(self, state, model):
+        if state["rows_seen"]:
+            return state["rows_seen"]
+        # Bootstrapped trees draw one sample per training row, so the root
+        # weight of the first tree is the size of the original training set
+        return int(model.estimators_[0].tree_.weighted_n_node_samples[0])
+
+    def update(self):
+        """Train on pending parts and publish a new version; returns the metrics record"""
+        started = time.perf_counter()
+        state = self.load_state()
+        parts = self.pending_parts(state)
+        if not parts:
+            return {"published": False, "reason": "no new records"}
+
+        model = joblib.load(os.path.join(self.model_dir, "feeding_model.pkl"))
+        encoder = joblib.load(os.path.join(self.model_dir, "food_type_encoder.pkl"))
+        df = self.store.read(parts)
+        known = df["FoodType"].isin(encoder.classes_)
+        if not known.all():
+            print(f"Skipping {int((~known).sum())} records with food types the encoder does not know.")
+        X, y = self.features(df[known], model, encoder)
+
+        if len(X) >= 10 and self.test_size:
+            X_train, X_test, y_train, y_test = train_test_split(
+                X, y, test_size=self.test_size, random_state=self.random_state)
+        else:
+            X_train, X_test, y_train, y_test = X, X.iloc[:0], y, y.iloc[:0]
+        if set(y_train) != set(model.classes_):
+            # Leave the parts pending; they are retried together with the next batch
+            return {"published": False, "reason": f"new training rows must include every class {list(model.classes_)}",
+                    "pending_rows": len(df)}
+
+        accuracy_before = float(accuracy_score(y_test, model.predict(X_test))) if len(X_test) else None
+        rows_seen = self.rows_seen(state, model)
+        trees_before = len(model.estimators_)
+        trees_added = int(np.clip(round(trees_before * len(X_train) / rows_seen), 1, self.max_new_trees))
+
+        model.set_params(warm_start=True, n_estimators=trees_before + trees_added)
+        fit_started = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - fit_started
+
+        trees_dropped = max(0, len(model.estimators_) - self.max_trees)
+        if trees_dropped:
+            model.estimators_ = model.estimators_[trees_dropped:]
+            model.n_estimators = len(model.estimators_)
+        model.set_params(warm_start=False)
+
+        accuracy_after = float(accuracy_score(y_test, model.predict(X_test))) if len(X_test) else None
+        reference_accuracy = None
+        if self.reference_file and os.path.exists(self.reference_file):
+            reference = read_records(self.reference_file)
+            X_ref, y_ref = self.features(reference[reference["FoodType"].isin(encoder.classes_)], model, encoder)
+            reference_accuracy = float(accuracy_score(y_ref, model.predict(X_ref)))
+
+        if len(X_test):
+            # The new trees never saw these rows, nor did the old ones
+            write_holdout(df[known].loc[X_test.index], os.path.join(self.model_dir, HOLDOUT), append=True)
+        self.publish(model)
+        state = {"trained_parts": state["trained_parts"] + parts, "rows_seen": rows_seen + len(X_train)}
+        self.save_state(state)
+
+        wall_seconds = time.perf_counter() - started
+        record = {
+            "published": True,
+            "version": model_version(self.model_dir),
+            "published_at": datetime.now(timezone.utc).isoformat(),
+            "parts": len(parts),
+            "new_rows": len(df),
+            "train_rows": len(X_train),
+            "test_rows": len(X_test),
+            "rows_seen": state["rows_seen"],
+            "trees_added": trees_added,
+            "trees_dropped": trees_dropped,
+            "total_trees": len(model.estimators_),
+            "fit_seconds": round(fit_seconds, 3),
+            "wall_seconds": round(wall_seconds, 3),
+            "fit_ms_per_1k_rows": round(fit_seconds * 1e6 / max(len(X_train), 1), 2),
+            "accuracy_before": accuracy_before,
+            "accuracy_after": accuracy_after,
+            "reference_accuracy": reference_accuracy
+        }
+        with open(os.path.join(self.model_dir, TRAINING_LOG), "a") as f:
+            f.write(json.dumps(record) + "\n")
+        return record
+
+    def publish(self, model):
+        """Write the model files the API's registry watches (MODEL_WATCH_SECONDS)"""
+        # Flat bundle first: its meta.json and the pickle both change the
+        # registry fingerprint, and the pickle is the default format
+        FlatForest.from_sklearn(model).save(os.path.join(self.model_dir, "feeding_model_flat"))
+        path = os.path.join(self.model_dir, "feeding_model.pkl")
+        joblib.dump(model, f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental training for the feeding model")
+    parser.add_argument("--store", default="data/feedings", help="Record store directory")
+    parser.add_argument("--model-dir", default="model")
+    commands = parser.add_subparsers(dest="command", required=True)
+    append = commands.add_parser("append", help="Add labelled records (.xlsx, .csv or .parquet) to the store")
+    append.add_argument("path")
+    update = commands.add_parser("update", help="Grow the forest on records not trained on yet")
+    update.add_argument("--max-trees", type=int, default=500)
+    update.add_argument("--max-new-trees", type=int, default=50)
+    update.add_argument("--reference", default="data/baby_feeding_data_2000.xlsx",
+                        help="Labelled file scored after each update to catch forgetting")
+    args = parser.parse_args()
+
+    store = RecordStore(args.store)
+    if args.command == "append":
+        df = read_records(args.path)
+        print(f"Stored {len(df)} records as {store.append(df)}.")
+    else:
+        trainer = IncrementalTrainer(store, args.model_dir, args.max_trees, args.max_new_trees,
+                                     reference_file=args.reference)
+        print(json.dumps(trainer.update(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
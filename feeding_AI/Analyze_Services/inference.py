@@ -0,0 +1,91 @@
+# inference.py - Bounded executor that keeps model inference off the event loop
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+
+class ExecutorSaturated(Exception):
+    """Raised when the inference queue is full"""
+
+
+def _timed_call(fn, args):
+    """Run fn in the worker and report when it actually started"""
+    started_at = time.time()
+    return started_at, fn(*args)
+
+
+class InferenceExecutor:
+    def __init__(self, kind="thread", max_workers=4, max_queue_depth=64):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.max_queue_depth = max(0, max_queue_depth)
+        self.pool = None
+        self.inflight = 0
+        self.rejected = 0
+        self.completed = 0
+
+    def start(self):
+        """Create the worker pool"""
+        if self.pool is None:
+            if self.kind == "process":
+                self.pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self.pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                               thread_name_prefix="inference")
+            print(f"Inference executor started ({self.kind}, {self.max_workers} workers, "
+                  f"queue depth {self.max_queue_depth}).")
+
+    def recycle(self):
+        """Replace process workers so they pick up newly activated models.
+
+        Thread workers share the predictor and need nothing. Tasks already
+        running on the old processes still complete.
+        """
+        if self.kind == "process" and self.pool is not None:
+            old, self.pool = self.pool, None
+            old.shutdown(wait=False)
+            self.start()
+
+    def shutdown(self):
+        """Stop the worker pool, letting running tasks finish"""
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+            self.pool = None
+
+    @property
+    def queued(self):
+        return max(0, self.inflight - self.max_workers)
+
+    async def run(self, fn, *args):
+        """Run fn(*args) on the pool; returns (result, queue_wait_ms).
+
+        For process pools fn must be a picklable module-level function.
+        """
+        if self.pool is None:
+            self.start()
+        if self.inflight >= self.max_workers + self.max_queue_depth:
+            self.rejected += 1
+            raise ExecutorSaturated(f"Inference queue full ({self.queued} waiting)")
+
+        self.inflight += 1
+        submitted_at = time.time()
+        try:
+            loop = asyncio.get_running_loop()
+            started_at, result = await loop.run_in_executor(self.pool, _timed_call, fn, args)
+        finally:
+            self.inflight -= 1
+        self.completed += 1
+        return result, max(0.0, (started_at - submitted_at) * 1000)
+
+    def stats(self):
+        return {
+            "kind": self.kind,
+            "workers": self.max_workers,
+            "max_queue_depth": self.max_queue_depth,
+            "inflight": self.inflight,
+            "queued": self.queued,
+            "completed": self.completed,
+            "rejected": self.rejected
+        }
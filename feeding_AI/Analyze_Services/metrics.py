@@ -0,0 +1,203 @@
+# metrics.py - Prometheus text-format metrics for the API, without extra dependencies
+import threading
+import time
+
+from batching import Histogram
+
+# Latency buckets in seconds: sub-millisecond stages up to slow batch requests
+LATENCY_BUCKETS = [0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
+
+EXPOSITION_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self.lock:
+            self.values[labelvalues] = self.values.get(labelvalues, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labelvalues, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labelvalues)} {value}")
+        return lines
+
+
+class LabeledHistogram:
+    """One batching.Histogram per label combination"""
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = buckets
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        with self.lock:
+            histogram = self.series.get(labelvalues)
+            if histogram is None:
+                histogram = self.series[labelvalues] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labelvalues, histogram in sorted(self.series.items()):
+            lines.extend(render_histogram(self.name, histogram, self.labelnames, labelvalues))
+        return lines
+
+
+def render_histogram(name, histogram, labelnames=(), labelvalues=()):
+    """Exposition lines for one batching.Histogram"""
+    lines = []
+    cumulative = 0
+    for bound, count in zip(histogram.buckets + ["+Inf"], histogram.counts):
+        cumulative += count
+        labels = _labels(labelnames + ("le",), labelvalues + (bound,))
+        lines.append(f"{name}_bucket{labels} {cumulative}")
+    labels = _labels(labelnames, labelvalues)
+    lines.append(f"{name}_sum{labels} {histogram.sum}")
+    lines.append(f"{name}_count{labels} {histogram.total}")
+    return lines
+
+
+class MetricsRegistry:
+    """Metrics updated in place plus collectors that read state at scrape time.
+
+    A collector is a callable returning exposition lines; use it for values
+    other components already track (cache and executor stats, model
+    version) so they are not counted twice. With enabled False, observe()
+    calls still work but the hot paths skip their timing entirely.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.metrics = []
+        self.collectors = []
+
+    def counter(self, name, help, labelnames=()):
+        metric = Counter(name, help, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = LabeledHistogram(name, help, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def collector(self, fn):
+        self.collectors.append(fn)
+        return fn
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collect in self.collectors:
+            try:
+                lines.extend(collect())
+            except Exception as e:
+                print(f"Warning: metrics collector {collect.__name__} failed: {e}")
+        return "\n".join(lines) + "\n"
+
+
+def gauge(name, help, value, labelnames=(), labelvalues=()):
+    """Exposition lines for one gauge sample, for collectors"""
+    return [f"# HELP {name} {help}", f"# TYPE {name} gauge",
+            f"{name}{_labels(labelnames, labelvalues)} {value}"]
+
+
+class StageTimer:
+    """Accumulates per-stage seconds for one scoring call, then records them.
+
+        timer = StageTimer(registry, histogram)
+        ...work...
+        timer.lap("features")
+
+    Each lap() charges the time since the previous lap (or creation) to a
+    stage. Nothing is timed when the registry is disabled.
+    """
+
+    __slots__ = ("histogram", "last", "stages")
+
+    def __init__(self, registry, histogram):
+        self.histogram = histogram if registry.enabled else None
+        self.last = time.perf_counter() if self.histogram else 0.0
+        self.stages = {}
+
+    def lap(self, stage):
+        if self.histogram is None:
+            return
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self.last
+        self.last = now
+
+    def skip(self):
+        """Restart the clock without charging the elapsed time to any stage"""
+        if self.histogram is not None:
+            self.last = time.perf_counter()
+
+    def record(self):
+        if self.histogram is None:
+            return
+        for stage, seconds in self.stages.items():
+            self.histogram.observe(seconds, stage)
+
+
+class MetricsMiddleware:
+    """ASGI middleware counting HTTP requests and their latency per route.
+
+    Routes are labelled by their path template (/babies/{baby_id}), so the
+    number of series stays bounded; paths that match no route share one
+    label. Responses get a Server-Timing header ("app;dur=<ms>") with the
+    time until the response started, so clients can tell server time from
+    network time. WebSocket and lifespan traffic passes through untouched.
+    """
+
+    def __init__(self, app, registry, requests, latency):
+        self.app = app
+        self.registry = registry
+        self.requests = requests
+        self.latency = latency
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.registry.enabled:
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                timing = f"app;dur={(time.perf_counter() - started) * 1000:.2f}".encode()
+                message = {**message, "headers": [*message.get("headers", ()), (b"server-timing", timing)]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            self.latency.observe(time.perf_counter() - started, method, path)
+            self.requests.inc(method, path, str(status[0]))
@@ -0,0 +1,201 @@
+# profiling.py - On-demand sampling and cProfile sessions for a live worker
+import cProfile
+import io
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+# Leaf frames of threads that are parked, not working: dropped from samples
+# unless include_idle is set, so the dump shows where work happens
+IDLE_FRAMES = {
+    ("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"), ("selectors.py", "select"), ("thread.py", "_worker"),
+}
+
+
+def frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class ProfileSession:
+    """One profiling run, ended by time (seconds) or request count.
+
+    "sample" mode runs a background thread that snapshots every thread's
+    stack each interval_ms and counts collapsed stacks (the input format of
+    flamegraph.pl and speedscope). "cprofile" mode profiles the scoring
+    calls run through Profiler.run, with one cProfile.Profile per inference
+    thread, merged into one pstats file at the end.
+    """
+
+    def __init__(self, mode, seconds, max_requests=None, interval_ms=5.0, include_idle=False):
+        self.mode = mode
+        self.seconds = seconds
+        self.max_requests = max_requests
+        self.interval = interval_ms / 1000
+        self.include_idle = include_idle
+        self.started_at = time.perf_counter()
+        self.ended_at = None
+        self.requests = 0
+        self.samples = 0
+        self.skipped_calls = 0
+        self.stacks = Counter()
+        self.profiles = {}  # thread id -> cProfile.Profile
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.sampler = None
+        if mode == "sample":
+            self.sampler = threading.Thread(target=self.sample_loop, name="profiler", daemon=True)
+            self.sampler.start()
+
+    def sample_loop(self):
+        me = threading.get_ident()
+        while not self.stop_event.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                code = frame.f_code
+                if not self.include_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def run(self, fn, *args):
+        """Call fn(*args) under this thread's cProfile.Profile"""
+        ident = threading.get_ident()
+        with self.lock:
+            profile = self.profiles.get(ident)
+            if profile is None:
+                profile = self.profiles[ident] = cProfile.Profile()
+        try:
+            return profile.runcall(fn, *args)
+        except ValueError as e:
+            # Python 3.12+ allows one active profiler per process; run unprofiled
+            if "profiling tool" not in str(e):
+                raise
+            self.skipped_calls += 1
+            return fn(*args)
+
+    def request_done(self):
+        with self.lock:
+            self.requests += 1
+
+    def finished(self):
+        if self.ended_at is not None:
+            return True
+        if time.perf_counter() - self.started_at >= self.seconds:
+            return True
+        return self.max_requests is not None and self.requests >= self.max_requests
+
+    def stop(self):
+        if self.ended_at is None:
+            self.ended_at = time.perf_counter()
+            self.stop_event.set()
+            if self.sampler is not None:
+                self.sampler.join()
+
+    def summary(self):
+        return {
+            "mode": self.mode,
+            "seconds": round((self.ended_at or time.perf_counter()) - self.started_at, 3),
+            "requests": self.requests,
+            "samples": self.samples,
+            "stacks": len(self.stacks),
+            "profiled_threads": len(self.profiles),
+            "skipped_calls": self.skipped_calls,
+        }
+
+    def collapsed(self):
+        """'frame;frame;frame count' lines, hottest first"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def pstats_bytes(self):
+        """Merged cProfile data as a marshalled pstats file (pstats.Stats can load it)"""
+        stats = self.stats()
+        if stats is None:
+            return b""
+        fd, path = tempfile.mkstemp(suffix=".pstats")
+        os.close(fd)
+        try:
+            stats.dump_stats(path)
+            with open(path, "rb") as f:
+                return f.read()
+        finally:
+            os.remove(path)
+
+    def text(self, limit=40):
+        """Top functions by cumulative time, as pstats prints them"""
+        out = io.StringIO()
+        stats = self.stats(stream=out)
+        if stats is None:
+            return "No profiled calls.\n"
+        stats.sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+
+    def stats(self, stream=None):
+        profiles = [p for p in self.profiles.values() if p.getstats()]
+        if not profiles:
+            return None
+        return pstats.Stats(*profiles, stream=stream)
+
+
+class Profiler:
+    """At most one ProfileSession at a time; free when none is running.
+
+    Scoring functions go through run() and the middleware counts
+    requests; while no session exists each costs one attribute read.
+    """
+
+    def __init__(self):
+        self.session = None
+
+    def start(self, mode="sample", seconds=10.0, max_requests=None, interval_ms=5.0, include_idle=False):
+        if mode not in ("sample", "cprofile"):
+            raise ValueError(f"Unknown profiling mode: {mode}")
+        if self.session is not None:
+            raise RuntimeError("A profiling session is already running")
+        self.session = ProfileSession(mode, seconds, max_requests, interval_ms, include_idle)
+        return self.session
+
+    def finish(self):
+        session, self.session = self.session, None
+        if session is not None:
+            session.stop()
+        return session
+
+    def run(self, fn, *args):
+        session = self.session
+        if session is None or session.mode != "cprofile":
+            return fn(*args)
+        return session.run(fn, *args)
+
+
+class ProfilingMiddleware:
+    """Counts requests finished during a session, for "next N requests" runs.
+
+    Admin calls and monitoring scrapes are not counted.
+    """
+
+    def __init__(self, app, profiler, exclude_prefixes=("/admin/", "/metrics", "/health")):
+        self.app = app
+        self.profiler = profiler
+        self.exclude_prefixes = tuple(exclude_prefixes)
+
+    async def __call__(self, scope, receive, send):
+        session = self.profiler.session
+        if session is None or scope["type"] != "http" or scope["path"].startswith(self.exclude_prefixes):
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            session.request_done()
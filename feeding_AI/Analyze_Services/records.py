@@ -0,0 +1,209 @@
+# records.py - Partitioned Parquet store of labelled feeding records
+#
+# The Excel workbook is converted once (python records.py convert) and all
+# training reads go through RecordStore: explicit compact dtypes, one
+# immutable part file per append, and filtered, column-projected reads
+# that only decode the row groups and columns a caller asks for.
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Columns every stored record needs for training the feeding model
+REQUIRED_COLUMNS = [
+    "BabyAgeMonths", "FoodType", "FoodQuantityML", "FoodTempCelsius",
+    "RoomTempCelsius", "TimeSinceLastFeedingMin", "SuitableFood"
+]
+
+# Storage type of every known column; other columns are stored as inferred
+COLUMN_TYPES = {
+    "BabyID": pa.int32(),
+    "BabyAgeMonths": pa.int16(),
+    "BabyWeightKg": pa.float32(),
+    "BabyHeightCm": pa.float32(),
+    "FoodItem": pa.dictionary(pa.int16(), pa.string()),
+    "FoodType": pa.dictionary(pa.int16(), pa.string()),
+    "FoodQuantityML": pa.int16(),
+    "FoodTempCelsius": pa.float32(),
+    "RoomTempCelsius": pa.float32(),
+    "LastFeedingTime": pa.string(),
+    "CurrentTime": pa.string(),
+    "BabyCriedAfterFeed": pa.dictionary(pa.int16(), pa.string()),
+    "SuitableFood": pa.dictionary(pa.int16(), pa.string()),
+    "SafeTemperature": pa.dictionary(pa.int16(), pa.string()),
+    "TimeSinceLastFeedingMin": pa.int16(),
+}
+
+# Hive-style partition directory, e.g. date=2026-10-18
+PARTITION_KEY = "date"
+
+
+def to_table(df):
+    """Arrow table of df with every known column cast to its storage type"""
+    table = pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+    for i, name in enumerate(table.column_names):
+        if name in COLUMN_TYPES and table.schema.field(name).type != COLUMN_TYPES[name]:
+            column = table.column(i)
+            if pa.types.is_dictionary(COLUMN_TYPES[name]) and not pa.types.is_dictionary(column.type):
+                column = column.cast(pa.string()).dictionary_encode()
+            table = table.set_column(i, pa.field(name, COLUMN_TYPES[name]), column.cast(COLUMN_TYPES[name]))
+    return table
+
+
+class RecordStore:
+    """Labelled feeding records kept as immutable Parquet part files.
+
+    Parts live under root/date=YYYY-MM-DD/ and are named by write time, so
+    sorting the relative paths gives append order. Every append writes one
+    new part, so a trainer can tell which records it has already consumed
+    by part name, and readers never see a half-written file (parts are
+    written under a temporary name first).
+    """
+
+    def __init__(self, root="data/feedings"):
+        self.root = root
+
+    def append(self, df, partition=None):
+        """Store a DataFrame of new records as one part; returns its relative path"""
+        missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+        if missing:
+            raise ValueError(f"Records are missing columns {missing}")
+        if df.empty:
+            return None
+        partition = partition or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        directory = os.path.join(self.root, f"{PARTITION_KEY}={partition}")
+        os.makedirs(directory, exist_ok=True)
+        name = f"part-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.parquet"
+        path = os.path.join(directory, name)
+        pq.write_table(to_table(df), f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+        return f"{PARTITION_KEY}={partition}/{name}"
+
+    def parts(self):
+        if not os.path.isdir(self.root):
+            return []
+        parts = []
+        for directory in os.listdir(self.root):
+            if directory.startswith(f"{PARTITION_KEY}=") and os.path.isdir(os.path.join(self.root, directory)):
+                parts.extend(f"{directory}/{name}" for name in os.listdir(os.path.join(self.root, directory))
+                             if name.endswith(".parquet"))
+        return sorted(parts)
+
+    def dataset(self, parts=None):
+        """pyarrow Dataset over the given parts (default: all)"""
+        files = [os.path.join(self.root, part) for part in (self.parts() if parts is None else parts)]
+        if not files:
+            return None
+        # Parts written by different versions may add columns; the union covers them all
+        schema = pa.unify_schemas([pq.read_schema(f) for f in files] +
+                                  [pa.schema([(PARTITION_KEY, pa.string())])])
+        return ds.dataset(files, schema=schema, format="parquet",
+                          partitioning=ds.partitioning(pa.schema([(PARTITION_KEY, pa.string())]), flavor="hive"),
+                          partition_base_dir=self.root)
+
+    def read(self, parts=None, columns=None, filters=None):
+        """Concatenate parts (default: all) into one DataFrame.
+
+        columns limits which columns are decoded. filters are
+        (column, op, value) tuples, ANDed together, e.g.
+        [("BabyAgeMonths", ">=", 6), ("date", ">=", "2026-10-01")];
+        row groups whose statistics rule them out are skipped.
+        """
+        dataset = self.dataset(parts)
+        if dataset is None:
+            return pd.DataFrame(columns=columns or REQUIRED_COLUMNS)
+        expression = pq.filters_to_expression(filters) if filters else None
+        return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+    def count(self):
+        dataset = self.dataset()
+        return 0 if dataset is None else dataset.count_rows()
+
+
+def read_records(path, columns=None, filters=None):
+    """Load labelled records from a RecordStore directory, .parquet, .feather, .csv or .xlsx"""
+    if os.path.isdir(path):
+        return RecordStore(path).read(columns=columns, filters=filters)
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path, columns=columns, filters=filters)
+    if path.endswith(".feather"):
+        df = pd.read_feather(path, columns=columns)
+    elif path.endswith(".xlsx"):
+        df = pd.read_excel(path, usecols=columns)
+    else:
+        df = pd.read_csv(path, usecols=columns)
+    if filters:
+        expression = pq.filters_to_expression(filters)
+        df = ds.dataset(pa.Table.from_pandas(df, preserve_index=False)).to_table(filter=expression).to_pandas()
+    return df
+
+
+def write_holdout(df, path, append=False):
+    """Save the labelled rows a model version was not trained on, for the API's reload gate.
+
+    With append the rows are added to those already in path, e.g. the
+    test split of an incremental update.
+    """
+    rows = df[REQUIRED_COLUMNS]
+    if append and os.path.exists(path):
+        rows = pd.concat([read_records(path, columns=REQUIRED_COLUMNS), rows], ignore_index=True)
+    pq.write_table(to_table(rows), f"{path}.tmp")
+    os.replace(f"{path}.tmp", path)
+    return len(rows)
+
+
+def iter_record_chunks(path, chunk_size=10_000, columns=None):
+    """Yield DataFrames of at most chunk_size rows from a RecordStore directory, .parquet, .csv or .xlsx.
+
+    Only one chunk is decoded at a time, so memory does not grow with
+    the file: Parquet and store directories by record batch, CSV through
+    pandas' chunked reader and Excel through openpyxl's read-only mode.
+    Names in columns that the file does not have are skipped.
+    """
+    if os.path.isdir(path) or path.endswith(".parquet"):
+        source = RecordStore(path).dataset() if os.path.isdir(path) else pq.ParquetFile(path)
+        if source is None:
+            return
+        names = source.schema.names if os.path.isdir(path) else source.schema_arrow.names
+        present = None if columns is None else [name for name in names if name in columns]
+        if os.path.isdir(path):
+            batches = source.to_batches(columns=present, batch_size=chunk_size)
+        else:
+            batches = source.iter_batches(batch_size=chunk_size, columns=present)
+        for batch in batches:
+            yield batch.to_pandas()
+    elif path.endswith(".xlsx"):
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = [str(name) for name in next(rows, ())]
+            keep = [i for i, name in enumerate(header) if columns is None or name in columns]
+            chunk = []
+            for row in rows:
+                chunk.append([row[i] if i < len(row) else None for i in keep])
+                if len(chunk) == chunk_size:
+                    yield pd.DataFrame(chunk, columns=[header[i] for i in keep])
+                    chunk = []
+            if chunk:
+                yield pd.DataFrame(chunk, columns=[header[i] for i in keep])
+        finally:
+            workbook.close()
+    else:
+        usecols = None if columns is None else (lambda name: name in columns)
+        yield from pd.read_csv(path, usecols=usecols, chunksize=chunk_size)
+
+
+if __name__ == "__main__":
+    # One-off conversion: python records.py convert data/baby_feeding_data_2000.xlsx data/feedings
+    command, source, target = sys.argv[1], sys.argv[2], sys.argv[3]
+    if command != "convert":
+        raise SystemExit(f"Unknown command: {command}")
+    df = read_records(source)
+    print(f"Stored {len(df)} records from {source} as {target}/{RecordStore(target).append(df)}.")
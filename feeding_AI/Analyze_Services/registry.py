@@ -0,0 +1,190 @@
+# registry.py - Versioned model bundles and hot reload for the feeding API
+import asyncio
+import hashlib
+import os
+import time
+from datetime import datetime, timezone
+
+MODEL_FILES = ("feeding_model.pkl", "food_type_encoder.pkl", "feeding_model_flat/meta.json",
+               "feeding_model_compressed/meta.json", "cry_model.pkl")
+
+
+class ModelBundle:
+    """Everything one prediction needs from a model version.
+
+    The predictor swaps whole bundles, and each request reads the bundle
+    reference once, so a request never mixes a new model with an old
+    encoder and in-flight requests finish on the version they started on.
+    """
+
+    def __init__(self, feeding_model=None, feeding_scorer=None, food_encoder=None,
+                 feature_index=None, version=None, load_seconds=0.0):
+        self.feeding_model = feeding_model
+        self.feeding_scorer = feeding_scorer
+        self.food_encoder = food_encoder
+        self.feature_index = feature_index
+        self.food_types = None  # FoodTypeTable built from food_encoder by the predictor
+        # Optional second model, scored on the same rows as the feeding model
+        self.cry_model = None
+        self.cry_scorer = None
+        self.cry_feature_index = None
+        self.version = version
+        self.load_seconds = load_seconds
+        self.loaded_at = datetime.now(timezone.utc).isoformat()
+        self.holdout_accuracy = None
+
+
+def model_fingerprint(model_dir="model"):
+    """Cheap change detector: (name, mtime, size) of the model files"""
+    fingerprint = []
+    for name in MODEL_FILES:
+        path = os.path.join(model_dir, name)
+        if os.path.exists(path):
+            stat = os.stat(path)
+            fingerprint.append((name, stat.st_mtime_ns, stat.st_size))
+    return tuple(fingerprint)
+
+
+def model_version(model_dir="model"):
+    """Content hash of the model files, used as the reported version"""
+    digest = hashlib.sha1()
+    for name in MODEL_FILES:
+        path = os.path.join(model_dir, name)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+class ModelRegistry:
+    """Loads, validates and activates new model versions in the background.
+
+    predictor must provide load_bundle(model_dir) and activate(bundle).
+    validate(bundle) returns the holdout accuracy, or None when there is
+    no holdout to score; candidates scoring below min_accuracy are
+    rejected and the active version keeps serving.
+    """
+
+    def __init__(self, predictor, model_dir="model", validate=None, min_accuracy=0.0,
+                 poll_seconds=0.0, on_activate=None):
+        self.predictor = predictor
+        self.model_dir = model_dir
+        self.validate = validate
+        self.min_accuracy = min_accuracy
+        self.poll_seconds = poll_seconds
+        self.on_activate = on_activate
+        self.lock = asyncio.Lock()
+        self.fingerprint = model_fingerprint(model_dir)
+        self.watch_task = None
+        self.warmup_task = None
+        self.ready_seconds = None  # time taken to load the first version
+        self.reloads = 0
+        self.last_error = None
+
+    def load_and_validate(self):
+        """Build a candidate bundle and score it on the holdout (runs in a thread)"""
+        bundle = self.predictor.load_bundle(self.model_dir)
+        if bundle.feeding_scorer is None:
+            raise ValueError("Candidate has no usable feeding model")
+        if self.validate is not None:
+            bundle.holdout_accuracy = self.validate(bundle)
+            if bundle.holdout_accuracy is not None and bundle.holdout_accuracy < self.min_accuracy:
+                raise ValueError(f"Holdout accuracy {bundle.holdout_accuracy:.3f} "
+                                 f"below minimum {self.min_accuracy:.3f}")
+        return bundle
+
+    async def reload(self, force=False):
+        """Load the files in model_dir and swap them in if they pass validation"""
+        async with self.lock:
+            fingerprint = model_fingerprint(self.model_dir)
+            active = self.predictor.models
+            if not force and fingerprint == self.fingerprint and active.feeding_scorer is not None:
+                return {"reloaded": False, "version": active.version, "reason": "unchanged"}
+            try:
+                bundle = await asyncio.to_thread(self.load_and_validate)
+            except Exception as e:
+                # Remember the rejected files so the watcher does not retry them every poll
+                self.fingerprint = fingerprint
+                self.last_error = str(e)
+                print(f"Model reload rejected: {e}")
+                return {"reloaded": False, "version": active.version, "reason": str(e)}
+
+            self.fingerprint = fingerprint
+            self.predictor.activate(bundle)
+            self.reloads += 1
+            self.last_error = None
+            if self.on_activate is not None:
+                self.on_activate()
+            print(f"Model version {bundle.version} activated "
+                  f"(load {bundle.load_seconds:.2f}s, holdout accuracy {bundle.holdout_accuracy}).")
+            return {"reloaded": True, "version": bundle.version,
+                    "holdout_accuracy": bundle.holdout_accuracy}
+
+    async def warm_up(self, background=False):
+        """Load the first version, then start watching.
+
+        With background=True this returns at once and the load runs on a
+        thread, so the server answers (warming) while models are read.
+        """
+        async def run():
+            started = time.perf_counter()
+            await asyncio.to_thread(self.predictor.load_models)
+            self.ready_seconds = time.perf_counter() - started
+            self.start()
+        if background:
+            self.warmup_task = asyncio.get_running_loop().create_task(run())
+        else:
+            await run()
+
+    @property
+    def warming(self):
+        return self.warmup_task is not None and not self.warmup_task.done()
+
+    async def wait_ready(self, timeout):
+        """True once the first version is loaded, False if timeout passed first"""
+        if not self.warming:
+            return True
+        try:
+            await asyncio.wait_for(asyncio.shield(self.warmup_task), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def watch(self):
+        """Poll the model files and reload when they change"""
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            if model_fingerprint(self.model_dir) != self.fingerprint:
+                # Give a writer a moment to finish before reading the files
+                await asyncio.sleep(1.0)
+                await self.reload()
+
+    def start(self):
+        if self.poll_seconds > 0 and self.watch_task is None:
+            self.watch_task = asyncio.get_running_loop().create_task(self.watch())
+
+    async def stop(self):
+        if self.warmup_task is not None and not self.warmup_task.done():
+            await self.warmup_task
+        if self.watch_task is not None:
+            self.watch_task.cancel()
+            try:
+                await self.watch_task
+            except asyncio.CancelledError:
+                pass
+            self.watch_task = None
+
+    def status(self):
+        active = self.predictor.models
+        return {
+            "version": active.version,
+            "loaded_at": active.loaded_at,
+            "load_seconds": round(active.load_seconds, 3),
+            "holdout_accuracy": active.holdout_accuracy,
+            "warming": self.warming,
+            "ready_seconds": None if self.ready_seconds is None else round(self.ready_seconds, 3),
+            "reloads": self.reloads,
+            "watching": self.watch_task is not None,
+            "last_error": self.last_error
+        }
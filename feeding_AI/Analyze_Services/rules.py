@@ -0,0 +1,262 @@
+# rules.py - Declarative feeding rules evaluated over whole columns at once
+#
+# The same tables serve single requests (columns of length 1), batches and
+# offline backfills over a DataFrame. Conditions are computed with NumPy;
+# only the final per-row lists and dicts are assembled in Python.
+import numpy as np
+
+# Expected quantity by age band: (age below, ml per kg, fixed ml)
+EXPECTED_QUANTITY = [
+    (1, 150, None),
+    (3, 120, None),
+    (6, 100, None),
+    (np.inf, None, 200),  # solids becoming primary
+]
+
+# Expected minutes between feeds by age band: (age below, minutes)
+EXPECTED_INTERVAL = [(3, 120), (6, 180), (np.inf, 240)]
+RULE_SCORE_INTERVAL = [(6, 180), (np.inf, 240)]
+
+QUANTITY_BAND = (0.7, 1.3)     # fraction of expected quantity
+INTERVAL_DUE_FRACTION = 0.8    # of expected interval
+FOOD_TEMP_IDEAL = (35, 40)
+FOOD_TEMP_ACCEPTABLE = (30, 45)
+ROOM_TEMP_COMFORTABLE = (20, 25)
+ROOM_TEMP_ACCEPTABLE = (18, 28)
+ROOM_TEMP_WARM = 26
+
+# Named conditions: (column, operator, threshold column or constant)
+CONDITIONS = {
+    "hungry": ("interval", ">", "expected_interval"),
+    "food_cold": ("food_temp", "<", FOOD_TEMP_IDEAL[0]),
+    "food_hot": ("food_temp", ">", FOOD_TEMP_IDEAL[1]),
+    "room_cold": ("room_temp", "<", ROOM_TEMP_COMFORTABLE[0]),
+    "room_warm": ("room_temp", ">", ROOM_TEMP_WARM),
+    "quantity_low": ("quantity", "<", "quantity_low"),
+    "unsuitable": ("prediction", "==", False),
+    "crying": ("crying", "==", True),
+}
+
+# Ordered rule tables: (condition, message template)
+CRY_REASON_RULES = [
+    ("hungry", "Baby may be hungry (last fed {interval} minutes ago)"),
+    ("food_cold", "Food may be too cold for comfort"),
+    ("food_hot", "Food may be too hot - check temperature"),
+    ("room_cold", "Room may be too cold"),
+    ("room_warm", "Room may be too warm"),
+    ("quantity_low", "Food quantity may be insufficient (expected ~{expected_quantity:.0f}ml)"),
+]
+CRY_REASON_FALLBACK = [
+    "May need diaper change",
+    "Could need burping",
+    "Might be tired or overstimulated",
+    "May want comfort or attention",
+]
+
+RECOMMENDATION_RULES = [
+    ("unsuitable", "Consider adjusting feeding conditions before proceeding"),
+    ("food_cold", "Warm food to 37°C (body temperature)"),
+    ("food_hot", "Cool food to safe temperature (37-40°C)"),
+    ("room_cold", "Increase room temperature to 20-25°C"),
+    ("room_warm", "Cool room temperature to 20-25°C"),
+    ("crying", "Try comforting baby before feeding"),
+    ("crying", "Check diaper and burp if needed"),
+]
+RECOMMENDATION_FALLBACK = ["Feeding conditions look good - proceed with confidence"]
+
+# Rule-based suitability score: (column, (low, high), points) - first matching band wins
+SCORE_BANDS = [
+    ("food_temp", [(FOOD_TEMP_IDEAL, 2), (FOOD_TEMP_ACCEPTABLE, 1)]),
+    ("room_temp", [(ROOM_TEMP_COMFORTABLE, 2), (ROOM_TEMP_ACCEPTABLE, 1)]),
+]
+SCORE_SUITABLE = 4
+SCORE_MAX = 8.0
+
+_OPERATORS = {
+    "<": np.less,
+    ">": np.greater,
+    "==": np.equal,
+}
+
+
+def by_age(age, bands):
+    """Look up a per-age-band value: bands are (age below, value)"""
+    return np.select([age < limit for limit, _ in bands], [value for _, value in bands])
+
+
+def expected_quantity(age, weight):
+    age = np.asarray(age)
+    weight = np.asarray(weight, dtype=np.float64)
+    choices = [weight * per_kg if per_kg is not None else np.full(weight.shape, float(fixed))
+               for _, per_kg, fixed in EXPECTED_QUANTITY]
+    return np.select([age < limit for limit, _, _ in EXPECTED_QUANTITY], choices)
+
+
+def in_band(values, band):
+    return (values >= band[0]) & (values <= band[1])
+
+
+def request_columns(requests, weights, heights, predictions=None):
+    """Columns for FeedingRequests plus the weight/height actually used for them"""
+    fields = list(zip(*[(
+        r.baby_age_months,
+        r.baby_weight_kg or 6,  # rule_based_prediction ignores estimates and defaults to 6 kg
+        r.food_quantity_ml,
+        r.food_temp_celsius,
+        r.room_temp_celsius,
+        r.time_since_last_feeding_min,
+        bool(r.baby_crying)
+    ) for r in requests])) or [()] * 7
+    age, score_weight, quantity, food_temp, room_temp, interval, crying = fields
+    return {
+        "age": np.array(age, dtype=np.int64),
+        "weight": np.asarray(weights, dtype=np.float64),
+        "height": np.asarray(heights, dtype=np.float64),
+        "score_weight": np.array(score_weight, dtype=np.float64),
+        "quantity": np.array(quantity, dtype=np.int64),
+        "food_temp": np.array(food_temp, dtype=np.float64),
+        "room_temp": np.array(room_temp, dtype=np.float64),
+        "interval": np.array(interval, dtype=np.int64),
+        "crying": np.array(crying, dtype=bool),
+        "prediction": np.array(predictions if predictions is not None else [True] * len(requests), dtype=bool),
+    }
+
+
+def frame_columns(df, predictions=None, crying=None):
+    """Columns for a training-style DataFrame (BabyAgeMonths, FoodTempCelsius, ...)"""
+    age = df["BabyAgeMonths"].to_numpy()
+    # Same WHO approximation as BabyFeedingPredictor.estimate_baby_metrics
+    est_weight = np.where(age <= 12, 3.5 + age * 0.6, 3.5 + 12 * 0.6 + (age - 12) * 0.3)
+    est_height = np.where(age <= 12, 50 + age * 2.5, 50 + 12 * 2.5 + (age - 12) * 1.2)
+    if "BabyWeightKg" in df:
+        weight = df["BabyWeightKg"].to_numpy(dtype=np.float64)
+        score_weight = weight
+    else:
+        weight = est_weight
+        score_weight = np.full(len(df), 6.0)
+    height = df["BabyHeightCm"].to_numpy(dtype=np.float64) if "BabyHeightCm" in df else est_height
+    n = len(df)
+    return {
+        "age": age,
+        "weight": weight,
+        "height": height,
+        "score_weight": score_weight,
+        "quantity": df["FoodQuantityML"].to_numpy(),
+        "food_temp": df["FoodTempCelsius"].to_numpy(dtype=np.float64),
+        "room_temp": df["RoomTempCelsius"].to_numpy(dtype=np.float64),
+        "interval": df["TimeSinceLastFeedingMin"].to_numpy(),
+        "crying": np.asarray(crying if crying is not None else np.zeros(n), dtype=bool),
+        "prediction": np.asarray(predictions if predictions is not None else np.ones(n), dtype=bool),
+    }
+
+
+def derive(columns):
+    """Add expected quantity/interval columns; each is computed once per row"""
+    columns = dict(columns)
+    columns["expected_quantity"] = expected_quantity(columns["age"], columns["weight"])
+    columns["expected_interval"] = by_age(columns["age"], EXPECTED_INTERVAL)
+    columns["quantity_low"] = columns["expected_quantity"] * QUANTITY_BAND[0]
+    columns["quantity_high"] = columns["expected_quantity"] * QUANTITY_BAND[1]
+    return columns
+
+
+def conditions(columns):
+    """Evaluate every named condition as a boolean column"""
+    result = {}
+    for name, (column, op, threshold) in CONDITIONS.items():
+        bound = columns[threshold] if isinstance(threshold, str) else threshold
+        result[name] = _OPERATORS[op](columns[column], bound)
+    return result
+
+
+def _apply_rules(rules, fallback, flags, values, rows):
+    """Collect the messages of every matching rule per row, in table order.
+
+    values holds plain Python lists (interval, expected_quantity) so the
+    per-row formatting does not pay for NumPy scalar access.
+    """
+    messages = {row: [] for row in rows}
+    for condition, template in rules:
+        matched = np.flatnonzero(flags[condition]).tolist()
+        if "{" in template:
+            for row in matched:
+                if row in messages:
+                    messages[row].append(template.format(
+                        interval=values["interval"][row],
+                        expected_quantity=values["expected_quantity"][row]))
+        else:
+            for row in matched:
+                if row in messages:
+                    messages[row].append(template)
+    for m in messages.values():
+        if not m:
+            m.extend(fallback)
+    return messages
+
+
+def rule_based_predictions(columns):
+    """Vectorized rule_based_prediction: (suitable, confidence) arrays"""
+    score = np.zeros(len(columns["age"]), dtype=np.int64)
+    for column, bands in SCORE_BANDS:
+        values = columns[column]
+        points = np.select([in_band(values, band) for band, _ in bands], [p for _, p in bands], 0)
+        score += points
+    due_interval = by_age(columns["age"], RULE_SCORE_INTERVAL)
+    score += np.where(columns["interval"] >= due_interval * INTERVAL_DUE_FRACTION, 2, 0)
+    expected = expected_quantity(columns["age"], columns["score_weight"])
+    quantity = columns["quantity"]
+    score += np.where((QUANTITY_BAND[0] * expected <= quantity) & (quantity <= QUANTITY_BAND[1] * expected), 2, 0)
+    return score >= SCORE_SUITABLE, np.minimum(score / SCORE_MAX, 1.0)
+
+
+def evaluate(columns):
+    """Cry reasons, recommendations and feeding analysis for every row"""
+    columns = derive(columns)
+    flags = conditions(columns)
+    n = len(columns["age"])
+
+    quantity = columns["quantity"]
+    quantity_ok = (columns["quantity_low"] <= quantity) & (quantity <= columns["quantity_high"])
+    interval_ok = columns["interval"] >= columns["expected_interval"] * INTERVAL_DUE_FRACTION
+
+    # Convert once; per-row assembly below works on Python objects only
+    values = {
+        "interval": np.asarray(columns["interval"]).astype(np.int64).tolist(),
+        "expected_quantity": columns["expected_quantity"].tolist(),
+    }
+    crying_rows = np.flatnonzero(flags["crying"]).tolist()
+    cry_by_row = _apply_rules(CRY_REASON_RULES, CRY_REASON_FALLBACK, flags, values, crying_rows)
+    cry_reasons = [cry_by_row.get(row, []) for row in range(n)]
+    recommendations = list(_apply_rules(RECOMMENDATION_RULES, RECOMMENDATION_FALLBACK,
+                                        flags, values, range(n)).values())
+
+    analysis = [{
+        "expected_quantity_ml": expected,
+        "actual_quantity_ml": actual_quantity,
+        "quantity_status": quantity_status,
+        "expected_feeding_interval_min": expected_interval,
+        "actual_interval_min": interval,
+        "interval_status": interval_status,
+        "food_temp_status": food_status,
+        "room_temp_status": room_status,
+        "estimated_weight_kg": round(weight, 1),
+        "estimated_height_cm": round(height, 1)
+    } for (expected, actual_quantity, quantity_status, expected_interval, interval,
+           interval_status, food_status, room_status, weight, height) in zip(
+        # rint rounds half to even exactly like round() on a float
+        np.rint(columns["expected_quantity"]).astype(np.int64).tolist(),
+        np.asarray(quantity).astype(np.int64).tolist(),
+        np.where(quantity_ok, "appropriate", "needs_adjustment").tolist(),
+        np.asarray(columns["expected_interval"]).astype(np.int64).tolist(),
+        values["interval"],
+        np.where(interval_ok, "appropriate", "too_soon").tolist(),
+        np.where(in_band(columns["food_temp"], FOOD_TEMP_IDEAL), "ideal", "needs_adjustment").tolist(),
+        np.where(in_band(columns["room_temp"], ROOM_TEMP_COMFORTABLE), "comfortable", "needs_adjustment").tolist(),
+        np.asarray(columns["weight"], dtype=np.float64).tolist(),
+        np.asarray(columns["height"], dtype=np.float64).tolist())]
+
+    return {
+        "cry_reasons": cry_reasons,
+        "recommendations": recommendations,
+        "feeding_analysis": analysis
+    }
@@ -0,0 +1,212 @@
+# sessions.py - Per-baby profile and feeding state kept by the API
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+DAYS_PER_MONTH = 30.44
+# Oldest age the feeding model covers (FeedingRequest.baby_age_months le=24)
+MAX_AGE_MONTHS = 24
+
+
+class BabySession:
+    """Registered profile plus the state the server tracks for one baby"""
+
+    def __init__(self, baby_id, age_months, weight_kg=None, height_cm=None, food_type=None,
+                 last_feeding_at=None, registered_at=None):
+        self.baby_id = baby_id
+        self.age_months = age_months
+        self.weight_kg = weight_kg
+        self.height_cm = height_cm
+        self.food_type = food_type
+        self.last_feeding_at = last_feeding_at  # epoch seconds
+        self.registered_at = registered_at or time.time()
+        self.last_seen = time.monotonic()
+        self.derived_for_age = None
+        self.derived = {}
+
+    def current_age(self, now=None):
+        """Registered age advanced by the time since registration, capped at MAX_AGE_MONTHS"""
+        elapsed_days = ((now or time.time()) - self.registered_at) / 86400
+        return min(self.age_months + int(elapsed_days / DAYS_PER_MONTH), MAX_AGE_MONTHS)
+
+    def minutes_since_feeding(self, now=None):
+        if self.last_feeding_at is None:
+            return None
+        return max(0, int(((now or time.time()) - self.last_feeding_at) / 60))
+
+    def to_dict(self):
+        return {
+            "baby_id": self.baby_id,
+            "age_months": self.age_months,
+            "weight_kg": self.weight_kg,
+            "height_cm": self.height_cm,
+            "food_type": self.food_type,
+            "last_feeding_at": self.last_feeding_at,
+            "registered_at": self.registered_at
+        }
+
+
+class SessionStore:
+    """Bounded in-memory store of BabySessions with idle eviction.
+
+    At most max_sessions babies are kept (least recently used go first),
+    and sessions untouched for idle_ttl_seconds are dropped by sweep().
+    If persist_path is set the store is loaded from and saved to a JSON
+    file, so registrations survive restarts.
+    """
+
+    def __init__(self, estimate_metrics, max_sessions=10000, idle_ttl_seconds=86400.0,
+                 persist_path=None, sweep_seconds=60.0):
+        self.estimate_metrics = estimate_metrics
+        self.max_sessions = max(1, max_sessions)
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.persist_path = persist_path
+        self.sweep_seconds = sweep_seconds
+        self.sweep_task = None
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.evictions = 0
+        self.expirations = 0
+
+    def _insert(self, session):
+        self.sessions[session.baby_id] = session
+        self.sessions.move_to_end(session.baby_id)
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+            self.evictions += 1
+
+    def register(self, baby_id, age_months, weight_kg=None, height_cm=None, food_type=None,
+                 last_feeding_at=None):
+        """Create or replace a profile; an existing feeding time is kept unless given"""
+        with self.lock:
+            existing = self.sessions.get(baby_id)
+            if last_feeding_at is None and existing is not None:
+                last_feeding_at = existing.last_feeding_at
+            session = BabySession(baby_id, age_months, weight_kg, height_cm, food_type, last_feeding_at)
+            self._insert(session)
+            self.dirty = True
+            return session
+
+    def get(self, baby_id):
+        with self.lock:
+            session = self.sessions.get(baby_id)
+            if session is not None:
+                session.last_seen = time.monotonic()
+                self.sessions.move_to_end(baby_id)
+            return session
+
+    def remove(self, baby_id):
+        with self.lock:
+            self.dirty = True
+            return self.sessions.pop(baby_id, None) is not None
+
+    def record_feeding(self, baby_id, at=None):
+        with self.lock:
+            session = self.sessions.get(baby_id)
+            if session is not None:
+                session.last_feeding_at = at or time.time()
+                self.dirty = True
+            return session
+
+    def derived(self, session):
+        """Weight/height actually used and WeightHeightRatio.
+
+        Computed once per baby and age month, not on every reading. The
+        expected quantity and interval are left to rules.derive, which
+        computes them for a whole batch at once.
+        """
+        age = session.current_age()
+        if session.derived_for_age != age:
+            if session.weight_kg is None or session.height_cm is None:
+                est_weight, est_height = self.estimate_metrics(age)
+                weight = session.weight_kg or est_weight
+                height = session.height_cm or est_height
+            else:
+                weight, height = session.weight_kg, session.height_cm
+            session.derived = {
+                "age_months": age,
+                "weight_kg": weight,
+                "height_cm": height,
+                "weight_height_ratio": weight / (height / 100)
+            }
+            session.derived_for_age = age
+        return session.derived
+
+    def sweep(self):
+        """Drop sessions idle for longer than idle_ttl_seconds"""
+        if not self.idle_ttl_seconds:
+            return 0
+        cutoff = time.monotonic() - self.idle_ttl_seconds
+        with self.lock:
+            idle = [baby_id for baby_id, s in self.sessions.items() if s.last_seen < cutoff]
+            for baby_id in idle:
+                del self.sessions[baby_id]
+            self.expirations += len(idle)
+            if idle:
+                self.dirty = True
+        return len(idle)
+
+    def save(self):
+        """Write all sessions to persist_path (atomically) if anything changed"""
+        if not self.persist_path or not self.dirty:
+            return
+        with self.lock:
+            data = [s.to_dict() for s in self.sessions.values()]
+            self.dirty = False
+        tmp_path = f"{self.persist_path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.persist_path)
+        except OSError:
+            self.dirty = True
+            raise
+
+    def load(self):
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return 0
+        with open(self.persist_path) as f:
+            data = json.load(f)
+        with self.lock:
+            for item in data:
+                self._insert(BabySession(**item))
+        print(f"Loaded {len(data)} baby sessions from {self.persist_path}.")
+        return len(data)
+
+    async def run_sweeps(self):
+        """Periodically expire idle sessions and persist changes"""
+        while True:
+            await asyncio.sleep(self.sweep_seconds)
+            self.sweep()
+            try:
+                await asyncio.to_thread(self.save)
+            except OSError as e:
+                print(f"Could not persist baby sessions: {e}")
+
+    def start(self):
+        if self.sweep_seconds > 0 and self.sweep_task is None:
+            self.sweep_task = asyncio.get_running_loop().create_task(self.run_sweeps())
+
+    async def stop(self):
+        if self.sweep_task is not None:
+            self.sweep_task.cancel()
+            try:
+                await self.sweep_task
+            except asyncio.CancelledError:
+                pass
+            self.sweep_task = None
+        self.save()
+
+    def stats(self):
+        return {
+            "sessions": len(self.sessions),
+            "max_sessions": self.max_sessions,
+            "idle_ttl_seconds": self.idle_ttl_seconds,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "persisted": bool(self.persist_path)
+        }
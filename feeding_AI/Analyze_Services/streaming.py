@@ -0,0 +1,140 @@
+# streaming.py - Incremental NDJSON scoring for long-lived sensor connections
+import asyncio
+import json
+
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+
+_END = object()
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """StreamingResponse that leaves receive() to the request body reader.
+
+    For servers older than ASGI spec 2.4, Starlette's StreamingResponse
+    watches receive() for a disconnect while streaming, and discards any
+    body chunks it sees. Here the request body is still being read while
+    results stream back, so a disconnect surfaces through the body reader
+    and as a failed send instead. Background tasks run once the body is
+    complete, as with StreamingResponse.
+    """
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
+
+
+class LineTooLong(Exception):
+    """Queued in place of an NDJSON line longer than the configured limit"""
+
+
+async def read_lines(chunks, queue, max_line_bytes):
+    """Split incoming byte chunks into lines and feed them to a bounded queue.
+
+    queue.put blocks while the queue is full, so a fast producer stops
+    being read until scoring catches up (backpressure). A line longer than
+    max_line_bytes is queued as a LineTooLong in its place and its bytes
+    are dropped up to the next newline; the lines after it are still read.
+    """
+    buffer = b""
+    skipping = False  # inside an oversized line, dropping bytes up to its newline
+    too_long = f"Line exceeds {max_line_bytes} bytes"
+    try:
+        async for chunk in chunks:
+            if skipping:
+                end = chunk.find(b"\n")
+                if end < 0:
+                    continue
+                chunk, skipping = chunk[end + 1:], False
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if len(line) > max_line_bytes:
+                    await queue.put(LineTooLong(too_long))
+                elif line.strip():
+                    await queue.put(line)
+            if len(buffer) > max_line_bytes:
+                await queue.put(LineTooLong(too_long))
+                buffer, skipping = b"", True
+        if buffer.strip():
+            await queue.put(buffer)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        # A client disconnect ends the stream; what was already queued is still scored
+        print(f"NDJSON stream ended early: {e}")
+    await queue.put(_END)
+
+
+async def collect_batches(queue, max_batch_size, max_wait_ms):
+    """Yield lists of queued lines: up to max_batch_size, or whatever arrived within max_wait_ms"""
+    loop = asyncio.get_running_loop()
+    while True:
+        first = await queue.get()
+        if first is _END:
+            return
+        batch = [first]
+        deadline = loop.time() + max_wait_ms / 1000
+        while len(batch) < max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is _END:
+                yield batch
+                return
+            batch.append(item)
+        yield batch
+
+
+async def score_stream(chunks, score_batch, max_batch_size=32, max_wait_ms=20.0,
+                       max_pending=256, max_line_bytes=16384):
+    """Score an NDJSON byte stream incrementally; yields one result dict per input line.
+
+    score_batch takes a list of parsed JSON objects and returns one
+    (result, error) pair per object, in order. Lines that are not valid
+    JSON objects are reported as errors without reaching score_batch.
+    Results carry the zero-based line index and are yielded in input order.
+    """
+    queue = asyncio.Queue(maxsize=max(1, max_pending))
+    reader = asyncio.get_running_loop().create_task(read_lines(chunks, queue, max_line_bytes))
+    index = 0
+    try:
+        async for lines in collect_batches(queue, max_batch_size, max_wait_ms):
+            outcomes = [None] * len(lines)
+            parsed = []  # (position, object)
+            for position, line in enumerate(lines):
+                if isinstance(line, LineTooLong):
+                    outcomes[position] = (None, str(line))
+                    continue
+                try:
+                    obj = json.loads(line)
+                except ValueError as e:
+                    outcomes[position] = (None, f"Invalid JSON: {e}")
+                    continue
+                if not isinstance(obj, dict):
+                    outcomes[position] = (None, "Each line must be a JSON object")
+                    continue
+                parsed.append((position, obj))
+
+            if parsed:
+                scored = await score_batch([obj for _, obj in parsed])
+                for (position, _), outcome in zip(parsed, scored):
+                    outcomes[position] = outcome
+
+            for result, error in outcomes:
+                yield {"index": index, "result": result, "error": error}
+                index += 1
+    finally:
+        reader.cancel()
+        try:
+            await reader
+        except (asyncio.CancelledError, Exception):
+            pass
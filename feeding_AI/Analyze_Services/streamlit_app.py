@@ -1,7 +1,7 @@
 import streamlit as st
 import requests
-import json
-from datetime import datetime
+import os
+from dashboard_client import FeedingApiClient, ResultMemo, ApiError, DEFAULT_FOOD_TYPES
 
 st.set_page_config(
     page_title="Baby Feeding AI Assistant",
@@ -13,7 +13,24 @@ st.title("🍼 Baby Feeding AI Assistant")
 st.markdown("*AI-powered feeding suitability analysis with personalized recommendations*")
 
 # API Configuration
-API_BASE_URL = "http://localhost:8000"
+API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
+# Read timeout per call; connects time out after ~3 s and are retried
+API_TIMEOUT_S = float(os.getenv("API_TIMEOUT_S", "10"))
+# How long the food type list is reused before asking the API again
+FOOD_TYPES_TTL_S = int(os.getenv("FOOD_TYPES_TTL_S", "300"))
+
+@st.cache_resource
+def api_client():
+    """One pooled client for every dashboard session"""
+    return FeedingApiClient(API_BASE_URL, timeout=(3.05, API_TIMEOUT_S))
+
+@st.cache_data(ttl=FOOD_TYPES_TTL_S, show_spinner=False)
+def fetch_food_types():
+    # Errors are not cached, so an unreachable API is asked again on the next rerun
+    return api_client().food_types()
+
+if "analyses" not in st.session_state:
+    st.session_state.analyses = ResultMemo()
 
 # Sidebar for baby information
 with st.sidebar:
@@ -33,13 +50,9 @@ with col1:
     
     # Get available food types
     try:
-        response = requests.get(f"{API_BASE_URL}/food-types")
-        if response.status_code == 200:
-            food_types = response.json()["food_types"]
-        else:
-            food_types = ["Formula", "Breast Milk", "Solid", "Liquid", "Semi"]
-    except:
-        food_types = ["Formula", "Breast Milk", "Solid", "Liquid", "Semi"]
+        food_types = fetch_food_types()
+    except (requests.exceptions.RequestException, ApiError, KeyError, ValueError):
+        food_types = DEFAULT_FOOD_TYPES
     
     food_type = st.selectbox("Food Type", food_types)
     food_quantity = st.number_input("Food Quantity (ml)", min_value=0, max_value=500, value=120)
@@ -71,71 +84,71 @@ if st.button("🔍 Analyze Feeding Situation", type="primary"):
     
     try:
         with st.spinner("Analyzing feeding conditions..."):
-            response = requests.post(f"{API_BASE_URL}/analyze", json=payload)
+            analyzed = st.session_state.analyses.analyze(api_client(), payload)
+        result = analyzed.data
         
-        if response.status_code == 200:
-            result = response.json()
-            
-            # Main result
-            if result["feeding_suitable"]:
-                st.success(f"✅ Feeding conditions are suitable! (Confidence: {result['confidence']:.1%})")
-            else:
-                st.warning(f"⚠️ Feeding conditions need adjustment (Confidence: {result['confidence']:.1%})")
-            
-            # Create columns for detailed results
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                st.subheader("📊 Feeding Analysis")
-                analysis = result["feeding_analysis"]
-                
-                st.metric("Expected Quantity", f"{analysis['expected_quantity_ml']} ml", 
-                         f"{food_quantity - analysis['expected_quantity_ml']:+d} ml")
-                st.metric("Expected Interval", f"{analysis['expected_feeding_interval_min']} min",
-                         f"{last_feeding - analysis['expected_feeding_interval_min']:+d} min")
-                
-                # Status indicators
-                temp_color = "🟢" if analysis["food_temp_status"] == "ideal" else "🟡"
-                st.write(f"{temp_color} Food Temperature: {analysis['food_temp_status']}")
-                
-                room_color = "🟢" if analysis["room_temp_status"] == "comfortable" else "🟡"
-                st.write(f"{room_color} Room Temperature: {analysis['room_temp_status']}")
+        # Main result
+        if result["feeding_suitable"]:
+            st.success(f"✅ Feeding conditions are suitable! (Confidence: {result['confidence']:.1%})")
+        else:
+            st.warning(f"⚠️ Feeding conditions need adjustment (Confidence: {result['confidence']:.1%})")
+        
+        # Create columns for detailed results
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.subheader("📊 Feeding Analysis")
+            analysis = result["feeding_analysis"]
             
-            with col2:
-                if result["baby_crying"] and result["cry_reasons"]:
-                    st.subheader("😢 Possible Crying Reasons")
-                    for i, reason in enumerate(result["cry_reasons"], 1):
-                        st.write(f"{i}. {reason}")
-                else:
-                    st.subheader("😊 Baby Status")
-                    if not result["baby_crying"]:
-                        st.write("✅ Baby is not crying")
-                        st.write("🍼 Ready for feeding")
-                    else:
-                        st.write("👶 No specific feeding-related concerns identified")
+            st.metric("Expected Quantity", f"{analysis['expected_quantity_ml']} ml", 
+                     f"{food_quantity - analysis['expected_quantity_ml']:+d} ml")
+            st.metric("Expected Interval", f"{analysis['expected_feeding_interval_min']} min",
+                     f"{last_feeding - analysis['expected_feeding_interval_min']:+d} min")
             
-            with col3:
-                if result["recommendations"]:
-                    st.subheader("💡 Recommendations")
-                    for i, rec in enumerate(result["recommendations"], 1):
-                        st.write(f"{i}. {rec}")
+            # Status indicators
+            temp_color = "🟢" if analysis["food_temp_status"] == "ideal" else "🟡"
+            st.write(f"{temp_color} Food Temperature: {analysis['food_temp_status']}")
             
-            # Detailed analysis in expander
-            with st.expander("🔍 Detailed Analysis"):
-                st.json(result["feeding_analysis"])
-                
-                if use_measurements:
-                    st.write(f"**Using provided measurements:** {baby_weight}kg, {baby_height}cm")
+            room_color = "🟢" if analysis["room_temp_status"] == "comfortable" else "🟡"
+            st.write(f"{room_color} Room Temperature: {analysis['room_temp_status']}")
+        
+        with col2:
+            if result["baby_crying"] and result["cry_reasons"]:
+                st.subheader("😢 Possible Crying Reasons")
+                for i, reason in enumerate(result["cry_reasons"], 1):
+                    st.write(f"{i}. {reason}")
+            else:
+                st.subheader("😊 Baby Status")
+                if not result["baby_crying"]:
+                    st.write("✅ Baby is not crying")
+                    st.write("🍼 Ready for feeding")
                 else:
-                    st.write(f"**Using estimated measurements:** {analysis['estimated_weight_kg']}kg, {analysis['estimated_height_cm']}cm")
+                    st.write("👶 No specific feeding-related concerns identified")
         
-        else:
-            st.error(f"API Error: {response.status_code}")
-            st.write("Response:", response.text)
+        with col3:
+            if result["recommendations"]:
+                st.subheader("💡 Recommendations")
+                for i, rec in enumerate(result["recommendations"], 1):
+                    st.write(f"{i}. {rec}")
+        
+        # Detailed analysis in expander
+        with st.expander("🔍 Detailed Analysis"):
+            st.json(result["feeding_analysis"])
+            
+            if use_measurements:
+                st.write(f"**Using provided measurements:** {baby_weight}kg, {baby_height}cm")
+            else:
+                st.write(f"**Using estimated measurements:** {analysis['estimated_weight_kg']}kg, {analysis['estimated_height_cm']}cm")
+        st.caption(f"⏱️ {analyzed.timing_text()}")
     
+    except ApiError as e:
+        st.error(f"API Error: {e.status_code}")
+        st.write("Response:", e.detail)
     except requests.exceptions.ConnectionError:
         st.error("❌ Cannot connect to API. Make sure FastAPI server is running on port 8000")
         st.code("uvicorn main:app --reload --port 8000")
+    except requests.exceptions.Timeout:
+        st.error(f"⌛ The API did not answer within {API_TIMEOUT_S:.0f} s. It may be busy; please try again.")
     except Exception as e:
         st.error(f"❌ Error: {str(e)}")
 
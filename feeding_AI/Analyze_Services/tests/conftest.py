@@ -0,0 +1,55 @@
+# tests/conftest.py - Shared fixtures; tests run from the service directory, like the API
+import os
+
+import joblib
+import pandas as pd
+import pytest
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_FILE = "data/baby_feeding_data_2000.xlsx"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def service_dir():
+    """model/ and data/ paths are relative to the service directory"""
+    previous = os.getcwd()
+    os.chdir(SERVICE_DIR)
+    yield SERVICE_DIR
+    os.chdir(previous)
+
+
+@pytest.fixture(scope="session")
+def training_frame(service_dir):
+    """The training workbook plus its encoded food type; treat as read-only"""
+    df = pd.read_excel(DATA_FILE)
+    encoder = joblib.load("model/food_type_encoder.pkl")
+    df["FoodTypeEncoded"] = encoder.transform(df["FoodType"])
+    return df
+
+
+@pytest.fixture(scope="session")
+def request_payloads(training_frame):
+    """200 /analyze payloads resampled from the workbook, without weight or height"""
+    df = training_frame.sample(200, replace=True, random_state=5)
+    return [
+        {
+            "baby_age_months": int(row.BabyAgeMonths),
+            "food_type": row.FoodType,
+            "food_quantity_ml": int(row.FoodQuantityML),
+            "food_temp_celsius": float(row.FoodTempCelsius),
+            "room_temp_celsius": float(row.RoomTempCelsius),
+            "time_since_last_feeding_min": int(min(row.TimeSinceLastFeedingMin, 1440)),
+            "baby_crying": row.BabyCriedAfterFeed == "Yes",
+        }
+        for row in df.itertuples()
+    ]
+
+
+@pytest.fixture(scope="session")
+def client(service_dir):
+    """TestClient over the app with its lifespan run (models loaded, executor started)"""
+    from fastapi.testclient import TestClient
+
+    import app
+    with TestClient(app.app) as client:
+        yield client
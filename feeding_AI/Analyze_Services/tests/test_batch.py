@@ -0,0 +1,57 @@
+# tests/test_batch.py - POST /analyze/batch reports errors per item
+#
+# Non-object and invalid items fail on their own, with a readable message
+# and the structured validation errors; the rest of the batch is scored.
+# Run from feeding_AI/Analyze_Services:
+#     python -m pytest tests
+import pytest
+
+VALID = {
+    "baby_age_months": 4,
+    "food_type": "Liquid",
+    "food_quantity_ml": 120,
+    "food_temp_celsius": 37.0,
+    "room_temp_celsius": 23.0,
+    "time_since_last_feeding_min": 170,
+}
+
+
+def test_mixed_batch_scores_valid_items(client):
+    items = [VALID, 5, "x", None, [1], {**VALID, "baby_age_months": 99}, {"food_type": "Liquid"}, VALID]
+
+    response = client.post("/analyze/batch", json=items)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "partial"
+    assert body["count"] == len(items)
+    assert body["failed"] == 6
+    results = body["results"]
+    assert [r["index"] for r in results] == list(range(len(items)))
+    for i in (0, 7):
+        assert results[i]["error"] is None
+        assert results[i]["result"]["status"] == "success"
+    assert results[0]["result"] == results[7]["result"]
+    for i in (1, 2, 3, 4):
+        assert results[i]["result"] is None
+        assert results[i]["error"] == "Each item must be a JSON object"
+
+
+@pytest.mark.parametrize("item, field, kind", [
+    ({**VALID, "baby_age_months": 99}, "baby_age_months", "less_than_equal"),
+    ({k: v for k, v in VALID.items() if k != "food_quantity_ml"}, "food_quantity_ml", "missing"),
+])
+def test_validation_errors_are_structured(client, item, field, kind):
+    result = client.post("/analyze/batch", json=[item]).json()["results"][0]
+
+    assert result["result"] is None
+    assert result["error"].startswith(f"Invalid request: {field}: ")
+    assert result["details"] == [{"type": kind, "loc": [field], "msg": result["details"][0]["msg"]}]
+
+
+def test_all_valid_batch(client):
+    body = client.post("/analyze/batch", json=[VALID] * 3).json()
+
+    assert body["status"] == "success"
+    assert body["failed"] == 0
+    assert all(r["details"] is None for r in body["results"])
@@ -0,0 +1,54 @@
+# tests/test_batching.py - MicroBatcher admission is bounded in requests
+#
+# Run from feeding_AI/Analyze_Services:
+#     python -m pytest tests
+import asyncio
+
+import pytest
+
+from batching import BatcherFull, MicroBatcher
+
+
+def test_rejects_at_submit_beyond_max_outstanding():
+    async def main():
+        release = asyncio.Event()
+
+        async def score_batch(items):
+            await release.wait()
+            return [item * 2 for item in items]
+
+        batcher = MicroBatcher(score_batch, max_batch_size=4, max_wait_ms=1, max_outstanding=6)
+        accepted = [asyncio.create_task(batcher.submit(i)) for i in range(6)]
+        await asyncio.sleep(0.01)
+        assert batcher.outstanding == 6
+
+        with pytest.raises(BatcherFull):
+            await batcher.submit(6)
+
+        release.set()
+        results = await asyncio.gather(*accepted)
+        await batcher.stop()
+        return batcher, results
+
+    batcher, results = asyncio.run(main())
+    assert [result for result, _, _ in results] == [0, 2, 4, 6, 8, 10]
+    assert [size for _, _, size in results] == [4, 4, 4, 4, 2, 2]
+    assert batcher.rejected == 1
+    assert batcher.outstanding == 0
+
+
+def test_capacity_frees_as_requests_are_answered():
+    async def main():
+        async def score_batch(items):
+            return items
+
+        batcher = MicroBatcher(score_batch, max_batch_size=2, max_wait_ms=1, max_outstanding=2)
+        for i in range(10):
+            result, _, _ = await batcher.submit(i)
+            assert result == i
+        await batcher.stop()
+        return batcher
+
+    batcher = asyncio.run(main())
+    assert batcher.rejected == 0
+    assert batcher.stats()["outstanding"] == 0
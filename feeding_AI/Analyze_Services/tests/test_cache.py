@@ -0,0 +1,125 @@
+# tests/test_cache.py - ResponseCache hits, misses, expiry, invalidation and buckets
+#
+# Run from feeding_AI/Analyze_Services:
+#     python -m pytest tests
+import pytest
+
+import app
+import cache
+from app import FeedingRequest
+from cache import ResponseCache
+
+PAYLOAD = {
+    "baby_age_months": 4,
+    "food_type": "Liquid",
+    "food_quantity_ml": 120,
+    "food_temp_celsius": 37.2,
+    "room_temp_celsius": 23.4,
+    "time_since_last_feeding_min": 173,
+}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    return clock
+
+
+def request(**changes):
+    return FeedingRequest(**{**PAYLOAD, **changes})
+
+
+def test_hit_and_miss():
+    responses = ResponseCache(max_size=10, ttl_seconds=60)
+    key = responses.key(request())
+
+    assert responses.get(key) is None
+    responses.put(key, "scored")
+    assert responses.get(key) == "scored"
+    assert responses.get(responses.key(request(food_temp_celsius=37.3))) is None
+    assert (responses.hits, responses.misses) == (1, 2)
+
+
+def test_entries_expire_after_ttl(clock):
+    responses = ResponseCache(max_size=10, ttl_seconds=60)
+    key = responses.key(request())
+    responses.put(key, "scored")
+
+    clock.now += 60
+    assert responses.get(key) == "scored"
+    clock.now += 1
+    assert responses.get(key) is None
+    assert responses.expirations == 1
+    assert responses.stats()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    responses = ResponseCache(max_size=2, ttl_seconds=0)
+    keys = [responses.key(request(food_quantity_ml=q)) for q in (100, 110, 120)]
+    responses.put(keys[0], 0)
+    responses.put(keys[1], 1)
+    responses.get(keys[0])
+    responses.put(keys[2], 2)
+
+    assert responses.get(keys[1]) is None
+    assert responses.get(keys[0]) == 0
+    assert responses.evictions == 1
+
+
+def test_clear_drops_entries_and_results_from_the_old_generation():
+    responses = ResponseCache(max_size=10, ttl_seconds=60)
+    key = responses.key(request())
+    responses.put(key, "old model")
+    generation = responses.generation  # a request starts scoring here
+
+    responses.clear()  # the model is reloaded meanwhile
+    responses.put(key, "old model", generation)
+
+    assert responses.get(key) is None
+    responses.put(key, "new model", responses.generation)
+    assert responses.get(key) == "new model"
+    assert responses.invalidations == 1
+
+
+def test_disabled_cache_stores_nothing():
+    responses = ResponseCache(max_size=0)
+    key = responses.key(request())
+    responses.put(key, "scored")
+
+    assert not responses.enabled
+    assert responses.get(key) is None
+
+
+def test_canonical_request_matches_its_key():
+    responses = ResponseCache(temp_bucket=0.5, interval_bucket=15)
+    original = request()
+    canonical = responses.canonical(original)
+
+    assert (canonical.food_temp_celsius, canonical.room_temp_celsius) == (37.0, 23.5)
+    assert canonical.time_since_last_feeding_min == 180
+    assert canonical.food_quantity_ml == original.food_quantity_ml
+    assert responses.key(canonical) == responses.key(original)
+    assert ResponseCache().canonical(original) is original
+
+
+def test_bucketed_hits_are_the_bucket_response(client, monkeypatch):
+    monkeypatch.setattr(app, "response_cache", ResponseCache(100, 60, temp_bucket=0.5, interval_bucket=15))
+    first = client.post("/analyze", json=PAYLOAD)
+    second = client.post("/analyze", json={**PAYLOAD, "food_temp_celsius": 36.9, "time_since_last_feeding_min": 186})
+
+    assert (first.headers["X-Cache"], second.headers["X-Cache"]) == ("miss", "hit")
+    assert second.json() == first.json()
+    # Both describe the bucketed inputs, not whichever request came first
+    assert first.json()["feeding_analysis"]["actual_interval_min"] == 180
+    canonical = {**PAYLOAD, "food_temp_celsius": 37.0, "room_temp_celsius": 23.5, "time_since_last_feeding_min": 180}
+    monkeypatch.setattr(app, "response_cache", ResponseCache(max_size=0))
+    assert client.post("/analyze", json=canonical).json() == first.json()
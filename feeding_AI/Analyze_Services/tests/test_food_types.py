@@ -0,0 +1,84 @@
+# tests/test_food_types.py - Food type table, aliases and unknown names
+#
+# Run from feeding_AI/Analyze_Services:
+#     python -m pytest tests
+import joblib
+import pytest
+
+import app
+from food_types import FoodTypeTable, UnknownFoodType, parse_aliases
+from registry import ModelBundle
+
+PAYLOAD = {
+    "baby_age_months": 2,
+    "food_type": "Liquid",
+    "food_quantity_ml": 100,
+    "food_temp_celsius": 37.0,
+    "room_temp_celsius": 22.0,
+    "time_since_last_feeding_min": 150,
+}
+
+
+def test_codes_match_the_label_encoder(service_dir):
+    encoder = joblib.load("model/food_type_encoder.pkl")
+    table = FoodTypeTable.from_encoder(encoder)
+
+    assert [table.encode(name) for name in encoder.classes_] == list(encoder.transform(encoder.classes_))
+
+
+def test_aliases():
+    table = FoodTypeTable(aliases=parse_aliases("Formula:Liquid, Breast Milk :Liquid,Semi:Solid,Puree:Mash"))
+
+    assert table.encode("Breast Milk") == table.encode("Formula") == table.encode("Liquid")
+    assert table.encode("Semi") == 1  # a trained class keeps its own code
+    assert dict(table.aliases) == {"Formula": "Liquid", "Breast Milk": "Liquid"}
+    assert table.to_dict()["food_types"] == ["Liquid", "Semi", "Solid", "Formula", "Breast Milk"]
+
+
+def test_unknown_names_raise_unless_there_is_a_fallback():
+    fallbacks = []
+    strict = FoodTypeTable()
+    lenient = FoodTypeTable(fallback="Solid")
+
+    with pytest.raises(UnknownFoodType, match="Juice"):
+        strict.encode("Juice", lambda: fallbacks.append("strict"))
+    assert lenient.encode("Juice", lambda: fallbacks.append("lenient")) == 2
+    assert lenient.encode("Solid", lambda: fallbacks.append("known")) == 2
+    assert fallbacks == ["lenient"]
+    assert FoodTypeTable(fallback="Juice").fallback is None
+
+
+def test_alias_scores_like_its_class(client):
+    liquid = client.post("/analyze", json=PAYLOAD)
+    breast_milk = client.post("/analyze", json={**PAYLOAD, "food_type": "Breast Milk"})
+
+    assert breast_milk.status_code == 200
+    assert breast_milk.json() == liquid.json()
+
+
+def test_unknown_food_type_is_rejected(client):
+    response = client.post("/analyze", json={**PAYLOAD, "food_type": "Juice"})
+
+    assert response.status_code == 422
+    assert "Unknown food type 'Juice'" in response.json()["detail"]
+    item = client.post("/analyze/batch", json=[{**PAYLOAD, "food_type": "Juice"}, PAYLOAD]).json()
+    assert item["failed"] == 1
+    assert "Unknown food type 'Juice'" in item["results"][0]["error"]
+
+
+def test_food_types_are_served_during_warm_up(client, monkeypatch):
+    class Loading:
+        def done(self):
+            return False
+
+    monkeypatch.setattr(app.registry, "warmup_task", Loading())
+    monkeypatch.setattr(app.predictor, "models", ModelBundle())
+
+    response = client.get("/food-types")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "food_types": ["Liquid", "Semi", "Solid", "Formula", "Breast Milk"],
+        "aliases": {"Formula": "Liquid", "Breast Milk": "Liquid"},
+        "unknown_food_type": None,
+    }
@@ -0,0 +1,175 @@
+# tests/test_forest_engine.py - FlatForest against sklearn on the shipped model
+#
+# predict_proba parity, the compression transforms trainModel.py's
+# compress stage chains (subset, cap_depth, merge_leaves, quantize), and
+# the .npy save / memory-mapped load round trip behind MODEL_FORMAT=flat.
+# Run from feeding_AI/Analyze_Services:
+#     python -m pytest tests
+import os
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+import app
+from forest_engine import ARRAY_NAMES, FlatForest
+
+
+@pytest.fixture(scope="module")
+def model(service_dir):
+    return joblib.load("model/feeding_model.pkl")
+
+
+@pytest.fixture(scope="module")
+def flat(model):
+    return FlatForest.from_sklearn(model)
+
+
+@pytest.fixture(scope="module")
+def X(model, training_frame):
+    return training_frame[list(model.feature_names_in_)].to_numpy(dtype=np.float64)
+
+
+def truncated_proba(model, X, trees, max_depth):
+    """Mean class distribution of the node each row reaches at max_depth (or its leaf earlier)"""
+    total = np.zeros((len(X), len(model.classes_)))
+    for t in trees:
+        tree = model.estimators_[t].tree_
+        paths = model.estimators_[t].decision_path(X.astype(np.float32))
+        # Node ids grow along a root-to-leaf path, so indices[k] is the node at depth k
+        nodes = [paths.indices[start:end][min(max_depth, end - start - 1)]
+                 for start, end in zip(paths.indptr[:-1], paths.indptr[1:])]
+        value = tree.value[nodes, 0, :]
+        total += value / value.sum(axis=1, keepdims=True)
+    return total / len(trees)
+
+
+def test_from_sklearn_matches_predict_proba(model, flat, X):
+    assert flat.n_trees == len(model.estimators_)
+    assert flat.max_depth == max(e.tree_.max_depth for e in model.estimators_)
+    assert list(flat.feature_names_in_) == list(model.feature_names_in_)
+    np.testing.assert_array_equal(flat.predict_proba(X), model.predict_proba(X))
+    np.testing.assert_array_equal(flat.predict(X), model.predict(X))
+
+
+def test_from_sklearn_rejects_unfitted_forest():
+    with pytest.raises(ValueError):
+        FlatForest.from_sklearn(RandomForestClassifier())
+
+
+def test_quantize_keeps_branches(flat, X):
+    leaves = flat.apply(X)
+    proba = flat.predict_proba(X)
+
+    as_float32 = flat.quantize("float32")
+    assert as_float32.threshold.dtype == np.float32
+    assert as_float32.nbytes() < flat.nbytes()
+    np.testing.assert_array_equal(as_float32.apply(X), leaves)
+    np.testing.assert_allclose(as_float32.predict_proba(X), proba, atol=1e-6)
+
+    as_uint16 = flat.quantize("uint16")
+    assert as_uint16.values.dtype == np.uint16
+    np.testing.assert_array_equal(as_uint16.apply(X), leaves)
+    np.testing.assert_allclose(as_uint16.predict_proba(X), proba, atol=1 / 65535)
+
+
+
+def test_subset(model, flat, X):
+    np.testing.assert_array_equal(flat.subset(range(flat.n_trees)).predict_proba(X), flat.predict_proba(X))
+
+    trees = [7, 2, 40]
+    subset = flat.subset(trees)
+    assert subset.n_trees == len(trees)
+    assert len(subset.feature) == sum(model.estimators_[t].tree_.node_count for t in trees)
+    np.testing.assert_allclose(subset.predict_proba(X), truncated_proba(model, X, trees, flat.max_depth))
+
+
+@pytest.mark.parametrize("max_depth", [1, 4, 10])
+def test_cap_depth(model, flat, X, max_depth):
+    capped = flat.cap_depth(max_depth)
+
+    assert capped.max_depth == max_depth
+    assert capped.node_depths().max() == max_depth
+    np.testing.assert_allclose(capped.predict_proba(X),
+                               truncated_proba(model, X, range(flat.n_trees), max_depth))
+
+
+def test_cap_depth_at_full_depth_is_unchanged(flat, X):
+    capped = flat.cap_depth(flat.max_depth)
+    assert len(capped.feature) == len(flat.feature)
+    np.testing.assert_array_equal(capped.predict_proba(X), flat.predict_proba(X))
+
+
+@pytest.mark.parametrize("tolerance", [0.0, 0.05, 0.2])
+def test_merge_leaves(flat, X, tolerance):
+    # Fully grown leaves are pure; capping first gives mixed ones to merge, as compress does
+    capped = flat.cap_depth(8)
+    merged = capped.merge_leaves(tolerance)
+
+    if tolerance:
+        assert len(merged.feature) < len(capped.feature)
+    internal = np.flatnonzero(~merged.is_leaf)
+    left, right = merged.children[2 * internal], merged.children[2 * internal + 1]
+    both_leaves = merged.is_leaf[left] & merged.is_leaf[right]
+    assert (np.abs(merged.values[left] - merged.values[right]).max(axis=1)[both_leaves] > tolerance).all()
+    # Each collapse replaces a leaf by its parent's distribution, which lies
+    # between the two merged leaves, so a tree moves at most tolerance per level
+    drift = np.abs(merged.tree_proba(X) - capped.tree_proba(X)).max()
+    assert drift <= tolerance * capped.max_depth + 1e-9
+    if tolerance == 0.0:
+        np.testing.assert_allclose(merged.predict_proba(X), capped.predict_proba(X), atol=1e-12)
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_save_load_round_trip(flat, X, tmp_path, mmap):
+    flat.save(tmp_path)
+    loaded = FlatForest.load(tmp_path, mmap=mmap)
+
+    for name in ARRAY_NAMES:
+        np.testing.assert_array_equal(getattr(loaded, name), getattr(flat, name))
+        assert isinstance(getattr(loaded, name), np.memmap) == mmap
+    assert loaded.max_depth == flat.max_depth
+    assert list(loaded.classes_) == list(flat.classes_)
+    assert list(loaded.feature_names_in_) == list(flat.feature_names_in_)
+    np.testing.assert_array_equal(loaded.predict_proba(X), flat.predict_proba(X))
+
+
+def test_quantized_round_trip(flat, X, tmp_path):
+    packed = flat.quantize("uint16")
+    packed.save(tmp_path)
+    loaded = FlatForest.load(tmp_path)
+
+    assert loaded.values.dtype == np.uint16
+    assert loaded.value_scale == packed.value_scale
+    np.testing.assert_array_equal(loaded.predict_proba(X), packed.predict_proba(X))
+
+
+def model_dir_with(tmp_path, flat=None):
+    """model/ copy holding the shipped pickles, plus a flat bundle if given"""
+    for name in ("feeding_model.pkl", "food_type_encoder.pkl"):
+        os.symlink(os.path.abspath(os.path.join("model", name)), tmp_path / name)
+    if flat is not None:
+        flat.save(tmp_path / app.FLAT_MODEL_DIR)
+    return str(tmp_path)
+
+
+def test_flat_format_memory_maps_the_bundle(flat, X, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(app, "MODEL_FORMAT", "flat")
+
+    bundle = app.BabyFeedingPredictor().load_bundle(model_dir_with(tmp_path, flat))
+
+    assert isinstance(bundle.feeding_scorer, FlatForest)
+    assert isinstance(bundle.feeding_model.threshold, np.memmap)
+    np.testing.assert_array_equal(bundle.feeding_model.predict_proba(X), flat.predict_proba(X))
+    assert "Warning" not in capsys.readouterr().out
+
+
+def test_flat_format_warns_without_a_bundle(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(app, "MODEL_FORMAT", "flat")
+
+    bundle = app.BabyFeedingPredictor().load_bundle(model_dir_with(tmp_path))
+
+    assert not isinstance(bundle.feeding_model, FlatForest)
+    assert bundle.feeding_model is not None
+    assert "Warning: MODEL_FORMAT=flat but" in capsys.readouterr().out
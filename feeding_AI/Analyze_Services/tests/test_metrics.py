@@ -0,0 +1,50 @@
+# tests/test_metrics.py - Stage timings exported for the scoring endpoints
+#
+# Run from feeding_AI/Analyze_Services:
+#     python -m pytest tests
+import re
+
+import pytest
+
+from app import FeedingResponse
+
+PAYLOAD = {
+    "baby_age_months": 9,
+    "food_type": "Semi",
+    "food_quantity_ml": 140,
+    "food_temp_celsius": 36.5,
+    "room_temp_celsius": 21.0,
+    "time_since_last_feeding_min": 200,
+}
+
+
+def stage_counts(client):
+    text = client.get("/metrics").text
+    return {stage: int(count) for stage, count in
+            re.findall(r'feeding_predict_stage_seconds_count\{stage="(\w+)"\} (\d+)', text)}
+
+
+@pytest.mark.parametrize("path, body, scoring_calls", [
+    ("/analyze", {**PAYLOAD, "food_quantity_ml": 141}, 1),  # not a cache hit
+    ("/analyze/batch", [PAYLOAD, PAYLOAD], 1),
+    ("/analyze/sweep", {"base": PAYLOAD, "axes": [{"field": "food_temp_celsius", "start": 30, "stop": 40, "steps": 5}]}, 0),
+])
+def test_serialization_is_timed_once_per_response(client, path, body, scoring_calls):
+    before = stage_counts(client)
+
+    response = client.post(path, json=body)
+
+    assert response.status_code == 200
+    after = stage_counts(client)
+    assert after["serialization"] == before.get("serialization", 0) + 1
+    assert after["response_build"] == before.get("response_build", 0) + scoring_calls
+
+
+def test_encoded_response_keeps_headers_and_schema(client):
+    response = client.post("/analyze", json=PAYLOAD)
+
+    assert response.headers["content-type"] == "application/json"
+    assert {"x-cache", "x-queue-wait-ms", "server-timing"} <= set(response.headers)
+    FeedingResponse.model_validate_json(response.content)
+    schema = client.get("/openapi.json").json()["paths"]["/analyze"]["post"]["responses"]["200"]
+    assert schema["content"]["application/json"]["schema"] == {"$ref": "#/components/schemas/FeedingResponse"}
@@ -0,0 +1,151 @@
+# tests/test_registry.py - Reload gate, holdout rows and admin token
+#
+# The gate scores candidates on rows trainModel.py held out of training,
+# a candidate below MODEL_MIN_HOLDOUT_ACCURACY leaves the active version
+# serving, admin endpoints need the exact ADMIN_TOKEN, and a background
+# warm-up reports when the first version is ready.
+# Run from feeding_AI/Analyze_Services:
+#     python -m pytest tests
+import asyncio
+import os
+import time
+
+import joblib
+import numpy as np
+import pytest
+
+import app
+from records import read_records
+from registry import ModelBundle, ModelRegistry
+
+
+@pytest.fixture
+def predictor():
+    predictor = app.BabyFeedingPredictor()
+    predictor.activate(predictor.load_bundle())
+    return predictor
+
+
+def reload(registry):
+    return asyncio.run(registry.reload(force=True))
+
+
+def test_rejected_candidate_keeps_the_active_bundle(predictor):
+    active = predictor.models
+    registry = ModelRegistry(predictor, "model", validate=lambda bundle: 0.5, min_accuracy=0.7)
+
+    result = reload(registry)
+
+    assert not result["reloaded"]
+    assert "below minimum" in result["reason"]
+    assert predictor.models is active
+    assert registry.last_error == result["reason"]
+    assert registry.reloads == 0
+
+
+def test_passing_candidate_is_activated(predictor):
+    active = predictor.models
+    registry = ModelRegistry(predictor, "model", validate=lambda bundle: 0.9, min_accuracy=0.7)
+
+    result = reload(registry)
+
+    assert result["reloaded"]
+    assert predictor.models is not active
+    assert predictor.models.holdout_accuracy == 0.9
+
+
+def test_holdout_is_scored_on_unseen_rows(predictor):
+    model = joblib.load("model/feeding_model.pkl")
+    holdout = read_records(app.HOLDOUT_FILE)
+    features = predictor.food_encoder.transform(holdout["FoodType"].astype(str))
+    X = holdout.assign(FoodTypeEncoded=features)[list(model.feature_names_in_)].to_numpy(dtype=np.float64)
+
+    accuracy = app.holdout_accuracy(predictor.models)
+
+    assert accuracy == pytest.approx(float(np.mean(model.predict(X) == holdout["SuitableFood"].astype(str))))
+    # Rows the forest was fitted on score (almost) perfectly; these do not
+    assert accuracy < 0.95
+
+
+def test_missing_holdout_skips_the_gate(predictor, monkeypatch, tmp_path):
+    monkeypatch.setattr(app, "HOLDOUT_FILE", str(tmp_path / "holdout.parquet"))
+    registry = ModelRegistry(predictor, "model", validate=app.holdout_accuracy, min_accuracy=0.99)
+
+    result = reload(registry)
+
+    assert result["reloaded"]
+    assert result["holdout_accuracy"] is None
+
+
+@pytest.mark.parametrize("headers, status", [
+    ({}, 401),
+    ({"X-Admin-Token": "secret-tokeN"}, 401),
+    ({"X-Admin-Token": "secret-token"}, 200),
+])
+def test_admin_token(client, monkeypatch, headers, status):
+    monkeypatch.setattr(app, "ADMIN_TOKEN", "secret-token")
+    assert client.post("/admin/models/reload", headers=headers).status_code == status
+
+
+def test_admin_disabled_without_token(client, monkeypatch):
+    monkeypatch.setattr(app, "ADMIN_TOKEN", None)
+    assert client.post("/admin/models/reload", headers={"X-Admin-Token": ""}).status_code == 403
+
+
+def test_training_saves_its_test_rows(service_dir, monkeypatch, tmp_path):
+    from trainModel import HOLDOUT_PATH, BabyFeedingPredictor
+    os.symlink(os.path.join(service_dir, "data"), tmp_path / "data")
+    monkeypatch.chdir(tmp_path)
+    trainer = BabyFeedingPredictor()
+
+    trainer.train_models("data/baby_feeding_data_2000.xlsx")
+
+    holdout = read_records(HOLDOUT_PATH)
+    workbook = read_records("data/baby_feeding_data_2000.xlsx")
+    assert len(holdout) == len(workbook) // 5
+    X = trainer.prepare_data(holdout.astype({"FoodType": str, "SuitableFood": str}), fit_encoder=False)
+    # Bootstrap samples are drawn from the training split only, which excludes the holdout
+    assert trainer.feeding_model.estimators_[0].tree_.weighted_n_node_samples[0] == len(workbook) - len(holdout)
+    assert trainer.feeding_model.score(X[list(trainer.feeding_model.feature_names_in_)],
+                                       X["SuitableFood"]) < 0.95
+
+    trainer.save_holdout(None)
+    assert not os.path.exists(HOLDOUT_PATH)
+
+
+class SlowLoad:
+    """Predictor stand-in whose load_models takes a while, like unpickling on a cold start"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.loaded = False
+        self.models = ModelBundle()
+
+    def load_models(self):
+        time.sleep(self.seconds)
+        self.loaded = True
+
+
+def test_background_warm_up_and_wait_ready():
+    async def main():
+        predictor = SlowLoad(0.3)
+        registry = ModelRegistry(predictor, "model")
+        await registry.warm_up(background=True)
+        states = [registry.warming, await registry.wait_ready(0.01), predictor.loaded]
+        states += [await registry.wait_ready(5), registry.warming, predictor.loaded]
+        await registry.stop()
+        return registry, states
+
+    registry, states = asyncio.run(main())
+    assert states == [True, False, False, True, False, True]
+    assert registry.ready_seconds >= 0.3
+    assert registry.status()["warming"] is False
+
+
+def test_foreground_warm_up_is_ready_at_once():
+    async def main():
+        registry = ModelRegistry(SlowLoad(0), "model")
+        await registry.warm_up()
+        return registry.warming, await registry.wait_ready(0)
+
+    assert asyncio.run(main()) == (False, True)
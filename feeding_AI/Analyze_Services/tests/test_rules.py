@@ -0,0 +1,108 @@
+# tests/test_rules.py - Vectorized rules.py against the scalar predictor rules
+#
+# Same cry reasons, recommendations, feeding analysis and rule-based
+# scores as BabyFeedingPredictor's scalar methods, on the training rows
+# (through both column builders) and a seeded grid that includes every
+# threshold boundary.
+# Run from feeding_AI/Analyze_Services:
+#     python -m pytest tests
+import numpy as np
+import pytest
+
+import rules
+from app import BabyFeedingPredictor, FeedingRequest
+
+
+@pytest.fixture(scope="module")
+def predictor():
+    return BabyFeedingPredictor()
+
+
+def scalar_outputs(predictor, request, weight, height, prediction):
+    cry_reasons = predictor.analyze_cry_reasons(request, weight, height) if request.baby_crying else []
+    return (
+        cry_reasons,
+        predictor.generate_recommendations(request, prediction, cry_reasons),
+        predictor.analyze_feeding_conditions(request, weight, height),
+        predictor.rule_based_prediction(request),
+    )
+
+
+def vector_outputs(columns):
+    evaluated = rules.evaluate(columns)
+    suitable, confidence = rules.rule_based_predictions(columns)
+    return [
+        (cry, recs, analysis, (bool(s), float(c)))
+        for cry, recs, analysis, s, c in zip(evaluated["cry_reasons"], evaluated["recommendations"],
+                                             evaluated["feeding_analysis"], suitable, confidence)
+    ]
+
+
+def synthetic_requests(n, seed=0):
+    """Random requests whose temperatures and intervals include every rule boundary"""
+    rng = np.random.default_rng(seed)
+    food_temps = np.concatenate([[30, 35, 40, 45], rng.uniform(0, 60, n)])
+    room_temps = np.concatenate([[18, 20, 25, 26, 28], rng.uniform(10, 45, n)])
+    requests = []
+    for i in range(n):
+        with_metrics = rng.random() < 0.5
+        requests.append(FeedingRequest(
+            baby_age_months=int(rng.integers(0, 25)),
+            baby_weight_kg=round(float(rng.uniform(2, 15)), 1) if with_metrics else None,
+            baby_height_cm=round(float(rng.uniform(45, 95)), 1) if with_metrics else None,
+            food_type="Liquid",
+            food_quantity_ml=int(rng.integers(0, 501)),
+            food_temp_celsius=round(float(food_temps[i % len(food_temps)]), 1),
+            room_temp_celsius=round(float(room_temps[i % len(room_temps)]), 1),
+            time_since_last_feeding_min=int(rng.choice([96, 120, 144, 180, 192, 240, rng.integers(0, 1441)])),
+            baby_crying=bool(rng.random() < 0.5)
+        ))
+    return requests
+
+
+def training_requests(df, crying):
+    return [FeedingRequest(
+        baby_age_months=r.BabyAgeMonths,
+        food_type=r.FoodType,
+        food_quantity_ml=r.FoodQuantityML,
+        food_temp_celsius=r.FoodTempCelsius,
+        room_temp_celsius=r.RoomTempCelsius,
+        time_since_last_feeding_min=r.TimeSinceLastFeedingMin,
+        baby_crying=bool(c)
+    ) for r, c in zip(df.itertuples(), crying)]
+
+
+def reference(predictor, requests, predictions):
+    metrics = [predictor.prepare_features(r)[1:] for r in requests]
+    weights = [w for w, _ in metrics]
+    heights = [h for _, h in metrics]
+    expected = [scalar_outputs(predictor, r, w, h, p)
+                for r, w, h, p in zip(requests, weights, heights, predictions)]
+    return expected, weights, heights
+
+
+def assert_same(expected, actual):
+    assert len(actual) == len(expected)
+    mismatches = [i for i, (e, a) in enumerate(zip(expected, actual)) if e != a]
+    assert not mismatches, f"{len(mismatches)} rows differ, first {mismatches[0]}: " \
+                           f"{expected[mismatches[0]]} != {actual[mismatches[0]]}"
+
+
+def test_training_rows(predictor, training_frame):
+    rng = np.random.default_rng(1)
+    df = training_frame
+    crying = rng.random(len(df)) < 0.5
+    predictions = rng.random(len(df)) < 0.5
+    requests = training_requests(df, crying)
+    expected, weights, heights = reference(predictor, requests, predictions)
+
+    assert_same(expected, vector_outputs(rules.request_columns(requests, weights, heights, predictions)))
+    assert_same(expected, vector_outputs(rules.frame_columns(df, predictions, crying)))
+
+
+def test_threshold_grid(predictor):
+    requests = synthetic_requests(5000)
+    predictions = np.random.default_rng(2).random(len(requests)) < 0.5
+    expected, weights, heights = reference(predictor, requests, predictions)
+
+    assert_same(expected, vector_outputs(rules.request_columns(requests, weights, heights, predictions)))
@@ -0,0 +1,127 @@
+# tests/test_sessions.py - Baby sessions: age, cached metrics, eviction, persistence
+#
+# Run from feeding_AI/Analyze_Services:
+#     python -m pytest tests
+import time
+
+import pytest
+
+import app
+from sessions import DAYS_PER_MONTH, MAX_AGE_MONTHS, BabySession, SessionStore
+
+MONTH_S = DAYS_PER_MONTH * 86400
+READING = {"food_type": "Liquid", "food_quantity_ml": 150, "food_temp_celsius": 37.0, "room_temp_celsius": 22.0}
+
+
+class CountingEstimates:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, age):
+        self.calls.append(age)
+        return app.predictor.estimate_baby_metrics(age)
+
+
+def test_age_advances_and_stops_at_the_model_range():
+    now = time.time()
+    session = BabySession("a", 22, registered_at=now - 1.5 * MONTH_S)
+
+    assert session.current_age(now) == 23
+    assert session.current_age(now + MONTH_S) == MAX_AGE_MONTHS
+    assert session.current_age(now + 60 * MONTH_S) == MAX_AGE_MONTHS
+
+
+def test_derived_metrics_are_computed_once_per_age_month():
+    estimates = CountingEstimates()
+    store = SessionStore(estimates, sweep_seconds=0)
+    session = store.register("a", 6)
+
+    first = store.derived(session)
+    assert store.derived(session) is first
+    assert estimates.calls == [6]
+    assert first["weight_height_ratio"] == pytest.approx(first["weight_kg"] / (first["height_cm"] / 100))
+
+    session.registered_at -= 2 * MONTH_S
+    assert store.derived(session)["age_months"] == 8
+    assert estimates.calls == [6, 8]
+
+
+def test_registered_metrics_are_not_estimated():
+    estimates = CountingEstimates()
+    store = SessionStore(estimates, sweep_seconds=0)
+
+    derived = store.derived(store.register("a", 6, weight_kg=7.5, height_cm=68.0))
+
+    assert (derived["weight_kg"], derived["height_cm"]) == (7.5, 68.0)
+    assert estimates.calls == []
+
+
+def test_least_recently_used_baby_is_evicted():
+    store = SessionStore(CountingEstimates(), max_sessions=2, sweep_seconds=0)
+    store.register("a", 1)
+    store.register("b", 2)
+    store.get("a")
+    store.register("c", 3)
+
+    assert store.get("b") is None
+    assert store.get("a") is not None and store.get("c") is not None
+    assert store.evictions == 1
+
+
+def test_idle_sessions_expire():
+    store = SessionStore(CountingEstimates(), idle_ttl_seconds=60, sweep_seconds=0)
+    store.register("idle", 1).last_seen -= 61
+    store.register("active", 1)
+
+    assert store.sweep() == 1
+    assert list(store.sessions) == ["active"]
+
+
+def test_reregistering_keeps_the_feeding_time():
+    store = SessionStore(CountingEstimates(), sweep_seconds=0)
+    store.register("a", 3, last_feeding_at=time.time() - 90 * 60)
+
+    session = store.register("a", 4)
+
+    assert session.minutes_since_feeding() == 90
+    store.record_feeding("a")
+    assert session.minutes_since_feeding() == 0
+
+
+def test_sessions_persist(tmp_path):
+    path = str(tmp_path / "sessions.json")
+    store = SessionStore(CountingEstimates(), persist_path=path, sweep_seconds=0)
+    store.register("a", 5, weight_kg=7.0, height_cm=65.0, food_type="Liquid", last_feeding_at=1000.0)
+    store.save()
+
+    restored = SessionStore(CountingEstimates(), persist_path=path, sweep_seconds=0)
+    assert restored.load() == 1
+    assert restored.get("a").to_dict() == store.get("a").to_dict()
+
+
+def test_reading_after_the_baby_outgrows_the_model_range(client):
+    client.put("/babies/old", json={"baby_age_months": 24, "food_type": "Liquid"})
+    app.sessions.get("old").registered_at -= 3 * MONTH_S
+
+    response = client.post("/babies/old/readings", json={**READING, "time_since_last_feeding_min": 180})
+
+    assert response.status_code == 200
+    assert client.get("/babies/old").json()["baby_age_months"] == MAX_AGE_MONTHS
+    client.delete("/babies/old")
+
+
+def test_readings_track_the_feeding_interval(client):
+    assert client.put("/babies/b", json={"baby_age_months": 4}).status_code == 200
+
+    missing = client.post("/babies/b/readings", json={**READING})
+    assert missing.status_code == 422
+    assert "No feeding recorded" in missing.json()["detail"]
+
+    fed = client.post("/babies/b/readings", json={**READING, "time_since_last_feeding_min": 200, "fed": True})
+    assert fed.status_code == 200
+    assert fed.json()["feeding_analysis"]["actual_interval_min"] == 200
+
+    assert client.get("/babies/b").json()["minutes_since_last_feeding"] == 0
+    assert client.post("/babies/b/readings", json=READING).json()["feeding_analysis"]["actual_interval_min"] == 0
+    assert client.delete("/babies/b").status_code == 200
+    assert client.get("/babies/b").status_code == 404
@@ -0,0 +1,44 @@
+# tests/test_single_proba.py - Labels from one predict_proba pass match model.predict()
+#
+# Run from feeding_AI/Analyze_Services:
+#     python -m pytest tests
+import numpy as np
+import pytest
+
+from app import FEATURE_COLUMNS, BabyFeedingPredictor, FeedingRequest
+
+
+@pytest.fixture(scope="module")
+def predictor():
+    predictor = BabyFeedingPredictor(engine="sklearn")
+    predictor.activate(predictor.load_bundle())
+    if predictor.feeding_model is None:
+        pytest.skip("model/feeding_model.pkl is not available")
+    return predictor
+
+
+def test_score_matrix_matches_predict(predictor, training_frame):
+    model = predictor.feeding_model
+    X = training_frame[list(model.feature_names_in_)].to_numpy(dtype=np.float64)
+    features = np.zeros((len(X), len(FEATURE_COLUMNS)))
+    features[:, predictor.models.feature_index] = X  # model column order back to FEATURE_COLUMNS
+
+    suitable, confidence = predictor.score_matrix(features)
+
+    expected = [predictor.is_suitable(label) for label in model.predict(X)]
+    assert suitable.tolist() == expected
+    np.testing.assert_allclose(confidence, model.predict_proba(X).max(axis=1))
+
+
+def test_predict_feeding_matches_two_pass_reference(predictor, request_payloads):
+    model = predictor.feeding_model
+    requests = [FeedingRequest(**payload) for payload in request_payloads]
+
+    results = predictor.predict_feeding_many(requests)
+
+    for request, result in zip(requests, results):
+        row, _, _ = predictor.prepare_features(request)
+        X = np.asarray([row], dtype=np.float64)[:, predictor.models.feature_index]
+        assert result.feeding_suitable == predictor.is_suitable(model.predict(X)[0])
+        assert result.confidence == pytest.approx(float(max(model.predict_proba(X)[0])))
+
@@ -0,0 +1,99 @@
+# tests/test_trends.py - Rolling trend windows, alerts and the device readings endpoint
+#
+# A 1 Hz sensor still fills the 10 minute window (readings are averaged
+# into window_seconds / max_samples slots) and raises sustained alerts;
+# the running sums match a NumPy fit over the slots; a reading stamped in
+# the future is rejected without blocking the device.
+# Run from feeding_AI/Analyze_Services:
+#     python -m pytest tests
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from trends import FutureReading, RollingWindow, TrendStore, signal_alerts
+
+START = 1.7e9
+
+
+def feed(window, values, step=1.0):
+    for i, value in enumerate(values):
+        window.push(START + i * step, value)
+
+
+def test_fast_sensor_fills_window():
+    window = RollingWindow(window_seconds=600, max_samples=240)
+    feed(window, [30.0] * 900)
+
+    stats = window.stats()
+    assert stats["samples"] <= 240
+    assert stats["span_seconds"] >= 0.8 * 600
+    assert stats["mean"] == pytest.approx(30.0)
+    codes = [a["code"] for a in signal_alerts("room_temp_celsius", stats, 600)]
+    assert codes == ["room_temp_celsius_high"]
+
+
+def test_fast_sensor_rising_alert():
+    window = RollingWindow(window_seconds=600, max_samples=240)
+    feed(window, [22.0 + 0.01 * i for i in range(900)])  # 0.6 °C per minute
+
+    stats = window.stats()
+    assert stats["slope_per_min"] == pytest.approx(0.6, rel=1e-3)
+    assert "room_temp_celsius_rising" in [a["code"] for a in signal_alerts("room_temp_celsius", stats, 600)]
+
+
+def test_stats_match_numpy_over_slots():
+    rng = np.random.default_rng(0)
+    window = RollingWindow(window_seconds=600, max_samples=240)
+    t = START
+    for _ in range(3000):
+        t += float(rng.uniform(0.1, 6.0))
+        window.push(t, 25.0 + 0.002 * (t - START) + float(rng.normal(0, 0.3)))
+
+    ts, vs = np.array(window.samples()).T
+    slope, _ = np.polyfit(ts - ts[0], vs, 1)
+    stats = window.stats()
+    assert stats["samples"] == len(ts)
+    assert stats["mean"] == pytest.approx(vs.mean(), abs=0.01)
+    assert stats["variance"] == pytest.approx(vs.var(), abs=1e-3)
+    assert stats["slope_per_min"] == pytest.approx(slope * 60, abs=1e-3)
+    assert ts[0] >= t - 600
+
+
+def test_out_of_order_reading_rejected():
+    window = RollingWindow()
+    window.push(START, 25.0)
+    with pytest.raises(ValueError):
+        window.push(START - 1, 25.0)
+
+
+def test_future_reading_leaves_store_untouched():
+    store = TrendStore(max_skew_seconds=60)
+    with pytest.raises(FutureReading):
+        store.record("new", {"room_temp_celsius": 25.0}, time.time() + 3600)
+    assert store.summary("new") is None
+
+    store.record("known", {"room_temp_celsius": 25.0})
+    last_seen = store.devices["known"].last_seen
+    with pytest.raises(FutureReading):
+        store.record("known", {"room_temp_celsius": 25.0}, time.time() + 3600)
+    assert store.devices["known"].last_seen == last_seen
+    assert store.record("known", {"room_temp_celsius": 25.0})["readings"] == 2
+
+
+def test_endpoint_future_then_normal_reading(client):
+    device = "test-trends-skew"
+    future = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+    response = client.post(f"/devices/{device}/readings",
+                           json={"room_temp_celsius": 24.0, "measured_at": future})
+    assert response.status_code == 422
+    assert client.get(f"/devices/{device}/trends").status_code == 404
+
+    response = client.post(f"/devices/{device}/readings", json={"room_temp_celsius": 24.0})
+    assert response.status_code == 200
+    past = (datetime.now(timezone.utc) - timedelta(minutes=5)).isoformat()
+    response = client.post(f"/devices/{device}/readings",
+                           json={"room_temp_celsius": 24.0, "measured_at": past})
+    assert response.status_code == 409
+    client.delete(f"/devices/{device}")
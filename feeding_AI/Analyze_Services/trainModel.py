@@ -1,25 +1,63 @@
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-from sklearn.metrics import accuracy_score, classification_report
-import joblib
+import argparse
+import json
+import warnings
 import os
 import numpy as np
+import time
 from datetime import datetime
+from forest_engine import FlatForest
+# sklearn, joblib, pandas, records (pyarrow) and tuning are imported in the
+# methods that use them, so importing this module (incremental.py, the
+# benchmarks) does not pay for them
+
+# Features for feeding prediction
+FEEDING_FEATURES = [
+    "BabyAgeMonths", "BabyWeightKg", "BabyHeightCm", 
+    "FoodTypeEncoded", "FoodQuantityML", "FoodTempCelsius", 
+    "RoomTempCelsius", "TimeSinceLastFeedingMin",
+    "WeightHeightRatio", "FeedingFrequency"
+]
+CRY_FEATURES = FEEDING_FEATURES + ["SuitableFoodEncoded"]
+
+# Cry label: BabyCrying if recorded, otherwise the workbook's BabyCriedAfterFeed
+CRY_TARGETS = ["BabyCrying", "BabyCriedAfterFeed"]
+
+# The API scores the cry model on every request after the feeding model, so
+# it uses a small forest (chosen from the `search` leaderboard for latency)
+CRY_MODEL_PARAMS = {"n_estimators": 25, "max_depth": 16}
+
+# Feeding rows held out of training; the API's reload gate (HOLDOUT_FILE)
+# scores every new model version on them
+HOLDOUT_PATH = "model/holdout.parquet"
+
+# Training data when no record store exists yet; create one with
+# python records.py convert data/baby_feeding_data_2000.xlsx data/feedings
+WORKBOOK = "data/baby_feeding_data_2000.xlsx"
 
 class BabyFeedingPredictor:
     def __init__(self):
+        from sklearn.preprocessing import LabelEncoder, StandardScaler
         self.feeding_model = None
         self.cry_model = None
         self.food_encoder = LabelEncoder()
         self.scaler = StandardScaler()
         self.model_trained = False
         
-    def prepare_data(self, df):
+    def prepare_data(self, df, fit_encoder=True):
         """Prepare and encode the data"""
-        # Encode categorical variables
-        df["FoodTypeEncoded"] = self.food_encoder.fit_transform(df["FoodType"])
+        import pandas as pd
+        # Encode categorical variables; incremental updates reuse the fitted encoder
+        if fit_encoder:
+            df["FoodTypeEncoded"] = self.food_encoder.fit_transform(df["FoodType"])
+        else:
+            df["FoodTypeEncoded"] = self.food_encoder.transform(df["FoodType"])
+        
+        # Records without measurements get the same age-based estimate the API uses
+        age = df["BabyAgeMonths"].astype(np.float64)
+        est_weight = pd.Series(np.where(age <= 12, 3.5 + age * 0.6, 3.5 + 12 * 0.6 + (age - 12) * 0.3), index=df.index)
+        est_height = pd.Series(np.where(age <= 12, 50 + age * 2.5, 50 + 12 * 2.5 + (age - 12) * 1.2), index=df.index)
+        df["BabyWeightKg"] = df["BabyWeightKg"].fillna(est_weight) if "BabyWeightKg" in df else est_weight
+        df["BabyHeightCm"] = df["BabyHeightCm"].fillna(est_height) if "BabyHeightCm" in df else est_height
         
         # Create BMI-like metric for babies (weight/height ratio)
         df["WeightHeightRatio"] = df["BabyWeightKg"] / (df["BabyHeightCm"] / 100)
@@ -27,24 +65,46 @@ class BabyFeedingPredictor:
         # Calculate feeding frequency (feeds per day based on time since last feeding)
         df["FeedingFrequency"] = 24 * 60 / df["TimeSinceLastFeedingMin"]
         
+        # The cry model takes feeding suitability as a numeric input
+        if "SuitableFood" in df:
+            df["SuitableFoodEncoded"] = df["SuitableFood"].astype(str).str.lower().isin(["yes", "true", "1"]).astype(int)
+        
         return df
     
-    def train_models(self, excel_file_path):
+    def load_training_data(self, data_path):
+        """Read data_path; returns (df, parts) where parts lists the RecordStore parts read, if any"""
+        from records import RecordStore, read_records
+        if os.path.isdir(data_path):
+            store = RecordStore(data_path)
+            parts = store.parts()
+            return store.read(parts), parts
+        if not os.path.exists(data_path):
+            print(f"{data_path} not found, training on {WORKBOOK}.")
+            data_path = WORKBOOK
+        return read_records(data_path), None
+    
+    def cry_target(self, df):
+        return next((column for column in CRY_TARGETS if column in df.columns), None)
+    
+    def mark_trained(self, data_path, parts, rows_seen):
+        """Let incremental updates (incremental.py) continue from the parts trained on here"""
+        if parts is not None:
+            from incremental import IncrementalTrainer  # imports this module
+            from records import RecordStore
+            IncrementalTrainer(RecordStore(data_path)).save_state({"trained_parts": parts, "rows_seen": rows_seen})
+    
+    def train_models(self, data_path="data/feedings"):
         """Train both feeding suitability and cry prediction models"""
-        # Load data
-        df = pd.read_excel(excel_file_path)
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.metrics import accuracy_score, classification_report
+        from sklearn.model_selection import train_test_split
+        # Load data: a RecordStore directory (see records.py) or a single file
+        df, parts = self.load_training_data(data_path)
         print("Columns in your data:", df.columns.tolist())
         
         # Prepare data
         df = self.prepare_data(df)
-        
-        # Features for feeding prediction
-        feeding_features = [
-            "BabyAgeMonths", "BabyWeightKg", "BabyHeightCm", 
-            "FoodTypeEncoded", "FoodQuantityML", "FoodTempCelsius", 
-            "RoomTempCelsius", "TimeSinceLastFeedingMin",
-            "WeightHeightRatio", "FeedingFrequency"
-        ]
+        feeding_features = FEEDING_FEATURES
         
         # Train feeding suitability model
         X_feeding = df[feeding_features]
@@ -54,8 +114,10 @@ class BabyFeedingPredictor:
             X_feeding, y_feeding, test_size=0.2, random_state=42
         )
         
-        self.feeding_model = RandomForestClassifier(n_estimators=100, random_state=42)
+        # Fit on all cores; serving predicts one row at a time, where threads only add overhead
+        self.feeding_model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)
         self.feeding_model.fit(X_train_f, y_train_f)
+        self.feeding_model.set_params(n_jobs=None)
         
         # Evaluate feeding model
         pred_feeding = self.feeding_model.predict(X_test_f)
@@ -63,34 +125,235 @@ class BabyFeedingPredictor:
         print("Accuracy:", accuracy_score(y_test_f, pred_feeding))
         print(classification_report(y_test_f, pred_feeding))
         
-        # Train cry prediction model (if BabyCrying column exists)
-        if "BabyCrying" in df.columns:
-            cry_features = feeding_features + ["SuitableFood"]
-            X_cry = df[cry_features]
-            y_cry = df["BabyCrying"]
-            
-            X_train_c, X_test_c, y_train_c, y_test_c = train_test_split(
-                X_cry, y_cry, test_size=0.2, random_state=42
-            )
-            
-            self.cry_model = RandomForestClassifier(n_estimators=100, random_state=42)
-            self.cry_model.fit(X_train_c, y_train_c)
-            
-            pred_cry = self.cry_model.predict(X_test_c)
-            print("\\n=== BABY CRYING PREDICTION MODEL ===")
-            print("Accuracy:", accuracy_score(y_test_c, pred_cry))
-            print(classification_report(y_test_c, pred_cry))
+        # Train cry prediction model (if a cry label exists)
+        self.train_cry_model(df)
         
         self.model_trained = True
         
-        # Save models
+        # Save models, and the test rows for the API's reload gate
         self.save_models()
+        self.save_holdout(df.loc[X_test_f.index])
+        self.mark_trained(data_path, parts, len(X_train_f))
         
         # Show feature importance
         self.show_feature_importance(feeding_features)
     
+    def train_cry_model(self, df):
+        """Fit the cry model on prepared data, if it has a cry label"""
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.metrics import accuracy_score, classification_report
+        from sklearn.model_selection import train_test_split
+        cry_target = self.cry_target(df)
+        if not cry_target:
+            return
+        X_cry = df[CRY_FEATURES]
+        y_cry = df[cry_target]
+        
+        X_train_c, X_test_c, y_train_c, y_test_c = train_test_split(
+            X_cry, y_cry, test_size=0.2, random_state=42
+        )
+        
+        self.cry_model = RandomForestClassifier(random_state=42, n_jobs=-1, **CRY_MODEL_PARAMS)
+        self.cry_model.fit(X_train_c, y_train_c)
+        self.cry_model.set_params(n_jobs=None)
+        
+        pred_cry = self.cry_model.predict(X_test_c)
+        print("\\n=== BABY CRYING PREDICTION MODEL ===")
+        print("Accuracy:", accuracy_score(y_test_c, pred_cry))
+        print(classification_report(y_test_c, pred_cry))
+    
+    def train_cry_only(self, data_path="data/feedings"):
+        """Retrain only the cry model against the saved food encoder"""
+        import joblib
+        self.food_encoder = joblib.load("model/food_type_encoder.pkl")
+        df, _ = self.load_training_data(data_path)
+        self.train_cry_model(self.prepare_data(df, fit_encoder=False))
+        if self.cry_model:
+            joblib.dump(self.cry_model, "model/cry_model.pkl")
+            print("Cry model saved in model/ folder.")
+    
+    def search_models(self, data_path="data/feedings", folds=5, n_jobs=-1,
+                      leaderboard_path="model/leaderboard.csv", max_latency_ms=None, save=False):
+        """k-fold hyperparameter search for both models; writes a leaderboard.
+        
+        With save, the best candidate within max_latency_ms is refitted on
+        all rows and saved. The cry labels are imbalanced, so the cry model
+        is ranked by balanced accuracy.
+        """
+        import pandas as pd
+        from sklearn.ensemble import RandomForestClassifier
+        import tuning
+        df, parts = self.load_training_data(data_path)
+        df = self.prepare_data(df)
+        
+        targets = [("feeding_model", FEEDING_FEATURES, "SuitableFood", "accuracy")]
+        cry_target = self.cry_target(df)
+        if cry_target:
+            targets.append(("cry_model", CRY_FEATURES, cry_target, "balanced_accuracy"))
+        
+        boards = []
+        for name, features, target, metric in targets:
+            started = time.perf_counter()
+            X = tuning.feature_matrix(df, features)
+            board = tuning.search(X, df[target].astype(str).to_numpy(), folds=folds, n_jobs=n_jobs, metric=metric)
+            print(f"\n=== {name.upper()} ({len(board)} candidates x {folds} folds, "
+                  f"{time.perf_counter() - started:.1f}s, ranked by {metric}) ===")
+            print(board.head(10).to_string(index=False))
+            board.insert(0, "model", name)
+            boards.append(board)
+            
+            if save:
+                params = tuning.select(board, metric, max_latency_ms)
+                model = RandomForestClassifier(random_state=42, n_jobs=-1, **params)
+                model.fit(df[features], df[target])
+                model.set_params(n_jobs=None)
+                setattr(self, name, model)
+                print(f"Selected {name}: {params}")
+        
+        os.makedirs(os.path.dirname(leaderboard_path) or ".", exist_ok=True)
+        pd.concat(boards, ignore_index=True).to_csv(leaderboard_path, index=False)
+        print(f"\nLeaderboard written to {leaderboard_path}.")
+        
+        if save:
+            self.model_trained = True
+            self.save_models()
+            self.save_holdout(None)
+            self.mark_trained(data_path, parts, len(df))
+    
+    def compress_model(self, model, X_select, y_select, max_accuracy_loss=0.005, min_trees=10):
+        """Shrink a fitted forest while accuracy on the selection rows stays within budget.
+        
+        Thresholds always become float32 (rounded so no branch changes). Then,
+        each kept only while accuracy >= baseline - max_accuracy_loss:
+        greedy forward tree selection (fewest trees, ties to smaller trees),
+        the shallowest depth cap, the largest leaf-merge tolerance and uint16
+        leaf values. Returns the compressed FlatForest and a log of the steps.
+        """
+        y_select = np.asarray(y_select)
+        forest = FlatForest.from_sklearn(model).quantize("float32")
+        
+        def accuracy(candidate):
+            return float((candidate.predict(X_select) == y_select).mean())
+        
+        def log(step, candidate):
+            steps.append({"step": step, "trees": int(candidate.n_trees), "nodes": int(len(candidate.feature)),
+                          "max_depth": int(candidate.max_depth), "bytes": int(candidate.nbytes()),
+                          "accuracy": accuracy(candidate)})
+        
+        steps = []
+        log("float32", forest)
+        floor = steps[0]["accuracy"] - max_accuracy_loss
+        
+        # Greedy forward selection on soft votes, as the full forest scores them
+        proba = forest.tree_proba(X_select)
+        sizes = np.diff(np.append(forest.roots, len(forest.feature)))
+        chosen, votes = [], np.zeros((len(y_select), proba.shape[2]))
+        remaining = list(range(forest.n_trees))
+        while remaining:
+            scores = [(forest.classes_[(votes + proba[:, t]).argmax(axis=1)] == y_select).mean() for t in remaining]
+            best = max(range(len(remaining)), key=lambda i: (scores[i], -sizes[remaining[i]]))
+            tree = remaining.pop(best)
+            chosen.append(tree)
+            votes += proba[:, tree]
+            if len(chosen) >= min_trees and scores[best] >= floor:
+                break
+        forest = forest.subset(chosen)
+        log("select_trees", forest)
+        
+        for depth in range(1, forest.max_depth):
+            capped = forest.cap_depth(depth)
+            if accuracy(capped) >= floor:
+                forest = capped
+                log(f"cap_depth_{depth}", forest)
+                break
+        
+        for tolerance in (0.5, 0.25, 0.1, 0.05, 0.01):
+            merged = forest.merge_leaves(tolerance)
+            if len(merged.feature) < len(forest.feature) and accuracy(merged) >= floor:
+                forest = merged
+                log(f"merge_leaves_{tolerance}", forest)
+                break
+        
+        packed = forest.quantize("uint16")
+        if accuracy(packed) >= floor:
+            forest = packed
+            log("uint16_values", forest)
+        return forest, steps
+    
+    def compression_report(self, model_path, model, compressed_dir, X, y):
+        """Size, load time, latency and accuracy of a pickle vs its compressed bundle"""
+        import joblib
+        import tuning
+        compressed = FlatForest.load(compressed_dir, mmap=False)
+        y = np.asarray(y)
+        with warnings.catch_warnings():
+            # The pickles were fitted on DataFrames; the API also passes plain arrays
+            warnings.simplefilter("ignore", UserWarning)
+            report = {}
+            for name, scorer, size, load in (
+                ("original", model, os.path.getsize(model_path), lambda: joblib.load(model_path)),
+                ("compressed", compressed,
+                 sum(os.path.getsize(os.path.join(compressed_dir, f)) for f in os.listdir(compressed_dir)),
+                 lambda: FlatForest.load(compressed_dir, mmap=False))):
+                report[name] = {
+                    "bytes": size,
+                    "load_ms": round(tuning.median_ms(load, repeat=5), 2),
+                    "single_row_ms": round(tuning.median_ms(scorer.predict_proba, X[:1]), 3),
+                    "batch_ms": round(tuning.median_ms(scorer.predict_proba, X, repeat=20), 3),
+                    "accuracy": float((scorer.predict(X) == y).mean()),
+                }
+        report["accuracy_delta"] = report["compressed"]["accuracy"] - report["original"]["accuracy"]
+        report["rows"] = len(y)
+        return report
+    
+    def compress_models(self, data_path="data/feedings", model_dir="model", max_accuracy_loss=0.005):
+        """Write <model>_compressed/ next to each saved forest, with a report.json.
+        
+        train_models holds out 20% of the rows (random_state=42); half of
+        them pick the compression, the other half are used for the report.
+        Models fitted on all rows (search --save) have no unseen rows, so
+        their reported accuracy is optimistic.
+        """
+        import joblib
+        from sklearn.model_selection import train_test_split
+        self.food_encoder = joblib.load(os.path.join(model_dir, "food_type_encoder.pkl"))
+        df, _ = self.load_training_data(data_path)
+        df = self.prepare_data(df, fit_encoder=False)
+        _, held_out = train_test_split(np.arange(len(df)), test_size=0.2, random_state=42)
+        select_rows, report_rows = train_test_split(held_out, test_size=0.5, random_state=0)
+        
+        reports = {}
+        for name, target in (("feeding_model", "SuitableFood"), ("cry_model", self.cry_target(df))):
+            path = os.path.join(model_dir, f"{name}.pkl")
+            if not target or not os.path.exists(path) or os.path.getsize(path) == 0:
+                continue
+            model = joblib.load(path)
+            X = df[list(model.feature_names_in_)].to_numpy(dtype=np.float64)
+            y = df[target].astype(str).to_numpy()
+            forest, steps = self.compress_model(model, X[select_rows], y[select_rows], max_accuracy_loss)
+            output = os.path.join(model_dir, f"{name}_compressed")
+            forest.save(output)
+            report = self.compression_report(path, model, output, X[report_rows], y[report_rows])
+            report.update({"max_accuracy_loss": max_accuracy_loss, "steps": steps})
+            with open(os.path.join(output, "report.json"), "w") as f:
+                json.dump(report, f, indent=2)
+            reports[name] = report
+            
+            print(f"\n=== {name.upper()} COMPRESSION (budget {max_accuracy_loss:.3f}) ===")
+            for step in steps:
+                print(f"{step['step']:<20} trees {step['trees']:>4}  nodes {step['nodes']:>6}  "
+                      f"depth {step['max_depth']:>3}  {step['bytes'] / 1024:>8.1f} KB  accuracy {step['accuracy']:.4f}")
+            for key in ("original", "compressed"):
+                r = report[key]
+                print(f"{key:<11} {r['bytes'] / 1024:>8.1f} KB  load {r['load_ms']:>7.2f} ms  "
+                      f"1 row {r['single_row_ms']:>7.3f} ms  {report['rows']} rows {r['batch_ms']:>8.3f} ms  "
+                      f"accuracy {r['accuracy']:.4f}")
+            print(f"accuracy delta on {report['rows']} unseen rows: {report['accuracy_delta']:+.4f}")
+        return reports
+    
     def show_feature_importance(self, feature_names):
         """Display feature importance for feeding model"""
+        import pandas as pd
         if self.feeding_model:
             importance = self.feeding_model.feature_importances_
             feature_importance = pd.DataFrame({
@@ -130,9 +393,10 @@ class BabyFeedingPredictor:
             weight_height_ratio, feeding_frequency
         ]])
         
-        # Predict feeding suitability
-        feeding_prediction = self.feeding_model.predict(feeding_input)[0]
+        # Predict feeding suitability; the label is the argmax of the same
+        # probability pass, so the forest is only evaluated once
         feeding_probability = self.feeding_model.predict_proba(feeding_input)[0]
+        feeding_prediction = self.feeding_model.classes_[np.argmax(feeding_probability)]
         
         # Prepare results
         results = {
@@ -240,15 +504,29 @@ class BabyFeedingPredictor:
     
     def save_models(self):
         """Save trained models and encoders"""
+        import joblib
         os.makedirs("model", exist_ok=True)
         joblib.dump(self.feeding_model, "model/feeding_model.pkl")
+        # Flat .npy bundle that serving workers memory-map (MODEL_FORMAT=flat)
+        FlatForest.from_sklearn(self.feeding_model).save("model/feeding_model_flat")
         joblib.dump(self.food_encoder, "model/food_type_encoder.pkl")
         if self.cry_model:
             joblib.dump(self.cry_model, "model/cry_model.pkl")
         print("Models saved in model/ folder.")
     
+    def save_holdout(self, df):
+        """Write the feeding model's unseen rows to HOLDOUT_PATH; None removes the file"""
+        from records import write_holdout
+        if df is not None:
+            print(f"{write_holdout(df, HOLDOUT_PATH)} held-out rows saved to {HOLDOUT_PATH}.")
+        elif os.path.exists(HOLDOUT_PATH):
+            # Refitted on every row: a stale holdout would be scored in-sample
+            os.remove(HOLDOUT_PATH)
+            print(f"Removed {HOLDOUT_PATH}; the model saw every row, so the API's reload gate is skipped.")
+    
     def load_models(self):
         """Load pre-trained models"""
+        import joblib
         try:
             self.feeding_model = joblib.load("model/feeding_model.pkl")
             self.food_encoder = joblib.load("model/food_type_encoder.pkl")
@@ -261,11 +539,35 @@ class BabyFeedingPredictor:
 
 # Example usage
 def main():
+    parser = argparse.ArgumentParser(description="Train the feeding and cry models")
+    parser.add_argument("--data", default="data/feedings", help="RecordStore directory or data file")
+    commands = parser.add_subparsers(dest="command")
+    train = commands.add_parser("train", help="Fit both models with the default settings")
+    train.add_argument("--cry-only", action="store_true", help="Retrain only model/cry_model.pkl")
+    search = commands.add_parser("search", help="k-fold hyperparameter search with a speed/accuracy leaderboard")
+    search.add_argument("--folds", type=int, default=5)
+    search.add_argument("--jobs", type=int, default=-1, help="Parallel fits (-1: all cores)")
+    search.add_argument("--leaderboard", default="model/leaderboard.csv")
+    search.add_argument("--max-latency-ms", type=float, help="Latency budget when picking the models to save")
+    search.add_argument("--save", action="store_true", help="Refit the selected candidates on all rows and save them")
+    compress = commands.add_parser("compress", help="Shrink the saved forests within an accuracy-loss budget")
+    compress.add_argument("--max-accuracy-loss", type=float, default=0.005)
+    compress.add_argument("--model-dir", default="model")
+    args = parser.parse_args()
+    
     # Initialize the predictor
     predictor = BabyFeedingPredictor()
     
-    # Train models (uncomment when you have the data file)
-    # predictor.train_models("data/baby_feeding_data_2000.xlsx")
+    # Train models: python trainModel.py train | search [--save] | compress
+    if args.command == "train" and args.cry_only:
+        predictor.train_cry_only(args.data)
+    elif args.command == "train":
+        predictor.train_models(args.data)
+    elif args.command == "search":
+        predictor.search_models(args.data, args.folds, args.jobs, args.leaderboard,
+                                args.max_latency_ms, args.save)
+    elif args.command == "compress":
+        predictor.compress_models(args.data, args.model_dir, args.max_accuracy_loss)
     
     # Or load pre-trained models
     # predictor.load_models()
@@ -0,0 +1,325 @@
+# trends.py - Per-device rolling statistics and sustained-trend alerts for temperature readings
+import asyncio
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+import rules
+
+# Signal -> (label, low, high). The limits are the ones rules.py applies to
+# single readings, so a trend alert and a per-reading reason agree.
+SIGNALS = {
+    "room_temp_celsius": ("Room", rules.ROOM_TEMP_COMFORTABLE[0], rules.ROOM_TEMP_WARM),
+    "food_temp_celsius": ("Food", *rules.FOOD_TEMP_IDEAL),
+}
+
+MIN_SAMPLES = 5        # fewer readings in the window never raise an alert
+MIN_COVERAGE = 0.8     # readings must span this fraction of the window to count as sustained
+MIN_SLOPE_PER_MIN = 0.1  # degrees per minute for a rising/falling alert
+MIN_R2 = 0.5           # how much of the variance the linear trend must explain
+
+
+class FutureReading(ValueError):
+    """A reading's measured_at is further ahead of the server clock than max_skew_seconds allows"""
+
+
+class RollingWindow:
+    """Readings of one signal from the last window_seconds, in at most max_samples slots.
+
+    The window is cut into max_samples intervals of bucket_seconds, and a
+    slot holds the mean time and value of the readings in one interval, so
+    a sensor faster than one reading per bucket_seconds still fills the
+    whole window (and every interval weighs the same in the stats).
+    Slots live in preallocated ring buffers of C doubles (24 bytes each).
+    Running sums of t, v, t², v² and tv are updated on every push, merge
+    and eviction, so mean, variance and the least-squares slope cost O(1)
+    per reading. t and v are kept relative to an origin that is moved to
+    the oldest sample on a resync, which also recomputes the sums from the
+    buffer to shed rounding drift; resyncs happen once per max_samples
+    evictions, so the amortized cost stays O(1).
+    """
+
+    __slots__ = ("window_seconds", "size", "bucket_seconds", "times", "values", "weights", "start", "count",
+                 "t0", "v0", "st", "sv", "stt", "svv", "stv", "evictions", "latest", "latest_bucket")
+
+    def __init__(self, window_seconds=600.0, max_samples=240):
+        self.window_seconds = window_seconds
+        self.size = max(2, max_samples)
+        self.bucket_seconds = window_seconds / self.size
+        self.times = array("d", [0.0]) * self.size  # relative to t0
+        self.values = array("d", [0.0]) * self.size  # relative to v0
+        self.weights = array("d", [0.0]) * self.size  # readings averaged into each slot
+        self.start = 0
+        self.count = 0
+        self.t0 = self.v0 = None
+        self.st = self.sv = self.stt = self.svv = self.stv = 0.0
+        self.evictions = 0
+        self.latest = None  # absolute time of the newest reading
+        self.latest_bucket = None  # interval number of the newest slot
+
+    def push(self, at, value):
+        if self.latest is not None and at < self.latest:
+            raise ValueError("Reading is older than the device's latest reading")
+        self.latest = at
+        self.expire(at)
+        bucket = int(at // self.bucket_seconds) if self.bucket_seconds > 0 else None
+        if self.count and bucket is not None and bucket == self.latest_bucket:
+            self.merge(at, value)
+            return
+        self.latest_bucket = bucket
+        if self.count == self.size:
+            self.pop()
+        if self.count == 0 or at - self.t0 > 4 * self.window_seconds:
+            self.resync(at, value)
+        t, v = at - self.t0, value - self.v0
+        i = (self.start + self.count) % self.size
+        self.times[i], self.values[i], self.weights[i] = t, v, 1.0
+        self.count += 1
+        self.st += t
+        self.sv += v
+        self.stt += t * t
+        self.svv += v * v
+        self.stv += t * v
+
+    def merge(self, at, value):
+        """Fold a reading into the newest slot's running mean"""
+        i = (self.start + self.count - 1) % self.size
+        t, v, n = self.times[i], self.values[i], self.weights[i]
+        new_t = t + (at - self.t0 - t) / (n + 1)
+        new_v = v + (value - self.v0 - v) / (n + 1)
+        self.times[i], self.values[i], self.weights[i] = new_t, new_v, n + 1
+        self.st += new_t - t
+        self.sv += new_v - v
+        self.stt += new_t * new_t - t * t
+        self.svv += new_v * new_v - v * v
+        self.stv += new_t * new_v - t * v
+
+    def expire(self, now):
+        """Drop samples older than window_seconds before now"""
+        cutoff = now - self.window_seconds
+        while self.count and self.t0 + self.times[self.start] < cutoff:
+            self.pop()
+
+    def pop(self):
+        t, v = self.times[self.start], self.values[self.start]
+        self.start = (self.start + 1) % self.size
+        self.count -= 1
+        self.st -= t
+        self.sv -= v
+        self.stt -= t * t
+        self.svv -= v * v
+        self.stv -= t * v
+        self.evictions += 1
+        if self.evictions % self.size == 0 and self.count:
+            self.resync()
+
+    def samples(self):
+        """(t, v) slot means, oldest first, absolute"""
+        return [(self.t0 + self.times[(self.start + i) % self.size],
+                 self.v0 + self.values[(self.start + i) % self.size]) for i in range(self.count)]
+
+    def resync(self, at=None, value=None):
+        """Move the origin to the oldest sample (or to at/value when empty) and recompute the sums"""
+        samples = self.samples() if self.count else []
+        weights = [self.weights[(self.start + i) % self.size] for i in range(self.count)]
+        self.t0, self.v0 = samples[0] if samples else (at, value)
+        self.start = 0
+        self.st = self.sv = self.stt = self.svv = self.stv = 0.0
+        for i, ((t, v), n) in enumerate(zip(samples, weights)):
+            t, v = t - self.t0, v - self.v0
+            self.times[i], self.values[i], self.weights[i] = t, v, n
+            self.st += t
+            self.sv += v
+            self.stt += t * t
+            self.svv += v * v
+            self.stv += t * v
+
+    def stats(self):
+        n = self.count
+        if not n:
+            return {"samples": 0}
+        mean_t, mean_v = self.st / n, self.sv / n
+        var_t = max(0.0, self.stt / n - mean_t * mean_t)
+        var_v = max(0.0, self.svv / n - mean_v * mean_v)
+        cov = self.stv / n - mean_t * mean_v
+        slope = cov / var_t if var_t > 0 else 0.0  # per second
+        r2 = min(1.0, cov * cov / (var_t * var_v)) if var_t > 0 and var_v > 0 else 0.0
+        newest = self.times[(self.start + n - 1) % self.size]
+        return {
+            "samples": n,
+            "span_seconds": round(newest - self.times[self.start], 1),
+            "latest": round(self.v0 + self.values[(self.start + n - 1) % self.size], 2),
+            "mean": round(self.v0 + mean_v, 2),
+            "variance": round(var_v, 4),
+            "slope_per_min": round(slope * 60, 4),
+            "r2": round(r2, 3),
+            # value of the fitted line at the newest reading: the trend without the last blip
+            "trend_value": round(self.v0 + mean_v + slope * (newest - mean_t), 2),
+        }
+
+
+def signal_alerts(signal, stats, window_seconds):
+    """Sustained out-of-range and trend alerts for one signal's window stats"""
+    label, low, high = SIGNALS[signal]
+    if stats["samples"] < MIN_SAMPLES or stats["span_seconds"] < MIN_COVERAGE * window_seconds:
+        return []
+    minutes = round(window_seconds / 60)
+    alerts = []
+    if stats["mean"] > high:
+        alerts.append((f"{signal}_high", f"{label} has averaged {stats['mean']:.1f}°C over the last "
+                                         f"{minutes} minutes (above {high}°C)"))
+    elif stats["mean"] < low:
+        alerts.append((f"{signal}_low", f"{label} has averaged {stats['mean']:.1f}°C over the last "
+                                        f"{minutes} minutes (below {low}°C)"))
+    slope, trend = stats["slope_per_min"], stats["trend_value"]
+    if stats["r2"] >= MIN_R2 and abs(slope) >= MIN_SLOPE_PER_MIN:
+        if slope > 0 and trend > high:
+            alerts.append((f"{signal}_rising", f"{label} is warming past {high}°C: {trend:.1f}°C and "
+                                               f"rising {slope * 10:.1f}°C per 10 minutes"))
+        elif slope < 0 and trend < low:
+            alerts.append((f"{signal}_falling", f"{label} is cooling below {low}°C: {trend:.1f}°C and "
+                                                f"falling {-slope * 10:.1f}°C per 10 minutes"))
+    return [{"code": code, "signal": signal, "message": message} for code, message in alerts]
+
+
+class DeviceTrends:
+    """One RollingWindow per signal for a single device"""
+
+    def __init__(self, device_id, window_seconds, max_samples):
+        self.device_id = device_id
+        self.window_seconds = window_seconds
+        self.windows = {signal: RollingWindow(window_seconds, max_samples) for signal in SIGNALS}
+        self.readings = 0
+        self.last_seen = time.monotonic()
+
+    def add(self, at, values):
+        """Push the signals present in values; all-or-nothing on out-of-order readings"""
+        present = {signal: value for signal, value in values.items() if value is not None}
+        for signal in present:
+            latest = self.windows[signal].latest
+            if latest is not None and at < latest:
+                raise ValueError("Reading is older than the device's latest reading")
+        for signal, value in present.items():
+            self.windows[signal].push(at, float(value))
+        self.readings += 1
+
+    def summary(self):
+        """Stats and alerts as of each window's newest reading.
+
+        Read-only: windows are only evicted by add(), against the reading's
+        own measured_at, so a device whose clock lags the server's (or a
+        replayed batch) keeps its window between reads.
+        """
+        signals, alerts = {}, []
+        for signal, window in self.windows.items():
+            stats = window.stats()
+            signals[signal] = stats
+            if stats["samples"]:
+                alerts.extend(signal_alerts(signal, stats, self.window_seconds))
+        return {"device_id": self.device_id, "readings": self.readings,
+                "window_seconds": self.window_seconds, "signals": signals, "alerts": alerts}
+
+
+class TrendStore:
+    """Bounded map of DeviceTrends with idle eviction, like sessions.SessionStore.
+
+    Each device holds at most max_samples readings per signal, and at most
+    max_devices devices are kept (least recently used go first), so memory
+    is bounded whatever the readings rate. Devices that send nothing for
+    idle_ttl_seconds are dropped by sweep(). A reading stamped more than
+    max_skew_seconds after the server's clock raises FutureReading, since
+    it would make every later reading from the device look out of order.
+    """
+
+    def __init__(self, window_seconds=600.0, max_samples=240, max_devices=10000,
+                 idle_ttl_seconds=3600.0, sweep_seconds=60.0, max_skew_seconds=60.0):
+        self.window_seconds = window_seconds
+        self.max_samples = max_samples
+        self.max_devices = max(1, max_devices)
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.sweep_seconds = sweep_seconds
+        self.max_skew_seconds = max_skew_seconds
+        self.sweep_task = None
+        self.devices = OrderedDict()
+        self.lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def record(self, device_id, values, at=None):
+        """Add one reading ({signal: value}) and return the device's summary.
+
+        Raises FutureReading, or ValueError for a reading older than the
+        device's latest; a rejected reading does not count as activity.
+        """
+        now = time.time()
+        if at is None:
+            at = now
+        elif at > now + self.max_skew_seconds:
+            raise FutureReading(f"Reading is {at - now:.0f}s ahead of the server clock "
+                                f"(at most {self.max_skew_seconds:.0f}s allowed)")
+        with self.lock:
+            device = self.devices.get(device_id)
+            if device is None:
+                device = DeviceTrends(device_id, self.window_seconds, self.max_samples)
+                device.add(at, values)
+                self.devices[device_id] = device
+                while len(self.devices) > self.max_devices:
+                    self.devices.popitem(last=False)
+                    self.evictions += 1
+            else:
+                device.add(at, values)
+                self.devices.move_to_end(device_id)
+            device.last_seen = time.monotonic()
+            return device.summary()
+
+    def summary(self, device_id):
+        with self.lock:
+            device = self.devices.get(device_id)
+            return None if device is None else device.summary()
+
+    def remove(self, device_id):
+        with self.lock:
+            return self.devices.pop(device_id, None) is not None
+
+    def sweep(self):
+        """Drop devices idle for longer than idle_ttl_seconds"""
+        if not self.idle_ttl_seconds:
+            return 0
+        cutoff = time.monotonic() - self.idle_ttl_seconds
+        with self.lock:
+            idle = [device_id for device_id, d in self.devices.items() if d.last_seen < cutoff]
+            for device_id in idle:
+                del self.devices[device_id]
+            self.expirations += len(idle)
+        return len(idle)
+
+    async def run_sweeps(self):
+        while True:
+            await asyncio.sleep(self.sweep_seconds)
+            self.sweep()
+
+    def start(self):
+        if self.sweep_seconds > 0 and self.sweep_task is None:
+            self.sweep_task = asyncio.get_running_loop().create_task(self.run_sweeps())
+
+    async def stop(self):
+        if self.sweep_task is not None:
+            self.sweep_task.cancel()
+            try:
+                await self.sweep_task
+            except asyncio.CancelledError:
+                pass
+            self.sweep_task = None
+
+    def stats(self):
+        return {
+            "devices": len(self.devices),
+            "max_devices": self.max_devices,
+            "window_seconds": self.window_seconds,
+            "max_samples": self.max_samples,
+            "idle_ttl_seconds": self.idle_ttl_seconds,
+            "max_skew_seconds": self.max_skew_seconds,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
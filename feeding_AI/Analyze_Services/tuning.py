@@ -0,0 +1,102 @@
+# tuning.py - Cross-validated forest search ranked by accuracy and serving latency
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import GridSearchCV, StratifiedKFold
+
+# Tree count, depth and leaf size: the knobs that trade accuracy for latency and size
+PARAM_GRID = {
+    "n_estimators": [25, 50, 100, 200],
+    "max_depth": [8, 16, None],
+    "min_samples_leaf": [1, 5, 20],
+}
+
+
+def feature_matrix(df, features):
+    """float32, C-ordered matrix the trees use without converting it again.
+
+    Built once per model and shared by every fold and candidate; joblib
+    memory-maps it into the worker processes instead of pickling copies.
+    """
+    return np.ascontiguousarray(df[features].to_numpy(dtype=np.float32))
+
+
+def median_ms(fn, *args, repeat=200):
+    """Median wall time of fn(*args) in milliseconds, after one warm-up call"""
+    fn(*args)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples))
+
+
+def single_row_latency_ms(model, row, repeat=200):
+    """Median predict_proba time for one row, the /analyze hot path"""
+    return median_ms(model.predict_proba, row, repeat=repeat)
+
+
+def pareto_front(scores, costs):
+    """True for candidates no other candidate beats on score without costing more"""
+    scores, costs = np.asarray(scores), np.asarray(costs)
+    dominated = [((scores >= s) & (costs <= c) & ((scores > s) | (costs < c))).any()
+                 for s, c in zip(scores, costs)]
+    return ~np.array(dominated, dtype=bool)
+
+
+def _fit(params, X, y, random_state):
+    return RandomForestClassifier(random_state=random_state, **params).fit(X, y)
+
+
+def search(X, y, param_grid=PARAM_GRID, folds=5, n_jobs=-1, metric="accuracy", random_state=42):
+    """k-fold CV of every candidate on all cores, then size and latency of each.
+
+    Returns the leaderboard (best metric first) with one row per candidate.
+    Candidates are refitted on all rows in parallel for the size and node
+    count; latency is measured afterwards, one model at a time, so the
+    timings do not compete with training for cores.
+    """
+    cv = StratifiedKFold(n_splits=folds, shuffle=True, random_state=random_state)
+    grid = GridSearchCV(RandomForestClassifier(random_state=random_state), param_grid,
+                        scoring=["accuracy", "balanced_accuracy"], refit=False, cv=cv, n_jobs=n_jobs)
+    grid.fit(X, y)
+    results = grid.cv_results_
+    candidates = results["params"]
+    fitted = Parallel(n_jobs=n_jobs)(delayed(_fit)(params, X, y, random_state) for params in candidates)
+
+    rows = []
+    for i, (params, model) in enumerate(zip(candidates, fitted)):
+        rows.append({
+            "n_estimators": params["n_estimators"],
+            "max_depth": params["max_depth"],
+            "min_samples_leaf": params["min_samples_leaf"],
+            "cv_accuracy": round(float(results["mean_test_accuracy"][i]), 4),
+            "cv_accuracy_std": round(float(results["std_test_accuracy"][i]), 4),
+            "cv_balanced_accuracy": round(float(results["mean_test_balanced_accuracy"][i]), 4),
+            "fit_seconds": round(float(results["mean_fit_time"][i]), 3),
+            "nodes": sum(tree.tree_.node_count for tree in model.estimators_),
+            "size_kb": round(len(pickle.dumps(model)) / 1024, 1),
+            "latency_ms": round(single_row_latency_ms(model, X[:1]), 3),
+        })
+    leaderboard = pd.DataFrame(rows)
+    leaderboard["pareto"] = pareto_front(leaderboard[f"cv_{metric}"], leaderboard["latency_ms"])
+    return leaderboard.sort_values([f"cv_{metric}", "latency_ms"], ascending=[False, True]).reset_index(drop=True)
+
+
+def select(leaderboard, metric="accuracy", max_latency_ms=None):
+    """Best candidate by metric among those within the latency budget"""
+    rows = leaderboard if max_latency_ms is None else leaderboard[leaderboard["latency_ms"] <= max_latency_ms]
+    if rows.empty:
+        raise ValueError(f"No candidate predicts a single row within {max_latency_ms} ms")
+    best = rows.sort_values([f"cv_{metric}", "latency_ms"], ascending=[False, True]).iloc[0]
+    max_depth = best["max_depth"]
+    return {
+        "n_estimators": int(best["n_estimators"]),
+        "max_depth": None if pd.isna(max_depth) else int(max_depth),
+        "min_samples_leaf": int(best["min_samples_leaf"]),
+    }